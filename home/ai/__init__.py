@@ -1,9 +1,9 @@
-"""
-AI service layer package for chatbot functionality.
-
-This package isolates prompts, parsing, and agent logic so that
-we can later swap implementations (e.g., LangChain) without
-touching views or frontend behavior.
-"""
-
-
+"""
+AI service layer package for chatbot functionality.
+
+This package isolates prompts, parsing, and agent logic so that
+we can later swap implementations (e.g., LangChain) without
+touching views or frontend behavior.
+"""
+
+
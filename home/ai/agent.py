@@ -1,365 +1,757 @@
-from typing import Any, Dict, TypedDict
-import json
-
-import requests
-from django.conf import settings
-
-from home.ai.prompts import build_context_prompt
-from home.ai.parsers import normalize_ai_payload
-from home.models import Project
-
-
-# Optional LangChain imports – if unavailable, we fall back to the
-# existing raw OpenRouter HTTP integration so the chatbot keeps working.
-try:  # pragma: no cover - import-time optional dependency
-    from langchain_openai import ChatOpenAI
-    from langchain_core.prompts import PromptTemplate
-
-    LANGCHAIN_AVAILABLE = True
-except Exception:  # ImportError or anything unexpected
-    ChatOpenAI = None  # type: ignore
-    PromptTemplate = None  # type: ignore
-    LANGCHAIN_AVAILABLE = False
-
-
-# Optional LangGraph imports – if unavailable, we still call the
-# backend directly. When present, we use it for intent routing.
-try:  # pragma: no cover - import-time optional dependency
-    from langgraph.graph import StateGraph, START, END
-
-    LANGGRAPH_AVAILABLE = True
-except Exception:  # ImportError or anything unexpected
-    StateGraph = None  # type: ignore
-    START = None  # type: ignore
-    END = None  # type: ignore
-    LANGGRAPH_AVAILABLE = False
-
-
-class ChatState(TypedDict, total=False):
-    project_id: int
-    question: str
-    language: str
-    intent: str
-    message: str
-    data: Dict[str, Any]
-
-
-def _call_openrouter_raw(prompt: str) -> Dict[str, Any]:
-    """
-    Legacy/raw OpenRouter call that expects a JSON string response
-    and normalizes it. Used as a fallback when LangChain is not
-    available or fails.
-    """
-    headers = {
-        "Authorization": f"Bearer {settings.OPENROUTER_KEY}",
-        "Referer": "https://zerocodebots.onrender.com/",
-        "X-Title": "Project Chatbot",
-        "Content-Type": "application/json",
-    }
-
-    # NOTE: Some providers behind OpenRouter (e.g. Google Gemini/Gemma)
-    # do not allow separate developer/system instructions. To avoid the
-    # "Developer instruction is not enabled" 400 error, we send a single
-    # user message containing our full prompt and JSON instructions.
-    data = {
-        "model": "google/gemma-3-12b-it:free",  # or claude/gpt
-        "messages": [
-            {"role": "user", "content": prompt},
-        ],
-    }
-
-    try:
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
-            headers=headers,
-            json=data,
-            timeout=30,
-        )
-    except Exception as e:
-        print("DEBUG request error (raw):", str(e))
-        return {
-            "intent": "unknown",
-            "message": "Sorry, I couldn't reach the AI service.",
-            "data": {},
-        }
-
-    print("DEBUG status (raw):", response.status_code)
-    print("DEBUG response (raw):", response.text)
-
-    try:
-        content = response.json()["choices"][0]["message"]["content"]
-    except Exception as e:
-        print("DEBUG parse error (raw):", str(e))
-        return {
-            "intent": "unknown",
-            "message": "Sorry, I couldn't fetch a valid response from the AI.",
-            "data": {},
-        }
-
-    return normalize_ai_payload(content)
-
-
-def _call_openrouter_langchain(prompt: str) -> Dict[str, Any]:
-    """
-    LangChain-based call to the same OpenRouter backend, using:
-    - PromptTemplate for prompt composition
-    - JsonOutputParser for structured output
-
-    Falls back to the raw client if anything goes wrong.
-    """
-    if not LANGCHAIN_AVAILABLE:
-        return _call_openrouter_raw(prompt)
-
-    try:
-        # PromptTemplate: we keep a simple template that injects the
-        # already-constructed prompt text.
-        template = PromptTemplate.from_template("{full_prompt}")
-
-        llm = ChatOpenAI(
-            model="google/gemma-3-12b-it:free",
-            api_key=settings.OPENROUTER_KEY,
-            base_url="https://openrouter.ai/api",  # => /v1/chat/completions under the hood
-            # These headers mirror the legacy integration as closely as possible.
-            default_headers={
-                "Referer": "https://zerocodebots.onrender.com",
-                "X-Title": "Project Chatbot",
-            },
-        )
-
-        # Render prompt and invoke LLM directly. Different LangChain
-        # versions may return a BaseMessage or raw string; handle both
-        # and always normalize through our JSON contract.
-        rendered = template.format(full_prompt=prompt)
-        result = llm.invoke(rendered)
-
-        if hasattr(result, "content"):
-            content = result.content  # type: ignore[assignment]
-        else:
-            content = str(result)
-
-        return normalize_ai_payload(content)
-    except Exception as e:
-        print("DEBUG LangChain error:", str(e))
-        # Fallback to raw HTTP client so chatbot keeps working.
-        return _call_openrouter_raw(prompt)
-
-
-def _call_backend(prompt: str) -> Dict[str, Any]:
-    """
-    Unified backend caller. For now we always use the raw OpenRouter
-    client to avoid version-specific LangChain issues.
-    """
-    return _call_openrouter_raw(prompt)
-
-
-_graph_app = None
-
-
-def _route_from_classify(state: ChatState) -> str:
-    intent = (state.get("intent") or "unknown").lower()
-    if intent == "lead":
-        return "lead"
-    if intent == "unknown":
-        return "unknown"
-    if intent in {"answer", "greeting"}:
-        return "answer"
-    # Default branch
-    return "answer"
-
-
-def _node_classify_intent(state: ChatState) -> ChatState:
-    """
-    START → classify_intent
-    Use the model to determine intent/message/data.
-    """
-    project_id = state.get("project_id")
-    question = state.get("question") or ""
-    language = (state.get("language") or "en").lower()
-
-    if not project_id:
-        # Defensive: should not happen, but keep flow safe.
-        payload = {
-            "intent": "unknown",
-            "message": "Missing project information.",
-            "data": {},
-        }
-    else:
-        try:
-            project = Project.objects.get(pk=project_id)
-        except Project.DoesNotExist:
-            payload = {
-                "intent": "unknown",
-                "message": "Project not found.",
-                "data": {},
-            }
-        else:
-            prompt = build_context_prompt(project, question, language_code=language)
-            payload = _call_backend(prompt)
-
-            # Enrich payload with project media when appropriate.
-            # If the model did not include an `image` in `data`, attempt to
-            # resolve a matching QA image from the project's knowledge base.
-            try:
-                if isinstance(payload, dict):
-                    payload.setdefault("data", {})
-                    if payload.get("intent") == "answer" and "image" not in (payload.get("data") or {}):
-                        user_q = (question or "").lower()
-                        # Prefer exact substring matches against QA question/answer text.
-                        for qa in project.qas.all():
-                            if not qa.image:
-                                continue
-                            q_text = (qa.question or "").lower()
-                            a_text = (qa.answer or "").lower()
-                            if user_q and (user_q in q_text or user_q in a_text):
-                                payload["data"]["image"] = {
-                                    "url": qa.image.url,
-                                    "caption": qa.image_description or "",
-                                }
-                                break
-
-                        # If user explicitly asked for an image but no exact match,
-                        # attach the first available QA image as a helpful fallback.
-                        if "image" not in payload["data"] and any(k in user_q for k in ("image", "photo", "picture", "show", "visual", "see")):
-                            for qa in project.qas.all():
-                                if qa.image:
-                                    payload["data"]["image"] = {
-                                        "url": qa.image.url,
-                                        "caption": qa.image_description or "",
-                                    }
-                                    break
-            except Exception as e:
-                # Non-fatal; ensure we don't break the chat flow if media lookup fails.
-                print("DEBUG image enrichment error:", str(e))
-
-    state["intent"] = payload.get("intent", "unknown")
-    state["message"] = payload.get("message", "")
-    state["data"] = payload.get("data") or {}
-    return state
-
-
-def _node_save_lead(state: ChatState) -> ChatState:
-    """
-    [lead] → save_lead
-
-    This node is intentionally side-effect free at the AI layer.
-    Actual Lead creation and analytics are handled in the Django
-    view layer based on the returned intent/data.
-    """
-    # Placeholder to enrich state if needed in future.
-    return state
-
-
-def _node_fallback(state: ChatState) -> ChatState:
-    """
-    [unknown] → fallback
-    """
-    message = state.get("message") or ""
-    if not message.strip():
-        state["message"] = "I'm not sure how to handle that yet, but your message was received."
-    state["intent"] = state.get("intent") or "unknown"
-    return state
-
-
-def _node_respond(state: ChatState) -> ChatState:
-    """
-    Terminal node that just passes the state through.
-    """
-    return state
-
-
-def _get_graph_app():
-    """
-    Lazily build and cache the LangGraph app that routes intents:
-
-    START → classify_intent
-      → [answer] → respond
-      → [lead]   → save_lead → respond
-      → [unknown]→ fallback  → respond
-    """
-    global _graph_app
-    if _graph_app is not None or not LANGGRAPH_AVAILABLE:
-        return _graph_app
-
-    graph = StateGraph(ChatState)
-    graph.add_node("classify_intent", _node_classify_intent)
-    graph.add_node("save_lead", _node_save_lead)
-    graph.add_node("fallback", _node_fallback)
-    graph.add_node("respond", _node_respond)
-
-    graph.add_edge(START, "classify_intent")
-    # Use the simpler add_conditional_edges signature supported by the
-    # installed LangGraph version (no explicit default branch argument).
-    graph.add_conditional_edges(
-        "classify_intent",
-        _route_from_classify,
-        {
-            "answer": "respond",
-            "lead": "save_lead",
-            "unknown": "fallback",
-        },
-    )
-    graph.add_edge("save_lead", "respond")
-    graph.add_edge("fallback", "respond")
-    graph.add_edge("respond", END)
-
-    _graph_app = graph.compile()
-    return _graph_app
-
-
-def _run_intent_graph(project: Project, user_question: str, language_code: str) -> Dict[str, Any]:
-    """
-    Execute the LangGraph intent routing per chat request when
-    LangGraph is available. Falls back to a direct backend call
-    when it is not installed.
-    """
-    if not LANGGRAPH_AVAILABLE:
-        # No graph support – behave like before, just call backend once.
-        prompt = build_context_prompt(project, user_question, language_code=language_code)
-        return _call_backend(prompt)
-
-    app = _get_graph_app()
-    if app is None:
-        # Safety net, although this should not happen.
-        prompt = build_context_prompt(project, user_question, language_code=language_code)
-        return _call_backend(prompt)
-
-    initial_state: ChatState = {
-        "project_id": project.id,
-        "question": user_question,
-        "language": language_code,
-    }
-
-    final_state: ChatState = app.invoke(initial_state)
-
-    return {
-        "intent": final_state.get("intent", "unknown"),
-        "message": final_state.get("message", ""),
-        "data": final_state.get("data", {}) or {},
-    }
-
-
-def generate_openrouter_answer(project: Project, user_question: str, language_code: str = "en") -> Dict[str, Any]:
-    """
-    Call the OpenRouter / Gemma model for a given project + question and
-    return a normalized payload:
-
-    {
-      "intent": "answer|lead|booking|unknown",
-      "message": "text",
-      "data": {},
-    }
-
-    This function is the main AI agent entrypoint.
-    It now executes a LangGraph intent-routing graph per request
-    when available, while still falling back to the existing
-    LangChain/raw backend behaviour. The views/frontend remain
-    unchanged.
-    """
-    # Constrain to supported languages at the agent boundary.
-    language_code = (language_code or "en").lower()
-    if language_code not in {"en", "hi"}:
-        language_code = "en"
-
-    return _run_intent_graph(project, user_question, language_code)
-
-
+from typing import Any, Dict, Iterator, Optional, Tuple, TypedDict
+import json
+import time
+
+from django.conf import settings
+
+from home.ai import fastpath
+from home.ai.cache import AnswerCache, get_answer_cache
+from home.ai.semantic_cache import get_semantic_cache
+from home.ai.singleflight import get_single_flight
+from home.ai.client import (
+    apost_chat_completion,
+    get_httpx_client,
+    openrouter_base_url,
+    openrouter_model,
+    post_chat_completion,
+    stream_chat_completion,
+)
+from home.ai.model_pool import get_model_pool
+from home.ai.prompt_cache import CompiledContext
+from home.ai.prompts import assemble_prompt
+from home.ai.snapshot import KnowledgeBaseSnapshot
+from home.ai.parsers import MessageStreamParser, normalize_ai_payload
+from home.models import Project
+
+
+# LangChain and LangGraph are optional and only imported by the code paths
+# that use them (see home/ai/optional.py): the LangChain client below and
+# CHAT_GRAPH_BACKEND = "langgraph". Otherwise the raw OpenRouter client
+# and the native graph executor (home/ai/graph.py) are used.
+from home.ai.optional import langchain_openai, langchain_prompts, langgraph_graph
+from home.ai import graph as native_graph
+from home.ai.workflows import build_graph_from_workflow, get_workflow_cache, workflow_hash
+
+
+class ChatState(TypedDict, total=False):
+    project_id: int
+    question: str
+    language: str
+    intent: str
+    message: str
+    data: Dict[str, Any]
+    # Prompt size and model latency of the turn (see `_call_with_meta`).
+    meta: Dict[str, Any]
+    # The turn's KnowledgeBaseSnapshot (home/ai/snapshot.py), shared by
+    # every node instead of re-querying the project and its QAs.
+    snapshot: KnowledgeBaseSnapshot
+    # Payload classified before a custom workflow runs (see `_route_payload`).
+    classified: Dict[str, Any]
+
+
+def _build_completion_request(prompt: str, model: str = None) -> Dict[str, Any]:
+    # NOTE: Some providers behind OpenRouter (e.g. Google Gemini/Gemma)
+    # do not allow separate developer/system instructions. To avoid the
+    # "Developer instruction is not enabled" 400 error, we send a single
+    # user message containing our full prompt and JSON instructions.
+    return {
+        "model": model or openrouter_model(),
+        "messages": [
+            {"role": "user", "content": prompt},
+        ],
+    }
+
+
+def _content_from_completion(response: Any) -> str:
+    """
+    Extract the assistant content from a completion response (`requests`
+    or `httpx`, both expose `.raise_for_status()` and `.json()`). HTTP
+    errors and malformed bodies raise, so the model pool fails over.
+    """
+    response.raise_for_status()
+    content = response.json()["choices"][0]["message"]["content"]
+    if not isinstance(content, str):
+        raise ValueError("completion content is not text")
+    return content
+
+
+def _complete_on(prompt: str, model: str) -> str:
+    response = post_chat_completion(_build_completion_request(prompt, model), timeout=30)
+    print("DEBUG status (raw):", model, response.status_code)
+    print("DEBUG response (raw):", response.text)
+    return _content_from_completion(response)
+
+
+async def _acomplete_on(prompt: str, model: str) -> str:
+    response = await apost_chat_completion(_build_completion_request(prompt, model), timeout=30)
+    print("DEBUG status (async):", model, response.status_code)
+    return _content_from_completion(response)
+
+
+def complete_text(prompt: str) -> str:
+    """
+    Raw assistant text for `prompt` from the first healthy model of the
+    pool (home/ai/model_pool.py). Raises when no model could answer.
+    """
+    return get_model_pool().call(lambda model: _complete_on(prompt, model))
+
+
+def _failure_payload(error: Exception) -> Dict[str, Any]:
+    if isinstance(error, (KeyError, IndexError, TypeError, ValueError)):
+        message = "Sorry, I couldn't fetch a valid response from the AI."
+    else:
+        message = "Sorry, I couldn't reach the AI service."
+    return {"intent": "unknown", "message": message, "data": {}}
+
+
+def _call_openrouter_raw(prompt: str) -> Dict[str, Any]:
+    """
+    Legacy/raw OpenRouter call that expects a JSON string response
+    and normalizes it. Used as a fallback when LangChain is not
+    available or fails.
+
+    Failing or slow models are skipped in favour of the next model of
+    the pool; only when every model failed is an "unknown" payload
+    returned.
+    """
+    try:
+        content = complete_text(prompt)
+    except Exception as e:
+        print("DEBUG request error (raw):", str(e))
+        return _failure_payload(e)
+
+    return normalize_ai_payload(content)
+
+
+async def _acall_openrouter_raw(prompt: str) -> Dict[str, Any]:
+    """
+    Async variant of `_call_openrouter_raw` built on the pooled
+    `httpx.AsyncClient`; the event loop stays free while the LLM runs.
+    """
+    try:
+        content = await get_model_pool().acall(lambda model: _acomplete_on(prompt, model))
+    except Exception as e:
+        print("DEBUG request error (async):", str(e))
+        return _failure_payload(e)
+
+    return normalize_ai_payload(content)
+
+
+def _call_openrouter_langchain(prompt: str) -> Dict[str, Any]:
+    """
+    LangChain-based call to the same OpenRouter backend, using:
+    - PromptTemplate for prompt composition
+    - JsonOutputParser for structured output
+
+    Falls back to the raw client if anything goes wrong.
+    """
+    chat_models, prompts = langchain_openai(), langchain_prompts()
+    if chat_models is None or prompts is None:
+        return _call_openrouter_raw(prompt)
+
+    try:
+        # PromptTemplate: we keep a simple template that injects the
+        # already-constructed prompt text.
+        template = prompts.PromptTemplate.from_template("{full_prompt}")
+
+        llm = chat_models.ChatOpenAI(
+            model=get_model_pool().primary(),
+            api_key=settings.OPENROUTER_KEY,
+            base_url=openrouter_base_url(),  # => /chat/completions under the hood
+            # Reuse the shared keep-alive pool instead of a per-call client.
+            http_client=get_httpx_client(),
+            # These headers mirror the legacy integration as closely as possible.
+            default_headers={
+                "Referer": "https://zerocodebots.onrender.com",
+                "X-Title": "Project Chatbot",
+            },
+        )
+
+        # Render prompt and invoke LLM directly. Different LangChain
+        # versions may return a BaseMessage or raw string; handle both
+        # and always normalize through our JSON contract.
+        rendered = template.format(full_prompt=prompt)
+        result = llm.invoke(rendered)
+
+        if hasattr(result, "content"):
+            content = result.content  # type: ignore[assignment]
+        else:
+            content = str(result)
+
+        return normalize_ai_payload(content)
+    except Exception as e:
+        print("DEBUG LangChain error:", str(e))
+        # Fallback to raw HTTP client so chatbot keeps working.
+        return _call_openrouter_raw(prompt)
+
+
+def _call_backend(prompt: str) -> Dict[str, Any]:
+    """
+    Unified backend caller. For now we always use the raw OpenRouter
+    client to avoid version-specific LangChain issues.
+    """
+    return _call_openrouter_raw(prompt)
+
+
+async def _acall_backend(prompt: str) -> Dict[str, Any]:
+    """
+    Async unified backend caller, mirroring `_call_backend`.
+    """
+    return await _acall_openrouter_raw(prompt)
+
+
+def _call_with_meta(project: Project, question: str, language_code: str, compiled: CompiledContext = None):
+    """
+    Assemble the prompt and call the backend. Returns the payload and
+    the turn's `meta`: prompt size stats plus `llm_ms`, the model
+    round-trip time, which views persist on `BotResponse`.
+    """
+    prompt, meta = assemble_prompt(project, question, language_code=language_code, compiled=compiled)
+    started = time.perf_counter()
+    payload = _call_backend(prompt)
+    meta["llm_ms"] = int((time.perf_counter() - started) * 1000)
+    return payload, meta
+
+
+async def _acall_with_meta(project: Project, question: str, language_code: str, compiled: CompiledContext):
+    """Async variant of `_call_with_meta`, on an already compiled context."""
+    prompt, meta = assemble_prompt(project, question, language_code=language_code, compiled=compiled)
+    started = time.perf_counter()
+    payload = await _acall_backend(prompt)
+    meta["llm_ms"] = int((time.perf_counter() - started) * 1000)
+    return payload, meta
+
+
+_graph_apps: Dict[str, Any] = {}
+
+
+def _route_from_classify(state: ChatState) -> str:
+    intent = (state.get("intent") or "unknown").lower()
+    if intent == "lead":
+        return "lead"
+    if intent == "unknown":
+        return "unknown"
+    if intent in {"answer", "greeting"}:
+        return "answer"
+    # Default branch
+    return "answer"
+
+
+def _attach_project_media(
+    payload: Dict[str, Any], question: str, project: Project, snapshot: KnowledgeBaseSnapshot = None
+) -> None:
+    """
+    Enrich payload with project media when appropriate.
+    If the model did not include an `image` in `data`, attempt to
+    resolve a matching QA image from the project's knowledge base.
+    """
+    try:
+        if isinstance(payload, dict):
+            payload.setdefault("data", {})
+            if payload.get("intent") == "answer" and "image" not in (payload.get("data") or {}):
+                snapshot = snapshot or KnowledgeBaseSnapshot(project)
+                user_q = (question or "").lower()
+                # Prefer exact substring matches against QA question/answer text.
+                matches = snapshot.image_entries_mentioning(user_q) if user_q else []
+                if matches:
+                    qa = matches[0].qa
+                    payload["data"]["image"] = {
+                        "url": qa.image.url,
+                        "caption": qa.image_description or "",
+                    }
+
+                # If user explicitly asked for an image but no exact match,
+                # attach the first available QA image as a helpful fallback.
+                if "image" not in payload["data"] and any(k in user_q for k in ("image", "photo", "picture", "show", "visual", "see")):
+                    qa = snapshot.first_image()
+                    if qa is not None:
+                        payload["data"]["image"] = {
+                            "url": qa.image.url,
+                            "caption": qa.image_description or "",
+                        }
+    except Exception as e:
+        # Non-fatal; ensure we don't break the chat flow if media lookup fails.
+        print("DEBUG image enrichment error:", str(e))
+
+
+def _node_classify_intent(state: ChatState) -> ChatState:
+    """
+    START → classify_intent
+    Use the model to determine intent/message/data.
+    """
+    project_id = state.get("project_id")
+    question = state.get("question") or ""
+    language = (state.get("language") or "en").lower()
+
+    # The async and streaming paths classify before running a workflow.
+    payload = state.pop("classified", None)
+    if payload is None and not project_id:
+        # Defensive: should not happen, but keep flow safe.
+        payload = {
+            "intent": "unknown",
+            "message": "Missing project information.",
+            "data": {},
+        }
+    elif payload is None:
+        snapshot = state.get("snapshot")
+        try:
+            if snapshot is None:
+                snapshot = KnowledgeBaseSnapshot(Project.objects.get(pk=project_id))
+        except Project.DoesNotExist:
+            payload = {
+                "intent": "unknown",
+                "message": "Project not found.",
+                "data": {},
+            }
+        else:
+            project = snapshot.project
+            payload, state["meta"] = _call_with_meta(project, question, language, snapshot.compiled)
+
+            _attach_project_media(payload, question, project, snapshot)
+
+    state["intent"] = payload.get("intent", "unknown")
+    state["message"] = payload.get("message", "")
+    state["data"] = payload.get("data") or {}
+    return state
+
+
+def _node_save_lead(state: ChatState) -> ChatState:
+    """
+    [lead] → save_lead
+
+    This node is intentionally side-effect free at the AI layer.
+    Actual Lead creation and analytics are handled in the Django
+    view layer based on the returned intent/data.
+    """
+    # Placeholder to enrich state if needed in future.
+    return state
+
+
+def _node_fallback(state: ChatState) -> ChatState:
+    """
+    [unknown] → fallback
+    """
+    message = state.get("message") or ""
+    if not message.strip():
+        state["message"] = "I'm not sure how to handle that yet, but your message was received."
+    state["intent"] = state.get("intent") or "unknown"
+    return state
+
+
+def _node_respond(state: ChatState) -> ChatState:
+    """
+    Terminal node that just passes the state through.
+    """
+    return state
+
+
+def graph_backend() -> str:
+    """
+    "native" (home/ai/graph.py, the default) or "langgraph", from the
+    CHAT_GRAPH_BACKEND setting; LangGraph must be installed to be used.
+    """
+    backend = str(getattr(settings, "CHAT_GRAPH_BACKEND", "native") or "native").lower()
+    if backend == "langgraph" and langgraph_graph() is not None:
+        return "langgraph"
+    return "native"
+
+
+def _get_graph_app(backend: str = None):
+    """
+    Lazily build and cache the graph app that routes intents:
+
+    START → classify_intent
+      → [answer] → respond
+      → [lead]   → save_lead → respond
+      → [unknown]→ fallback  → respond
+
+    Both backends expose the same builder API, so the graph is defined
+    once and compiled by whichever backend is configured.
+    """
+    backend = backend or graph_backend()
+    app = _graph_apps.get(backend)
+    if app is not None:
+        return app
+
+    graph_module = langgraph_graph() if backend == "langgraph" else native_graph
+    graph_cls, start, end = graph_module.StateGraph, graph_module.START, graph_module.END
+
+    graph = graph_cls(ChatState)
+    graph.add_node("classify_intent", _node_classify_intent)
+    graph.add_node("save_lead", _node_save_lead)
+    graph.add_node("fallback", _node_fallback)
+    graph.add_node("respond", _node_respond)
+
+    graph.add_edge(start, "classify_intent")
+    # Use the simpler add_conditional_edges signature supported by the
+    # installed LangGraph version (no explicit default branch argument).
+    graph.add_conditional_edges(
+        "classify_intent",
+        _route_from_classify,
+        {
+            "answer": "respond",
+            "lead": "save_lead",
+            "unknown": "fallback",
+        },
+    )
+    graph.add_edge("save_lead", "respond")
+    graph.add_edge("fallback", "respond")
+    graph.add_edge("respond", end)
+
+    app = _graph_apps[backend] = graph.compile()
+    return app
+
+
+# Node types usable in `Project.workflow_config` (see home/ai/workflows.py).
+WORKFLOW_NODE_FUNCTIONS = {
+    "classify_intent": _node_classify_intent,
+    "save_lead": _node_save_lead,
+    "fallback": _node_fallback,
+    "respond": _node_respond,
+}
+WORKFLOW_ROUTERS = {
+    "classify_intent": _route_from_classify,
+}
+
+
+def _compile_workflow(workflow: Dict[str, Any], backend: str):
+    nodes = workflow["nodes"]
+    node_functions = {n["id"]: WORKFLOW_NODE_FUNCTIONS[n["type"]] for n in nodes}
+    routers = {n["id"]: WORKFLOW_ROUTERS[n["type"]] for n in nodes if n["type"] in WORKFLOW_ROUTERS}
+    graph_module = langgraph_graph() if backend == "langgraph" else native_graph
+    # Validated when the project was saved (Project.clean).
+    return build_graph_from_workflow(workflow, ChatState, node_functions, routers, graph_module, validate=False)
+
+
+def _workflow_app(project: Project):
+    """
+    The compiled graph of the project's custom workflow, or None when it
+    has none. Graphs are compiled once per (project, config hash) and kept
+    in a bounded LRU; a config that fails to compile is remembered too, so
+    the default graph is used without retrying on every message.
+    """
+    workflow = getattr(project, "workflow_config", None)
+    if not workflow:
+        return None
+    backend = graph_backend()
+
+    def compile_app():
+        try:
+            return _compile_workflow(workflow, backend)
+        except Exception as e:
+            print("WARN: workflow of project", project.pk, "cannot be compiled, using the default graph:", str(e))
+            return None
+
+    digest = f"{backend}:{workflow_hash(workflow)}"
+    return get_workflow_cache().get_or_compile(project.pk, digest, compile_app)
+
+
+def _run_intent_graph(
+    project: Project, user_question: str, language_code: str, snapshot: KnowledgeBaseSnapshot
+) -> Dict[str, Any]:
+    """
+    Execute the intent routing graph per chat request on the configured
+    backend (see `graph_backend`): the project's own workflow when it has
+    one, the default graph otherwise.
+    """
+    app = _workflow_app(project) or _get_graph_app()
+
+    initial_state: ChatState = {
+        "project_id": project.id,
+        "question": user_question,
+        "language": language_code,
+        "snapshot": snapshot,
+    }
+
+    final_state: ChatState = app.invoke(initial_state)
+
+    return {
+        "intent": final_state.get("intent", "unknown"),
+        "message": final_state.get("message", ""),
+        "data": final_state.get("data", {}) or {},
+        "meta": final_state.get("meta") or {},
+    }
+
+
+def _fast_path_answer(project: Project, user_question: str, language_code: str):
+    """Small talk and contact details answered without the model (home/ai/fastpath.py)."""
+    payload = fastpath.classify(project, user_question, language_code)
+    if payload is not None:
+        payload["meta"] = {"fast_path": payload["data"]["fast_path"], "prompt_tokens": 0, "llm_ms": 0}
+    return payload
+
+
+def _lookup_cached_answer(project: Project, user_question: str, language_code: str):
+    """
+    Serve a previous answer without calling the model: exact match first,
+    then a semantic near-duplicate. Returns None on a miss.
+    """
+    cache = get_answer_cache()
+    if cache is not None:
+        cached = cache.get(cache.key_for(project, language_code, user_question))
+        if cached is not None:
+            return cached
+
+    semantic = get_semantic_cache()
+    if semantic is not None:
+        return semantic.lookup(project, language_code, user_question)
+    return None
+
+
+def _supported_language(language_code: str) -> str:
+    # Constrain to supported languages at the agent boundary.
+    language_code = (language_code or "en").lower()
+    return language_code if language_code in {"en", "hi"} else "en"
+
+
+def lookup_answer(project: Project, user_question: str, language_code: str = "en") -> Optional[Dict[str, Any]]:
+    """
+    The payload for a question answered without the model: the fast path
+    first, then the exact and semantic answer caches. None on a miss.
+
+    The generate/stream entrypoints call this themselves; callers that
+    time the lookup separately (home/pipeline.py) call it first and pass
+    `lookup=False`.
+    """
+    language_code = _supported_language(language_code)
+    fast = _fast_path_answer(project, user_question, language_code)
+    if fast is not None:
+        return fast
+    cached = _lookup_cached_answer(project, user_question, language_code)
+    if cached is not None:
+        cached["meta"] = {"cached": True, "prompt_tokens": 0, "llm_ms": 0}
+    return cached
+
+
+def _remember_answer(project: Project, user_question: str, language_code: str, payload: Dict[str, Any]) -> None:
+    cache = get_answer_cache()
+    if cache is not None:
+        cache.set(cache.key_for(project, language_code, user_question), payload)
+
+    semantic = get_semantic_cache()
+    if semantic is not None:
+        semantic.store(project, language_code, user_question, payload)
+
+
+def generate_openrouter_answer(
+    project: Project,
+    user_question: str,
+    language_code: str = "en",
+    snapshot: KnowledgeBaseSnapshot = None,
+    lookup: bool = True,
+) -> Dict[str, Any]:
+    """
+    Call the OpenRouter / Gemma model for a given project + question and
+    return a normalized payload:
+
+    {
+      "intent": "answer|lead|booking|unknown",
+      "message": "text",
+      "data": {},
+      "meta": {"prompt_tokens": ..., "llm_ms": ..., ...},
+    }
+
+    `meta` describes the turn (prompt size, model latency, cache hit);
+    views pop it before persisting or returning the payload.
+
+    This function is the main AI agent entrypoint.
+    It executes the intent-routing graph per request, on the native
+    executor or LangGraph (see `graph_backend`), while still using the
+    existing LangChain/raw backend behaviour. The views/frontend remain
+    unchanged.
+
+    Greetings, thanks, farewells and bare contact details are answered
+    by the deterministic fast path (home/ai/fastpath.py). Repeated
+    questions are served from the exact-match answer cache
+    (home/ai/cache.py) or, for near-duplicates, the semantic cache
+    (home/ai/semantic_cache.py) without calling the model. Identical
+    questions in flight at the same time share a single model call
+    (home/ai/singleflight.py).
+
+    Pass the turn's `snapshot` (home/ai/snapshot.py) when the caller
+    needs the knowledge base too, so it is read only once per turn, and
+    `lookup=False` when `lookup_answer` already missed.
+    """
+    language_code = _supported_language(language_code)
+    if lookup:
+        hit = lookup_answer(project, user_question, language_code)
+        if hit is not None:
+            return hit
+
+    def answer():
+        payload = _run_intent_graph(project, user_question, language_code, snapshot or KnowledgeBaseSnapshot(project))
+        _remember_answer(project, user_question, language_code, payload)
+        return payload
+
+    flight = get_single_flight()
+    if flight is None:
+        return answer()
+    # Identical questions asked concurrently share one model call.
+    payload, coalesced = flight.do(AnswerCache.key_for(project, language_code, user_question), answer)
+    if coalesced:
+        payload["meta"] = {"cached": True, "coalesced": True, "prompt_tokens": 0, "llm_ms": 0}
+    return payload
+
+
+_ROUTE_NODES = {
+    "answer": (_node_respond,),
+    "lead": (_node_save_lead, _node_respond),
+    "unknown": (_node_fallback, _node_respond),
+}
+
+
+async def agenerate_openrouter_answer(
+    project: Project,
+    user_question: str,
+    language_code: str = "en",
+    snapshot: KnowledgeBaseSnapshot = None,
+    lookup: bool = True,
+) -> Dict[str, Any]:
+    """
+    Async variant of `generate_openrouter_answer` for ASGI views.
+
+    Unless a loaded `snapshot` is passed, the knowledge base is loaded
+    with async ORM iteration on a prompt-context cache miss, and the LLM is
+    awaited on the pooled async HTTP client, so no worker thread is held
+    while the model generates. Routing reuses the same node functions
+    and `_route_from_classify` as the graph; they are pure and cheap, so
+    they are applied inline instead of through the graph.
+    """
+    language_code = _supported_language(language_code)
+    if lookup:
+        hit = lookup_answer(project, user_question, language_code)
+        if hit is not None:
+            return hit
+
+    async def answer():
+        kb = snapshot or await KnowledgeBaseSnapshot.aload(project)
+        payload, meta = await _acall_with_meta(project, user_question, language_code, kb.compiled)
+        # The snapshot is loaded, so matching images needs no queries.
+        _attach_project_media(payload, user_question or "", project, kb)
+
+        payload = _route_payload(project, user_question, language_code, payload)
+        _remember_answer(project, user_question, language_code, payload)
+        payload["meta"] = meta
+        return payload
+
+    flight = get_single_flight()
+    if flight is None:
+        return await answer()
+    payload, coalesced = await flight.ado(AnswerCache.key_for(project, language_code, user_question), answer)
+    if coalesced:
+        payload["meta"] = {"cached": True, "coalesced": True, "prompt_tokens": 0, "llm_ms": 0}
+    return payload
+
+
+def _route_payload(project: Project, user_question: str, language_code: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply the graph's routing nodes to an already classified payload.
+    They are pure and cheap, so the async and streaming paths run them
+    inline instead of through the graph executor. A project's custom
+    workflow is run instead, its classify node reusing the payload.
+    """
+    app = _workflow_app(project)
+    if app is not None:
+        final_state = app.invoke(
+            {
+                "project_id": project.id,
+                "question": user_question,
+                "language": language_code,
+                "classified": payload,
+            }
+        )
+        return {
+            "intent": final_state.get("intent", "unknown"),
+            "message": final_state.get("message", ""),
+            "data": final_state.get("data", {}) or {},
+        }
+
+    state: ChatState = {
+        "project_id": project.id,
+        "question": user_question,
+        "language": language_code,
+        "intent": payload.get("intent", "unknown"),
+        "message": payload.get("message", ""),
+        "data": payload.get("data") or {},
+    }
+    for node in _ROUTE_NODES[_route_from_classify(state)]:
+        state = node(state)
+
+    return {
+        "intent": state.get("intent", "unknown"),
+        "message": state.get("message", ""),
+        "data": state.get("data", {}) or {},
+    }
+
+
+def stream_openrouter_answer(
+    project: Project,
+    user_question: str,
+    language_code: str = "en",
+    snapshot: KnowledgeBaseSnapshot = None,
+    lookup: bool = True,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Streaming variant of `generate_openrouter_answer`.
+
+    Requests a streamed completion and yields `("delta", text)` for each
+    piece of the JSON `message` field as the model generates it (pulled
+    out of the partial JSON by `MessageStreamParser`), then exactly one
+    `("payload", payload)` with the same normalized payload, including
+    `meta` (`ttfb_ms` is the time to the first streamed chunk).
+
+    A model that fails before its first chunk is skipped for the next
+    one of the pool; a stream that breaks midway keeps the partial text.
+
+    Fast-path and cached answers are yielded as a single delta.
+    """
+    language_code = _supported_language(language_code)
+    cached = lookup_answer(project, user_question, language_code) if lookup else None
+    if cached is not None:
+        yield ("delta", cached.get("message", ""))
+        yield ("payload", cached)
+        return
+
+    snapshot = snapshot or KnowledgeBaseSnapshot(project)
+    prompt, meta = assemble_prompt(project, user_question, language_code=language_code, compiled=snapshot.compiled)
+    parser = MessageStreamParser()
+    parts = []
+    started = time.perf_counter()
+    pool = get_model_pool()
+    for model in pool.admitted():
+        attempt_started = time.perf_counter()
+        try:
+            request = _build_completion_request(prompt, model)
+            for chunk in stream_chat_completion(request, timeout=30):
+                if not parts:
+                    meta["ttfb_ms"] = int((time.perf_counter() - started) * 1000)
+                parts.append(chunk)
+                text = parser.feed(chunk)
+                if text:
+                    yield ("delta", text)
+        except Exception as e:
+            print("DEBUG request error (stream):", model, str(e))
+            pool.record(model, False, time.perf_counter() - attempt_started)
+            if parts:
+                # Part of the answer is already on screen; a second model
+                # would start over, so keep what we have.
+                break
+            continue
+        pool.record(model, True, time.perf_counter() - attempt_started)
+        break
+    meta["llm_ms"] = int((time.perf_counter() - started) * 1000)
+
+    if parts:
+        payload = normalize_ai_payload("".join(parts))
+    else:
+        payload = {
+            "intent": "unknown",
+            "message": "Sorry, I couldn't reach the AI service.",
+            "data": {},
+        }
+    _attach_project_media(payload, user_question or "", project, snapshot)
+
+    payload = _route_payload(project, user_question, language_code, payload)
+    _remember_answer(project, user_question, language_code, payload)
+    payload["meta"] = meta
+    yield ("payload", payload)
@@ -0,0 +1,178 @@
+"""
+Exact-match answer cache in front of the AI agent.
+
+Embedded bots see the same questions over and over ("pricing?",
+"hours?"). Each cached answer saves a full LLM round trip. Entries are
+keyed on:
+
+    (project id, knowledge-base version, language code, normalized question)
+
+`Project.kb_version` is bumped whenever the project's QuestionAnswer rows
+change (see home/signals.py), so stale answers can never be served after
+an edit, even from another worker process; the local entries of that
+project are also dropped eagerly to free memory.
+
+The cache is in-process (per gunicorn worker), TTL-bounded and evicts
+least-recently-used entries beyond `max_entries`.
+
+Tunables (Django settings):
+- CHAT_ANSWER_CACHE_ENABLED      default True
+- CHAT_ANSWER_CACHE_MAX_ENTRIES  default 2048
+- CHAT_ANSWER_CACHE_TTL          seconds, default 600
+"""
+
+import copy
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+
+
+# Only stable, KB-derived answers are cached. "unknown" also covers
+# transport errors, and "lead"/"booking" carry per-visitor details.
+CACHEABLE_INTENTS = {"answer", "greeting"}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n?!.,;:¿¡।"
+
+
+def normalize_question(question: Optional[str]) -> str:
+    """
+    Canonical form used for cache keys: NFKC, case-folded, collapsed
+    whitespace, surrounding punctuation stripped ("Pricing?" == "pricing").
+    """
+    text = unicodedata.normalize("NFKC", question or "").casefold()
+    text = _WHITESPACE_RE.sub(" ", text)
+    return text.strip(_EDGE_PUNCTUATION)
+
+
+class AnswerCache:
+    """
+    Thread-safe TTL + LRU cache of normalized `{intent, message, data}`
+    payloads, with hit/miss counters overall and per project.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: float = 600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._per_project: Dict[int, Dict[str, int]] = {}
+
+    @staticmethod
+    def key_for(project: Any, language_code: str, question: Optional[str]) -> Tuple[int, int, str, str]:
+        return (
+            project.id,
+            getattr(project, "kb_version", 0) or 0,
+            (language_code or "en").lower(),
+            normalize_question(question),
+        )
+
+    def _count(self, project_id: int, field: str) -> None:
+        counters = self._per_project.setdefault(project_id, {"hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, key: Tuple[int, int, str, str]) -> Optional[Dict[str, Any]]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                self._count(key[0], "misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._count(key[0], "hits")
+            payload = entry[1]
+        # Callers mutate `data` (e.g. lead flags); never hand out our copy.
+        return copy.deepcopy(payload)
+
+    def set(self, key: Tuple[int, int, str, str], payload: Dict[str, Any]) -> bool:
+        """Store `payload` if cacheable; returns True when stored."""
+        if not key[3] or not isinstance(payload, dict):
+            return False
+        if payload.get("intent") not in CACHEABLE_INTENTS:
+            return False
+
+        value = {
+            "intent": payload.get("intent"),
+            "message": payload.get("message", ""),
+            "data": copy.deepcopy(payload.get("data") or {}),
+        }
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def invalidate_project(self, project_id: int) -> int:
+        """Drop all local entries of a project; returns how many were removed."""
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == project_id]
+            for k in stale:
+                del self._entries[k]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+            self._per_project.clear()
+
+    def stats(self, project_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Hit/miss counters (each hit is one LLM call saved). With
+        `project_id`, counters are restricted to that project.
+        """
+        with self._lock:
+            if project_id is not None:
+                counters = dict(self._per_project.get(project_id, {"hits": 0, "misses": 0}))
+                counters["entries"] = sum(1 for k in self._entries if k[0] == project_id)
+            else:
+                counters = {
+                    "hits": self.hits,
+                    "misses": self.misses,
+                    "entries": len(self._entries),
+                    "evictions": self.evictions,
+                }
+        lookups = counters["hits"] + counters["misses"]
+        counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        counters["llm_calls_saved"] = counters["hits"]
+        return counters
+
+
+_answer_cache: Optional[AnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[AnswerCache]:
+    """Process-wide cache configured from settings; None when disabled."""
+    global _answer_cache
+    if not getattr(settings, "CHAT_ANSWER_CACHE_ENABLED", True):
+        return None
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache(
+                    max_entries=int(getattr(settings, "CHAT_ANSWER_CACHE_MAX_ENTRIES", 2048)),
+                    ttl=float(getattr(settings, "CHAT_ANSWER_CACHE_TTL", 600)),
+                )
+    return _answer_cache
@@ -0,0 +1,234 @@
+"""
+Shared HTTP clients for all OpenRouter traffic.
+
+Every chat turn used to open a fresh TCP+TLS connection to openrouter.ai
+through a bare `requests.post`. This module keeps one process-wide
+`requests.Session` with a per-host connection pool and keep-alive, so
+consecutive calls from the same gunicorn worker reuse warm connections.
+
+Connect errors are retried with a bounded exponential backoff. Read
+errors are NOT retried, since the completion may already be running on
+the provider side and a retry would double-bill the request.
+
+Tunables (all optional, read from Django settings):
+- OPENROUTER_BASE_URL        default "https://openrouter.ai/api/v1"
+- OPENROUTER_MODEL           default "google/gemma-3-12b-it:free"
+- OPENROUTER_POOL_SIZE       connections kept alive per host (default 10)
+- OPENROUTER_ASYNC_POOL_SIZE same, for the async client (default 100)
+- OPENROUTER_MAX_RETRIES     retries on connect errors (default 2)
+- OPENROUTER_BACKOFF_FACTOR  base backoff in seconds (default 0.3)
+- OPENROUTER_BACKOFF_MAX     upper bound for a single backoff (default 2.0)
+"""
+
+import asyncio
+import json
+import threading
+import weakref
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+DEFAULT_MODEL = "google/gemma-3-12b-it:free"
+DEFAULT_TIMEOUT = 30
+
+_session: Optional[requests.Session] = None
+_httpx_client = None
+# httpx.AsyncClient connections are bound to the event loop that opened
+# them, so async clients are pooled per loop (one loop per ASGI worker).
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def _setting(name: str, default: Any) -> Any:
+    value = getattr(settings, name, None)
+    return default if value is None else value
+
+
+def openrouter_base_url() -> str:
+    return str(_setting("OPENROUTER_BASE_URL", DEFAULT_BASE_URL)).rstrip("/")
+
+
+def openrouter_model() -> str:
+    return str(_setting("OPENROUTER_MODEL", DEFAULT_MODEL))
+
+
+def openrouter_headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {settings.OPENROUTER_KEY}",
+        "Referer": "https://zerocodebots.onrender.com/",
+        "X-Title": "Project Chatbot",
+        "Content-Type": "application/json",
+    }
+
+
+def _build_retry() -> Retry:
+    retries = int(_setting("OPENROUTER_MAX_RETRIES", 2))
+    # Only connect errors are retried: the request never reached the
+    # server, so retrying a POST is safe. `allowed_methods=None` lifts
+    # urllib3's default restriction to idempotent verbs.
+    return Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        other=0,
+        allowed_methods=None,
+        backoff_factor=float(_setting("OPENROUTER_BACKOFF_FACTOR", 0.3)),
+        backoff_max=float(_setting("OPENROUTER_BACKOFF_MAX", 2.0)),
+        raise_on_status=False,
+    )
+
+
+def _build_session() -> requests.Session:
+    pool_size = int(_setting("OPENROUTER_POOL_SIZE", 10))
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=_build_retry(),
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Return the process-wide pooled session, creating it on first use.
+
+    urllib3's connection pools are thread-safe and callers never mutate
+    session state (headers/cookies are passed per request), so a single
+    session is shared by all threads of a worker.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get_httpx_client():
+    """
+    Pooled `httpx.Client` with the same limits, for the LangChain path
+    (`ChatOpenAI` talks HTTP through httpx rather than requests).
+    """
+    global _httpx_client
+    if _httpx_client is None:
+        with _lock:
+            if _httpx_client is None:
+                import httpx
+
+                pool_size = int(_setting("OPENROUTER_POOL_SIZE", 10))
+                _httpx_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size,
+                    ),
+                    # httpx transport retries only apply to connect errors.
+                    transport=httpx.HTTPTransport(
+                        retries=int(_setting("OPENROUTER_MAX_RETRIES", 2)),
+                    ),
+                    timeout=DEFAULT_TIMEOUT,
+                )
+    return _httpx_client
+
+
+def get_async_client():
+    """
+    Pooled `httpx.AsyncClient` for the running event loop, used by the
+    async chat path so a single ASGI worker can hold many in-flight calls.
+    """
+    import httpx
+
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        pool_size = int(_setting("OPENROUTER_ASYNC_POOL_SIZE", 100))
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+            transport=httpx.AsyncHTTPTransport(
+                retries=int(_setting("OPENROUTER_MAX_RETRIES", 2)),
+            ),
+            timeout=DEFAULT_TIMEOUT,
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def close_clients() -> None:
+    """Close pooled connections (used by tests and benchmarks)."""
+    global _session, _httpx_client
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        if _httpx_client is not None:
+            _httpx_client.close()
+            _httpx_client = None
+
+
+def post_chat_completion(
+    data: Dict[str, Any],
+    timeout: float = DEFAULT_TIMEOUT,
+    base_url: Optional[str] = None,
+) -> requests.Response:
+    """
+    POST an OpenAI-compatible chat completion request through the pool.
+
+    Raises the usual `requests` exceptions; callers decide how to degrade.
+    """
+    url = f"{(base_url or openrouter_base_url()).rstrip('/')}/chat/completions"
+    return get_session().post(url, headers=openrouter_headers(), json=data, timeout=timeout)
+
+
+async def apost_chat_completion(
+    data: Dict[str, Any],
+    timeout: float = DEFAULT_TIMEOUT,
+    base_url: Optional[str] = None,
+):
+    """
+    Async counterpart of `post_chat_completion`; returns an `httpx.Response`.
+    """
+    url = f"{(base_url or openrouter_base_url()).rstrip('/')}/chat/completions"
+    return await get_async_client().post(url, headers=openrouter_headers(), json=data, timeout=timeout)
+
+
+def stream_chat_completion(
+    data: Dict[str, Any],
+    timeout: float = DEFAULT_TIMEOUT,
+    base_url: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    POST a streamed (`"stream": true`) chat completion through the pool
+    and yield the assistant content deltas as the server-sent events
+    arrive. The connection goes back to the pool once the stream ends.
+
+    Raises the usual `requests` exceptions (including HTTP errors).
+    """
+    url = f"{(base_url or openrouter_base_url()).rstrip('/')}/chat/completions"
+    body = dict(data, stream=True)
+    with get_session().post(url, headers=openrouter_headers(), json=body, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        # chunk_size=None hands over each chunk as soon as it is received.
+        for line in response.iter_lines(chunk_size=None):
+            # Lines starting with ":" are keep-alive comments.
+            if not line.startswith(b"data:"):
+                continue
+            chunk = line[5:].strip()
+            if chunk == b"[DONE]":
+                break
+            try:
+                delta = json.loads(chunk)["choices"][0].get("delta") or {}
+            except (ValueError, KeyError, IndexError, TypeError):
+                continue
+            if delta.get("content"):
+                yield delta["content"]
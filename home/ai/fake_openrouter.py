@@ -0,0 +1,300 @@
+"""
+Local stand-in for the OpenRouter chat completions API.
+
+Serves an OpenAI-compatible `POST .../chat/completions` endpoint on
+localhost so benchmarks and tests can exercise the real HTTP path
+without network access or API quota. The server speaks HTTP/1.1 with
+keep-alive, so connection reuse by the client is observable.
+
+Usage:
+
+    with FakeOpenRouter(latency=0.05) as fake:
+        post_chat_completion(data, base_url=fake.base_url)
+
+`manage.py fake_openrouter` runs it standalone (point OPENROUTER_BASE_URL
+at it), and `manage.py loadtest` starts one to drive the chat endpoints.
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from home.ai.tokens import estimate_tokens
+
+
+DEFAULT_CONTENT = json.dumps(
+    {
+        "intent": "answer",
+        "message": "This is a canned answer from the local fake LLM.",
+        "data": {},
+    }
+)
+
+
+def _as_content(payload: Any) -> str:
+    return payload if isinstance(payload, str) else json.dumps(payload)
+
+
+def load_payloads(path: str) -> List[Any]:
+    """Canned payloads from a JSON file holding a list (see `FakeOpenRouter`)."""
+    with open(path, encoding="utf-8") as f:
+        payloads = json.load(f)
+    if not isinstance(payloads, list):
+        raise ValueError(f"{path} must contain a JSON list of payloads")
+    return payloads
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without TCP_NODELAY a
+    # kept-alive connection stalls on delayed ACKs (~40 ms per call).
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.owner._record_connection()  # type: ignore[attr-defined]
+
+    def log_message(self, format, *args):  # noqa: A002 - stdlib signature
+        # Keep benchmark/test output clean.
+        return
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        raw = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _send_chunk(self, raw: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(raw), raw))
+        self.wfile.flush()
+
+    def _send_stream(self, request: Dict[str, Any], content: str) -> None:
+        """Server-sent events in OpenAI's streaming format, chunked."""
+        owner = self.server.owner  # type: ignore[attr-defined]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, piece in enumerate(owner.stream_pieces(content)):
+            if i and owner.stream_interval:
+                time.sleep(owner.stream_interval)
+            event = {
+                "id": "fake-completion",
+                "object": "chat.completion.chunk",
+                "model": request.get("model") or "fake",
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            self._send_chunk(b"data: " + json.dumps(event).encode("utf-8") + b"\n\n")
+        self._send_chunk(b"data: [DONE]\n\n")
+        self._send_chunk(b"")
+
+    def do_POST(self):  # noqa: N802 - stdlib naming
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            request = json.loads(raw or b"{}")
+        except ValueError:
+            request = {}
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        server: "_Server" = self.server  # type: ignore[assignment]
+        server.owner._record(request)
+
+        delay = server.owner.latency_for(request)
+        if delay:
+            time.sleep(delay)
+
+        if server.owner.should_fail(request):
+            self._send_json(server.owner.error_status, {"error": {"message": "injected failure"}})
+            return
+
+        content = server.owner.content_for(request)
+        if request.get("stream"):
+            self._send_stream(request, content)
+            return
+        # A complete body is only ready once the whole answer is generated.
+        if server.owner.stream_interval:
+            time.sleep(server.owner.stream_interval * (len(server.owner.stream_pieces(content)) - 1))
+
+        self._send_json(
+            200,
+            {
+                "id": "fake-completion",
+                "object": "chat.completion",
+                "model": request.get("model") or "fake",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+            },
+        )
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    owner: "FakeOpenRouter"
+
+
+class FakeOpenRouter:
+    """
+    Threaded fake OpenRouter server running in a background thread.
+
+    - `latency`: seconds to sleep before answering each completion (the
+      median when `latency_sigma` is set).
+    - `latency_sigma`: spread of a log-normal latency distribution around
+      `latency` (0 = constant); 0.5 gives a p99 of about 3.2x the median.
+    - `latency_per_1k_tokens`: extra seconds per 1,000 prompt tokens
+      (estimated), simulating prompt processing cost of large prompts.
+    - `content`: the assistant message content to return (a JSON string
+      by default, matching the contract our prompts ask for).
+    - `payloads`: canned answers (JSON-serializable payloads or strings)
+      used instead of `content`. Items of the form
+      `{"match": regex, "payload": ...}` answer requests whose last
+      message matches (case-insensitive, first match wins); the others
+      are served in rotation.
+    - `stream_interval`: seconds between the chunks of a streamed
+      (`"stream": true`) response; `latency` is the time to the first one.
+      Non-streamed responses wait for the same total generation time.
+    - `stream_chunk_chars`: characters of content per streamed chunk.
+    - `model_latency`: per-model latency overriding `latency`, keyed on
+      the request's `model`.
+    - `failing_models`: models that always answer with `error_status`.
+    - `error_rate`: fraction of the other requests that fail the same
+      way (after their latency), drawn from a `seed`ed generator.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        content: Optional[str] = None,
+        latency_per_1k_tokens: float = 0.0,
+        stream_interval: float = 0.0,
+        stream_chunk_chars: int = 8,
+        model_latency: Optional[Dict[str, float]] = None,
+        failing_models: Iterable[str] = (),
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None,
+        latency_sigma: float = 0.0,
+        payloads: Iterable[Any] = (),
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_per_1k_tokens = latency_per_1k_tokens
+        self.content = content if content is not None else DEFAULT_CONTENT
+        self.stream_interval = stream_interval
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.model_latency = dict(model_latency or {})
+        self.failing_models = set(failing_models)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self.latency_sigma = latency_sigma
+        self._matched: List[Tuple["re.Pattern[str]", str]] = []
+        self._rotation: List[str] = []
+        for item in payloads:
+            if isinstance(item, dict) and "match" in item:
+                self._matched.append((re.compile(item["match"], re.IGNORECASE), _as_content(item.get("payload", ""))))
+            else:
+                self._rotation.append(_as_content(item))
+        self._rotation_index = 0
+        self.request_count = 0
+        self.error_count = 0
+        self.model_counts: Dict[str, int] = {}
+        self.connection_count = 0
+        self.last_request: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def _record(self, request: Dict[str, Any]) -> None:
+        with self._lock:
+            self.request_count += 1
+            self.last_request = request
+            model = request.get("model") or ""
+            self.model_counts[model] = self.model_counts.get(model, 0) + 1
+
+    def should_fail(self, request: Dict[str, Any]) -> bool:
+        with self._lock:
+            failed = request.get("model") in self.failing_models or (
+                self.error_rate > 0 and self._random.random() < self.error_rate
+            )
+            if failed:
+                self.error_count += 1
+        return failed
+
+    def latency_for(self, request: Dict[str, Any]) -> float:
+        delay = self.model_latency.get(request.get("model"), self.latency)
+        if self.latency_sigma and delay:
+            with self._lock:
+                delay *= math.exp(self._random.gauss(0.0, self.latency_sigma))
+        if self.latency_per_1k_tokens:
+            tokens = sum(estimate_tokens(str(m.get("content") or "")) for m in request.get("messages") or [])
+            delay += self.latency_per_1k_tokens * tokens / 1000.0
+        return delay
+
+    def content_for(self, request: Dict[str, Any]) -> str:
+        if self._matched:
+            messages = request.get("messages") or [{}]
+            text = str(messages[-1].get("content") or "")
+            for pattern, content in self._matched:
+                if pattern.search(text):
+                    return content
+        if self._rotation:
+            with self._lock:
+                content = self._rotation[self._rotation_index % len(self._rotation)]
+                self._rotation_index += 1
+            return content
+        return self.content
+
+    def stream_pieces(self, content: Optional[str] = None):
+        content = self.content if content is None else content
+        size = self.stream_chunk_chars
+        return [content[i:i + size] for i in range(0, len(content), size)] or [""]
+
+    def _record_connection(self) -> None:
+        with self._lock:
+            self.connection_count += 1
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "FakeOpenRouter":
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.owner = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def __enter__(self) -> "FakeOpenRouter":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
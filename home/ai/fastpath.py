@@ -0,0 +1,153 @@
+"""
+Deterministic fast path in front of the intent graph.
+
+Greetings, thanks, farewells and messages that only share an email
+address or phone number used to cost a full LLM call each. They are
+recognized here with precompiled patterns built from the lexicons in
+home/ai/i18n.py, and answered with a normalized payload right away:
+
+- greeting / thanks / farewell → intent "greeting" with a canned reply
+  in the turn's language,
+- contact details → intent "lead" with `email`, `phone` and, when the
+  message states it, `name` in `data`.
+
+Only whole-message matches count: "hi, what are your opening hours?"
+still goes to the model, and so does a message mentioning an email
+address in a question. Intents a project has not enabled in
+`allowed_intents` are left to the model as well, as are projects with
+a custom workflow, whose graph decides the routing.
+
+Answered payloads carry `data["fast_path"]` (the kind of match), which is
+persisted with the BotResponse and reported by the analytics view.
+
+Tunables (Django settings):
+- CHAT_FAST_PATH_ENABLED  default True
+"""
+
+import re
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+
+from home.ai.i18n import FAREWELLS, GREETINGS, THANKS
+
+
+def _lexicon_pattern(lexicon: Dict[str, tuple]) -> "re.Pattern[str]":
+    phrases = sorted({p for words in lexicon.values() for p in words}, key=len, reverse=True)
+    body = "|".join(re.escape(p).replace(r"\ ", r"\s+") for p in phrases)
+    # The phrase, optionally addressed ("hi there team", "thanks ji") and
+    # repeated ("hi hi"), with nothing but punctuation and emoji around it.
+    return re.compile(
+        rf"^[\W_]*(?:(?:{body})(?:\s+(?:there|all|everyone|team|bot|ji|sir|madam|dear))?[\W_]*)+$",
+        re.IGNORECASE,
+    )
+
+
+_SMALL_TALK = (
+    ("greeting", _lexicon_pattern(GREETINGS)),
+    ("thanks", _lexicon_pattern(THANKS)),
+    ("farewell", _lexicon_pattern(FAREWELLS)),
+)
+
+_EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+_PHONE_RE = re.compile(r"(?<![\w+])\+?\d[\d\s().-]{7,17}\d(?!\w)")
+_NAME_RE = re.compile(
+    r"\b(?:my name is|name is|i am|i'm|this is|mera naam|naam)\s+([A-Za-z][A-Za-z.'-]*(?:\s+[A-Za-z][A-Za-z.'-]*)?)",
+    re.IGNORECASE,
+)
+# Words that may follow "I am" without being a name.
+_NOT_NAMES = {
+    "interested", "looking", "a", "an", "the", "here", "from", "at", "available", "reachable", "on", "ok",
+    "and", "my", "email", "phone", "number", "mobile", "contact",
+}
+# A message sharing contact details is short; longer ones go to the model.
+_LEAD_MAX_WORDS = 14
+
+_REPLIES = {
+    "greeting": {
+        "en": "Hi! I'm the assistant for {name}. How can I help you today?",
+        "hi": "नमस्ते! मैं {name} का सहायक हूँ। मैं आपकी क्या मदद कर सकता हूँ?",
+    },
+    "thanks": {
+        "en": "You're welcome! Is there anything else I can help you with?",
+        "hi": "आपका स्वागत है! क्या मैं और किसी चीज़ में आपकी मदद कर सकता हूँ?",
+    },
+    "farewell": {
+        "en": "Goodbye! Feel free to come back any time.",
+        "hi": "अलविदा! कभी भी दोबारा पूछने आइए।",
+    },
+    "lead": {
+        "en": "Thanks{name}! We've noted your contact details and will get in touch soon.",
+        "hi": "धन्यवाद{name}! हमने आपकी संपर्क जानकारी नोट कर ली है और जल्द ही आपसे संपर्क करेंगे।",
+    },
+}
+
+_ALL_INTENTS = ["answer", "lead", "booking", "greeting", "unknown"]
+
+
+def _extract_lead(text: str) -> Optional[Dict[str, str]]:
+    if "?" in text:
+        return None
+    email = _EMAIL_RE.search(text)
+    phone = None
+    for match in _PHONE_RE.finditer(text):
+        digits = re.sub(r"\D", "", match.group())
+        if 10 <= len(digits) <= 15:
+            phone = match
+            break
+    if email is None and phone is None:
+        return None
+
+    rest = text
+    for match in (email, phone):
+        if match is not None:
+            rest = rest.replace(match.group(), " ")
+    if len(rest.split()) > _LEAD_MAX_WORDS:
+        return None
+
+    data = {}
+    if email is not None:
+        data["email"] = email.group()
+    if phone is not None:
+        data["phone"] = re.sub(r"[^\d+]", "", phone.group())
+    name = _NAME_RE.search(rest)
+    if name is not None:
+        words = name.group(1).split()
+        if words[0].lower() not in _NOT_NAMES:
+            if len(words) > 1 and words[1].lower() in _NOT_NAMES:
+                words = words[:1]  # "I am Asha and ..."
+            data["name"] = " ".join(words).strip(".'-").title()
+    return data
+
+
+def classify(project: Any, question: str, language_code: str = "en") -> Optional[Dict[str, Any]]:
+    """
+    The normalized payload for a message the fast path answers
+    confidently, or None to go through the model.
+    """
+    if not getattr(settings, "CHAT_FAST_PATH_ENABLED", True):
+        return None
+    if getattr(project, "workflow_config", None):
+        return None
+    text = (question or "").strip()
+    if not text or len(text) > 300:
+        return None
+    language = language_code if language_code in ("en", "hi") else "en"
+    allowed = getattr(project, "allowed_intents", None) or _ALL_INTENTS
+
+    if len(text) <= 60 and "greeting" in allowed:
+        for kind, pattern in _SMALL_TALK:
+            if pattern.match(text):
+                return {
+                    "intent": "greeting",
+                    "message": _REPLIES[kind][language].format(name=getattr(project, "name", "") or "us"),
+                    "data": {"fast_path": kind},
+                }
+
+    if "lead" in allowed:
+        data = _extract_lead(text)
+        if data is not None:
+            name = f", {data['name']}" if data.get("name") else ""
+            data["fast_path"] = "lead"
+            return {"intent": "lead", "message": _REPLIES["lead"][language].format(name=name), "data": data}
+    return None
@@ -0,0 +1,241 @@
+"""
+Minimal in-house graph executor for the chat intent graph.
+
+The intent graph is a tiny state machine (classify → respond, or
+save_lead / fallback → respond). Driving it through LangGraph's
+`app.invoke` costs a heavy import, extra memory per worker and tens of
+microseconds of channel bookkeeping per message. This module implements
+the subset of LangGraph's `StateGraph` API the agent uses, so the same
+builder code compiles for either backend:
+
+    graph = StateGraph(ChatState)
+    graph.add_node("classify", classify)
+    graph.add_edge(START, "classify")
+    graph.add_conditional_edges("classify", route, {"answer": "respond"})
+    graph.add_edge("respond", END)
+    app = graph.compile()
+    final_state = app.invoke({"question": "..."})
+
+Nodes receive the state dict and return it (or a dict of updated keys),
+which is merged into the state, as LangGraph does for keys without
+reducers.
+
+Graphs must be acyclic. `compile` checks this and precomputes a
+topological schedule: each node's level is the length of the longest
+path from START to it, so nodes of one level never depend on each other.
+`invoke` walks the levels like LangGraph's supersteps. A node runs when
+an edge from an executed node (or a router's choice) activates it.
+Several plain edges from one node fan out. Active nodes of the same level
+run one after another, each on its own shallow copy of the state, and
+their updates are merged at the end of the level. A node with edges from
+several branches is a join: it runs once, after all of them, on the
+merged state. Two branches writing different values to the same key are
+an error. Branch nodes must therefore return their updates rather than
+mutate nested values in place. Nodes run on the calling thread, so they
+use its database connection like the rest of the request.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+START = "__start__"
+END = "__end__"
+
+DEFAULT_RECURSION_LIMIT = 25
+
+
+class GraphError(ValueError):
+    """Invalid graph definition or a run exceeding the recursion limit."""
+
+
+class _Route:
+    __slots__ = ("target", "router", "mapping", "default")
+
+    def __init__(self, target=None, router=None, mapping=None, default=None):
+        self.target = target
+        self.router = router
+        self.mapping = mapping
+        self.default = default
+
+    def targets(self, nodes) -> List[str]:
+        """Every node this route can lead to."""
+        if self.router is None:
+            return [self.target]
+        # Without a mapping the router's labels are node names.
+        targets = list(self.mapping.values()) if self.mapping is not None else list(nodes)
+        if self.default is not None:
+            targets.append(self.default)
+        return targets
+
+    def next(self, state: Dict[str, Any]) -> str:
+        if self.router is None:
+            return self.target
+        label = self.router(state)
+        if self.mapping is None:
+            return label
+        if label in self.mapping:
+            return self.mapping[label]
+        if self.default is not None:
+            return self.default
+        raise GraphError(f"Router returned unknown branch {label!r}")
+
+
+class StateGraph:
+    """Builder with the `add_node` / `add_edge` / `add_conditional_edges` API."""
+
+    def __init__(self, state_type: Any = None):
+        self.state_type = state_type
+        self.nodes: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self.routes: Dict[str, List[_Route]] = {}
+
+    def add_node(self, name: str, fn: Callable[[Dict[str, Any]], Any]) -> "StateGraph":
+        if name in (START, END) or name in self.nodes:
+            raise GraphError(f"Invalid or duplicate node name {name!r}")
+        self.nodes[name] = fn
+        return self
+
+    def add_edge(self, source: str, target: str) -> "StateGraph":
+        """Add an edge; several edges from one node fan out."""
+        self.routes.setdefault(source, []).append(_Route(target=target))
+        return self
+
+    def add_conditional_edges(
+        self,
+        source: str,
+        router: Callable[[Dict[str, Any]], str],
+        mapping: Optional[Dict[str, str]] = None,
+        default: Optional[str] = None,
+    ) -> "StateGraph":
+        """
+        Route from `source` to `mapping[router(state)]`. Without a mapping
+        the router returns node names, and every node counts as a possible
+        target when the schedule is computed.
+        """
+        route = _Route(router=router, mapping=dict(mapping) if mapping else None, default=default)
+        self.routes.setdefault(source, []).append(route)
+        return self
+
+    def compile(self, recursion_limit: int = DEFAULT_RECURSION_LIMIT) -> "CompiledGraph":
+        if START not in self.routes:
+            raise GraphError("Graph has no entry edge from START")
+        known = set(self.nodes) | {END}
+        successors: Dict[str, set] = {}
+        for source, routes in self.routes.items():
+            if source != START and source not in self.nodes:
+                raise GraphError(f"Edge from unknown node {source!r}")
+            for route in routes:
+                for target in route.targets(self.nodes):
+                    if target not in known:
+                        raise GraphError(f"Edge from {source!r} to unknown node {target!r}")
+                    if source != START and target != END:
+                        successors.setdefault(source, set()).add(target)
+        for name in self.nodes:
+            if name not in self.routes:
+                raise GraphError(f"Node {name!r} has no outgoing edge (add an edge to END)")
+        return CompiledGraph(dict(self.nodes), dict(self.routes), _schedule(self.nodes, successors), recursion_limit)
+
+
+def _schedule(nodes: Dict[str, Any], successors: Dict[str, set]) -> List[Tuple[str, ...]]:
+    """
+    Group nodes into levels by their longest distance from START (Kahn's
+    algorithm); raises GraphError naming a cycle if there is one.
+    """
+    indegree = {name: 0 for name in nodes}
+    for source, targets in successors.items():
+        for target in targets:
+            indegree[target] += 1
+    level = {name: 0 for name in nodes}
+    queue = [name for name, degree in indegree.items() if degree == 0]
+    seen = 0
+    while queue:
+        name = queue.pop()
+        seen += 1
+        for target in successors.get(name, ()):
+            level[target] = max(level[target], level[name] + 1)
+            indegree[target] -= 1
+            if indegree[target] == 0:
+                queue.append(target)
+    if seen < len(nodes):
+        raise GraphError(f"Graph has a cycle: {' → '.join(_find_cycle(successors, indegree))}")
+
+    levels: List[List[str]] = [[] for _ in range(max(level.values(), default=-1) + 1)]
+    for name in nodes:  # insertion order within a level
+        levels[level[name]].append(name)
+    return [tuple(names) for names in levels]
+
+
+def _find_cycle(successors: Dict[str, set], indegree: Dict[str, int]) -> List[str]:
+    # Every node Kahn's algorithm could not release still has an
+    # unreleased predecessor, so walking predecessors must revisit a node.
+    stuck = {name for name, degree in indegree.items() if degree > 0}
+    predecessors: Dict[str, List[str]] = {}
+    for source, targets in successors.items():
+        for target in targets:
+            if source in stuck:
+                predecessors.setdefault(target, []).append(source)
+    path: List[str] = []
+    name = min(stuck)
+    while name not in path:
+        path.append(name)
+        name = min(predecessors[name])
+    cycle = path[path.index(name):][::-1]
+    return cycle + [cycle[0]]
+
+
+class CompiledGraph:
+    """Immutable, thread-safe executable form of a `StateGraph`."""
+
+    def __init__(self, nodes, routes, levels, recursion_limit: int):
+        self._nodes = nodes
+        self._routes = routes
+        self.levels = levels
+        self.recursion_limit = recursion_limit
+
+    def _activate(self, source: str, state: Dict[str, Any], active: set) -> None:
+        for route in self._routes[source]:
+            active.add(route.next(state))
+
+    def invoke(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        state = dict(state)
+        active: set = set()
+        self._activate(START, state, active)
+        steps = 0
+        for level in self.levels:
+            ready = [name for name in level if name in active]
+            if not ready:
+                continue
+            steps += 1
+            if steps > self.recursion_limit:
+                raise GraphError(f"Recursion limit of {self.recursion_limit} reached")
+            if len(ready) == 1:
+                result = self._nodes[ready[0]](state)
+                if isinstance(result, dict) and result is not state:
+                    state.update(result)
+            else:
+                self._run_branches(ready, state)
+            for name in ready:
+                self._activate(name, state, active)
+        return state
+
+    def _run_branches(self, names: List[str], state: Dict[str, Any]) -> None:
+        """Run independent nodes on copies of `state` and merge their updates into it."""
+
+        def run(name: str) -> Dict[str, Any]:
+            branch = dict(state)
+            result = self._nodes[name](branch)
+            if not isinstance(result, dict):
+                return {}
+            # Keys the node added or replaced (a node may return the whole state).
+            return {k: v for k, v in result.items() if k not in state or state[k] is not v}
+
+        updates = [run(name) for name in names]
+
+        merged: Dict[str, Any] = {}
+        writer: Dict[str, str] = {}
+        for name, update in zip(names, updates):
+            for key, value in update.items():
+                if key in merged and merged[key] != value:
+                    raise GraphError(f"Branch nodes {writer[key]!r} and {name!r} both updated {key!r}")
+                merged[key] = value
+                writer[key] = name
+        state.update(merged)
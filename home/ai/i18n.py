@@ -1,39 +1,62 @@
-from typing import Literal
-
-
-LanguageCode = Literal["en", "hi"]
-
-
-def detect_language(text: str | None, default: LanguageCode = "en") -> LanguageCode:
-    """
-    Very lightweight language detector for English vs Hindi.
-
-    - If we detect any Devanagari characters or common Hindi words,
-      we classify as Hindi ("hi").
-    - Otherwise we default to English ("en").
-
-    This avoids adding heavy external dependencies while being
-    good enough for typical chatbot queries.
-    """
-    if not text:
-        return default
-
-    text = text.strip()
-    if not text:
-        return default
-
-    # Heuristic 1: Devanagari Unicode block.
-    for ch in text:
-        if "\u0900" <= ch <= "\u097F":
-            return "hi"
-
-    # Heuristic 2: very common Hindi tokens (in Latin script).
-    lowered = text.lower()
-    hindi_markers = ["namaste", "namaskar", "shukriya", "dhanyavaad", "kaise ho", "kya", "kyu", "nahi"]
-    if any(marker in lowered for marker in hindi_markers):
-        return "hi"
-
-    return "en"
-
-
-
+from typing import Literal
+
+
+LanguageCode = Literal["en", "hi"]
+
+# Common Hindi words in Latin script, used to spot Hinglish messages.
+HINDI_MARKERS = ("namaste", "namaskar", "shukriya", "dhanyavaad", "kaise ho", "kya", "kyu", "nahi")
+
+# Small-talk lexicons per language, matched as whole messages by the
+# fast-path classifier (home/ai/fastpath.py). Latin-script Hindi appears
+# under "hi" so the reply follows `detect_language`.
+GREETINGS = {
+    "en": ("hi", "hii", "hello", "hey", "hey there", "hi there", "hello there", "hiya", "yo", "greetings",
+           "good morning", "good afternoon", "good evening", "good day"),
+    "hi": ("namaste", "namaskar", "namaskaar", "pranam", "नमस्ते", "नमस्कार", "प्रणाम", "हेलो", "हाय",
+           "kaise ho", "aap kaise ho", "कैसे हो", "आप कैसे हैं", "सुप्रभात", "शुभ संध्या"),
+}
+THANKS = {
+    "en": ("thanks", "thank you", "thanks a lot", "thank you so much", "thanks so much", "many thanks", "thx", "ty",
+           "cheers", "great thanks", "ok thanks", "okay thanks", "ok thank you"),
+    "hi": ("shukriya", "dhanyavaad", "dhanyawad", "dhanyavad", "bahut shukriya", "धन्यवाद", "शुक्रिया",
+           "बहुत धन्यवाद", "बहुत शुक्रिया"),
+}
+FAREWELLS = {
+    "en": ("bye", "bye bye", "goodbye", "good bye", "see you", "see ya", "see you later", "good night", "take care",
+           "cya", "later"),
+    "hi": ("alvida", "phir milenge", "अलविदा", "फिर मिलेंगे", "शुभ रात्रि", "टाटा"),
+}
+
+
+def detect_language(text: str | None, default: LanguageCode = "en") -> LanguageCode:
+    """
+    Very lightweight language detector for English vs Hindi.
+
+    - If we detect any Devanagari characters or common Hindi words,
+      we classify as Hindi ("hi").
+    - Otherwise we default to English ("en").
+
+    This avoids adding heavy external dependencies while being
+    good enough for typical chatbot queries.
+    """
+    if not text:
+        return default
+
+    text = text.strip()
+    if not text:
+        return default
+
+    # Heuristic 1: Devanagari Unicode block.
+    for ch in text:
+        if "\u0900" <= ch <= "\u097F":
+            return "hi"
+
+    # Heuristic 2: very common Hindi tokens (in Latin script).
+    lowered = text.lower()
+    if any(marker in lowered for marker in HINDI_MARKERS):
+        return "hi"
+
+    return "en"
+
+
+
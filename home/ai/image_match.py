@@ -0,0 +1,279 @@
+"""
+Indexed fuzzy matching of knowledge-base images to chat answers.
+
+When a question has no exact or containing QA match, the chat turn
+attaches the image of the QA whose question is most similar to the
+user's question or to the bot's reply, if that similarity reaches
+IMAGE_MATCH_THRESHOLD. The similarity of one QA (`similarity`) is the
+best of the difflib ratio and the word overlap against either text. The
+turn used to compute it for every QA with an image, four comparisons
+each: O(N * L^2), 0.5 s at 10,000 QAs.
+
+An `ImageMatcher` is built once per KB version (it is kept with the
+snapshot entries, home/ai/snapshot.py). It holds word and
+character-trigram postings of the image QAs' questions as bitmasks, so
+per-question counts of shared words or trigrams take a few big-int
+operations per posting (`_BitCounter`). `best()` rescores a shortlist
+with the exact `similarity()`:
+
+- the `shortlist_size` QAs with the highest trigram Dice coefficient
+  against each text, which tracks the difflib ratio;
+- for each text, the first QA with the highest word overlap, which is
+  counted exactly, so no QA that passes on overlap alone is missed.
+
+The result differs from the full scan when the scan's winner wins on its
+difflib ratio but is not among the trigram shortlist, typically a
+question whose characters match in order without sharing trigrams
+(heavy misspelling) while other questions share more trigrams. Then
+`best()` returns the best shortlisted QA if it reaches the threshold, or
+none. `manage.py benchmark image_match` reports how often the two agree.
+
+Measured on the benchmark's synthetic 10,000-QA base (3,334 image QAs,
+60 queries): p50 1.5-2.5 ms across runs, p99 4.5-7.5 ms, against about
+900 ms for the scan. Both accept or both reject on every query, and 49
+of 60 pick the same QA; the others are near-ties (e.g. 0.505 vs 0.524)
+between template questions. The shortlisted difflib ratios dominate the
+cost: a shortlist of 2 runs at p50 0.8-0.9 ms, with 47 of 60 picking the
+same QA.
+
+Tunables (Django settings):
+- CHAT_IMAGE_MATCH_SHORTLIST   QAs shortlisted per text, default 8
+"""
+
+import difflib
+import heapq
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+IMAGE_MATCH_THRESHOLD = 0.45
+
+
+def token_overlap(a: str, b: str) -> float:
+    sa = set(a.split())
+    sb = set(b.split())
+    if not sa or not sb:
+        return 0.0
+    inter = sa.intersection(sb)
+    return len(inter) / max(1, min(len(sa), len(sb)))
+
+
+def similarity(q_lower: str, msg_lower: str, qa_q: str) -> float:
+    """
+    How well a (lowercased, stripped) QA question matches the question
+    or the bot's reply: the best of difflib ratio and word overlap.
+    """
+    score_q = difflib.SequenceMatcher(None, q_lower, qa_q).ratio() if q_lower else 0.0
+    score_msg = difflib.SequenceMatcher(None, msg_lower, qa_q).ratio() if msg_lower else 0.0
+    overlap_q = token_overlap(q_lower, qa_q) if q_lower else 0.0
+    overlap_msg = token_overlap(msg_lower, qa_q) if msg_lower else 0.0
+    return max(score_q, score_msg, overlap_q, overlap_msg)
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _bitmask(indexes: Iterable[int], size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for i in indexes:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _bits(mask: int, limit: int) -> List[int]:
+    """Positions of the lowest `limit` set bits of `mask`."""
+    out = []
+    while mask and len(out) < limit:
+        low = mask & -mask
+        out.append(low.bit_length() - 1)
+        mask ^= low
+    return out
+
+
+class _BitCounter:
+    """
+    Per-entry counters held as bit slices: `slices[i]` has bit j set when
+    bit i of entry j's count is set. Adding a posting bitmask costs a few
+    big-int operations, whatever the number of entries in it.
+    """
+
+    def __init__(self, universe: int):
+        self.universe = universe
+        self.slices: List[int] = []
+
+    def add(self, mask: int) -> None:
+        carry = mask
+        for i, s in enumerate(self.slices):
+            self.slices[i] = s ^ carry
+            carry &= s
+            if not carry:
+                return
+        if carry:
+            self.slices.append(carry)
+
+    def exactly(self, k: int) -> int:
+        """Entries whose count is `k`."""
+        if k >= 1 << len(self.slices):
+            return 0
+        equal = self.universe
+        for i, s in enumerate(self.slices):
+            equal &= s if (k >> i) & 1 else ~s
+        return equal
+
+    @property
+    def maximum(self) -> int:
+        """The highest count held by any entry."""
+        top, value = self.universe, 0
+        for i in reversed(range(len(self.slices))):
+            if top & self.slices[i]:
+                top &= self.slices[i]
+                value |= 1 << i
+        return value if top else 0
+
+
+class ImageMatcher:
+    """
+    Word and trigram postings over the questions of `entries` (snapshot
+    QAEntry objects with an image, in primary-key order), as bitmasks
+    over the entries.
+    """
+
+    def __init__(self, entries: Iterable[Any], shortlist_size: int = 8):
+        self.entries: List[Any] = []
+        self.questions: List[str] = []
+        self.trigram_counts: List[int] = []
+        words: Dict[str, List[int]] = {}
+        grams: Dict[str, List[int]] = {}
+        sizes: Dict[int, List[int]] = {}
+        for entry in entries:
+            qa_q = entry.question_lower.strip()
+            if not qa_q:
+                continue
+            idx = len(self.entries)
+            self.entries.append(entry)
+            self.questions.append(qa_q)
+            question_words = set(qa_q.split())
+            sizes.setdefault(len(question_words), []).append(idx)
+            for word in question_words:
+                words.setdefault(word, []).append(idx)
+            question_grams = trigrams(qa_q)
+            self.trigram_counts.append(len(question_grams))
+            for gram in question_grams:
+                grams.setdefault(gram, []).append(idx)
+        n = len(self.entries)
+        self.universe = (1 << n) - 1
+        self.word_masks = {k: _bitmask(v, n) for k, v in words.items()}
+        self.trigram_masks = {k: _bitmask(v, n) for k, v in grams.items()}
+        self.size_masks = {k: _bitmask(v, n) for k, v in sizes.items()}
+        self.shortlist_size = shortlist_size
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _count(self, masks: Dict[str, int], keys: Iterable[str]) -> _BitCounter:
+        counter = _BitCounter(self.universe)
+        for key in keys:
+            mask = masks.get(key)
+            if mask is not None:
+                counter.add(mask)
+        return counter
+
+    def _best_overlap(self, text: str, floor: float) -> int:
+        """The first entry with the highest word overlap with `text` reaching `floor`; -1 if none."""
+        words = set(text.split())
+        counts = self._count(self.word_masks, words)
+        n = len(words)
+        most = counts.maximum
+        # Every (shared words, question size) pair that reaches the floor.
+        levels = sorted(
+            (
+                (shared / min(n, size), shared, size)
+                for size in self.size_masks
+                for shared in range(1, min(n, size, most) + 1)
+                if shared / min(n, size) >= floor
+            ),
+            reverse=True,
+        )
+        found, found_value = 0, 0.0
+        for value, shared, size in levels:
+            if found and value < found_value:
+                break
+            mask = counts.exactly(shared) & self.size_masks[size]
+            if mask:
+                found |= mask
+                found_value = value
+        return (found & -found).bit_length() - 1
+
+    def _similar(self, text: str) -> List[int]:
+        """The entries with the highest trigram Dice coefficient against `text`."""
+        grams = trigrams(text)
+        counts = self._count(self.trigram_masks, grams)
+        wanted = self.shortlist_size * 2
+        shared: Dict[int, int] = {}
+        # Widen by shared-trigram count until the pool is big enough.
+        for k in range(counts.maximum, 0, -1):
+            for idx in _bits(counts.exactly(k), wanted - len(shared)):
+                shared[idx] = k
+            if len(shared) >= wanted:
+                break
+        size = len(grams)
+        totals = self.trigram_counts
+        return heapq.nlargest(self.shortlist_size, shared, key=lambda idx: shared[idx] / (size + totals[idx]))
+
+    def shortlist(self, q_lower: str, msg_lower: str, floor: float = IMAGE_MATCH_THRESHOLD) -> List[int]:
+        """Indexes (ascending) of the entries `best()` scores."""
+        if len(self.entries) <= self.shortlist_size:
+            return list(range(len(self.entries)))
+        picked: Set[int] = set()
+        for text in (q_lower, msg_lower):
+            if text:
+                picked.update(self._similar(text))
+                first = self._best_overlap(text, floor)
+                if first >= 0:
+                    picked.add(first)
+        return sorted(picked)
+
+    def best(
+        self, q_lower: str, msg_lower: str, threshold: float = IMAGE_MATCH_THRESHOLD
+    ) -> Tuple[Optional[Any], float]:
+        """
+        The shortlisted QA scoring highest (earliest on ties) at or above
+        `threshold`, and its score; (None, 0.0) when none does.
+        """
+        texts = [text for text in (q_lower, msg_lower) if text]
+        if not texts:
+            return None, 0.0
+        best, best_score = None, 0.0
+
+        def beats(score: float) -> bool:
+            return score > best_score if best is not None else score >= threshold
+
+        for idx in self.shortlist(q_lower, msg_lower, threshold):
+            qa_q = self.questions[idx]
+            # `similarity()`, skipping the difflib ratios whose cheap upper
+            # bounds cannot beat the best score so far.
+            score = max(token_overlap(text, qa_q) for text in texts)
+            for text in texts:
+                matcher = difflib.SequenceMatcher(None, text, qa_q)
+                if beats(matcher.real_quick_ratio()) and beats(matcher.quick_ratio()):
+                    score = max(score, matcher.ratio())
+            if beats(score):
+                best, best_score = self.entries[idx].qa, score
+        return best, best_score
+
+
+def scan_best(entries: Sequence[Any], q_lower: str, msg_lower: str) -> Tuple[Optional[Any], float]:
+    """
+    Reference: score every entry (the pre-index matcher). Kept for the
+    equivalence tests and the image_match benchmark.
+    """
+    best = None
+    best_score = 0.0
+    for entry in entries:
+        qa_q = entry.question_lower.strip()
+        if not qa_q:
+            continue
+        score = similarity(q_lower, msg_lower, qa_q)
+        if score > best_score:
+            best_score = score
+            best = entry.qa
+    return best, best_score
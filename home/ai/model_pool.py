@@ -0,0 +1,461 @@
+"""
+Multi-model failover for LLM calls.
+
+Free OpenRouter models regularly return 429/5xx or stall for tens of
+seconds. Instead of pinning every chat turn to one model, calls go
+through an ordered pool (`OPENROUTER_MODELS`, primary first). Each model
+has a circuit breaker over its recent calls:
+
+- closed:    requests flow; a call counts as bad when it raised or took
+             longer than `slow_call_seconds`.
+- open:      once at least `min_calls` of the last `window` calls were
+             seen and the bad fraction reaches `failure_ratio`, the model
+             is skipped for `cooldown` seconds.
+- half-open: after the cooldown one trial call is let through; success
+             closes the breaker, failure opens it again.
+
+A failed call moves on to the next model whose breaker admits requests.
+With hedging enabled, a second request to the next model is also fired
+when the first has not answered after the model's p95 latency; the first
+good answer wins and the slower call is abandoned (its outcome is still
+recorded on its breaker).
+
+Tunables (Django settings):
+- OPENROUTER_MODELS          ordered model list, default [OPENROUTER_MODEL]
+- CHAT_BREAKER_WINDOW        calls remembered per model, default 20
+- CHAT_BREAKER_MIN_CALLS     calls before the breaker may open, default 5
+- CHAT_BREAKER_FAILURE_RATIO bad-call fraction that opens it, default 0.5
+- CHAT_BREAKER_SLOW_SECONDS  calls slower than this count as bad, default 20
+- CHAT_BREAKER_COOLDOWN      seconds a breaker stays open, default 30
+- CHAT_HEDGE_ENABLED         fire hedged requests, default False
+- CHAT_HEDGE_DELAY           hedge delay until enough latency samples, default 2.0
+- CHAT_HEDGE_MIN_DELAY       lower bound of the p95-based delay, default 0.25
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from home.ai.client import openrouter_model
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Successful latencies kept per model for the p95 hedge delay.
+LATENCY_SAMPLES = 100
+MIN_LATENCY_SAMPLES = 10
+
+
+class NoModelAvailable(Exception):
+    """Every model of the pool has an open circuit breaker."""
+
+
+class CircuitBreaker:
+    """Rolling-window breaker of one model, driven by errors and slow calls."""
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_ratio: float = 0.5,
+        slow_call_seconds: float = 20.0,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown = cooldown
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """True if a request may be sent now (claims the half-open trial)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """Give back a half-open trial that was abandoned without an outcome."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record(self, ok: bool, seconds: float) -> None:
+        bad = not ok or seconds > self.slow_call_seconds
+        with self._lock:
+            if ok:
+                self._latencies.append(seconds)
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._trial_in_flight = False
+                if bad:
+                    self._trip()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if state == OPEN:
+                # A call admitted before the breaker opened; nothing to decide.
+                return
+            self._outcomes.append(bad)
+            calls = len(self._outcomes)
+            if calls >= self.min_calls and sum(self._outcomes) / calls >= self.failure_ratio:
+                self._trip()
+
+    def _trip(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.opened += 1
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._outcomes)
+            return {
+                "state": self._current_state(),
+                "recent_calls": calls,
+                "recent_failure_ratio": round(sum(self._outcomes) / calls, 4) if calls else 0.0,
+                "times_opened": self.opened,
+            }
+
+
+class ModelPool:
+    """
+    Ordered models with one breaker each. `call(fn)` runs `fn(model)`
+    with failover (and optional hedging); `acall` is the async variant.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker,
+        hedge: bool = False,
+        hedge_delay: float = 2.0,
+        hedge_min_delay: float = 0.25,
+        max_workers: int = 32,
+    ):
+        if not models:
+            raise ValueError("ModelPool needs at least one model")
+        self.models = list(dict.fromkeys(models))
+        self._breaker_factory = breaker_factory
+        self.breakers = {model: breaker_factory() for model in self.models}
+        self.hedge = hedge
+        self.default_hedge_delay = hedge_delay
+        self.hedge_min_delay = hedge_min_delay
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failovers = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.rejected = 0
+
+    def admitted(self) -> Iterator[str]:
+        """
+        Models whose breaker admits a request, lazily in preference order.
+        Taking a half-open model claims its single trial call, so callers
+        must record (or `release`) every model they take.
+        """
+        for model in self.models:
+            if self.breakers[model].allow():
+                yield model
+
+    def primary(self) -> str:
+        """The preferred model right now (the first one if all are open)."""
+        for model in self.models:
+            if self.breakers[model].state != OPEN:
+                return model
+        return self.models[0]
+
+    def record(self, model: str, ok: bool, seconds: float) -> None:
+        self.breakers[model].record(ok, seconds)
+
+    def release(self, model: str) -> None:
+        self.breakers[model].release()
+
+    def hedge_delay(self, model: str) -> float:
+        p95 = self.breakers[model].p95()
+        if p95 is None:
+            return self.default_hedge_delay
+        return max(self.hedge_min_delay, p95)
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _first(self, models: Iterator[str]) -> str:
+        self._count("calls")
+        model = next(models, None)
+        if model is None:
+            self._count("rejected")
+            raise NoModelAvailable("all models are temporarily disabled")
+        return model
+
+    def _attempt(self, model: str, fn: Callable[[str], Any]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = fn(model)
+        except Exception:
+            self.record(model, False, time.perf_counter() - started)
+            raise
+        self.record(model, True, time.perf_counter() - started)
+        return result
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self._max_workers, thread_name_prefix="llm-hedge")
+        return self._executor
+
+    def call(self, fn: Callable[[str], Any]) -> Any:
+        """
+        Return `fn(model)` for the first model that answers without
+        raising. Raises the last error when every admitted model failed
+        and `NoModelAvailable` when no breaker admits a request.
+        """
+        models = self.admitted()
+        model: Optional[str] = self._first(models)
+        if self.hedge:
+            return self._call_hedged(fn, model, models)
+
+        last_error: Optional[Exception] = None
+        while model is not None:
+            try:
+                return self._attempt(model, fn)
+            except Exception as e:
+                print(f"WARN: model {model} failed: {e}")
+                last_error = e
+            model = next(models, None)
+            if model is not None:
+                self._count("failovers")
+        raise last_error  # type: ignore[misc]
+
+    def _call_hedged(self, fn: Callable[[str], Any], first: str, models: Iterator[str]) -> Any:
+        executor = self._get_executor()
+        pending: Dict[Any, Tuple[str, bool]] = {executor.submit(self._attempt, first, fn): (first, False)}
+        exhausted = False
+        last_error: Optional[Exception] = None
+
+        def launch(hedged: bool) -> bool:
+            model = next(models, None)
+            if model is None:
+                return False
+            pending[executor.submit(self._attempt, model, fn)] = (model, hedged)
+            return True
+
+        while pending:
+            timeout = None
+            if not exhausted and len(pending) == 1:
+                (model, _), = pending.values()
+                timeout = self.hedge_delay(model)
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # No answer within the model's p95 latency: race the next one.
+                if launch(True):
+                    self._count("hedges")
+                else:
+                    exhausted = True
+                continue
+            for future in done:
+                model, hedged = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"WARN: model {model} failed: {e}")
+                    last_error = e
+                    continue
+                if hedged:
+                    self._count("hedge_wins")
+                return result
+            if not pending and not exhausted:
+                if launch(False):
+                    self._count("failovers")
+                else:
+                    exhausted = True
+        raise last_error  # type: ignore[misc]
+
+    async def _aattempt(self, model: str, fn: Callable[[str], Awaitable[Any]]) -> Any:
+        started = time.perf_counter()
+        try:
+            result = await fn(model)
+        except Exception:
+            self.record(model, False, time.perf_counter() - started)
+            raise
+        self.record(model, True, time.perf_counter() - started)
+        return result
+
+    async def acall(self, fn: Callable[[str], Awaitable[Any]]) -> Any:
+        """Async variant of `call`; losing hedged requests are cancelled."""
+        models = self.admitted()
+        first = self._first(models)
+        pending: Dict["asyncio.Future", Tuple[str, bool]] = {
+            asyncio.ensure_future(self._aattempt(first, fn)): (first, False)
+        }
+        exhausted = False
+        last_error: Optional[Exception] = None
+
+        def launch(hedged: bool) -> bool:
+            model = next(models, None)
+            if model is None:
+                return False
+            pending[asyncio.ensure_future(self._aattempt(model, fn))] = (model, hedged)
+            return True
+
+        try:
+            while pending:
+                timeout = None
+                if self.hedge and not exhausted and len(pending) == 1:
+                    (model, _), = pending.values()
+                    timeout = self.hedge_delay(model)
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if launch(True):
+                        self._count("hedges")
+                    else:
+                        exhausted = True
+                    continue
+                for task in done:
+                    model, hedged = pending.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        print(f"WARN: model {model} failed: {e}")
+                        last_error = e
+                        continue
+                    if hedged:
+                        self._count("hedge_wins")
+                    return result
+                if not pending and not exhausted:
+                    if launch(False):
+                        self._count("failovers")
+                    else:
+                        exhausted = True
+        finally:
+            # The losing side of a hedge says nothing about its model.
+            for task, (model, _) in pending.items():
+                task.cancel()
+                self.release(model)
+        raise last_error  # type: ignore[misc]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def reset(self) -> None:
+        """Close all breakers and zero the counters (tests, benchmarks)."""
+        with self._lock:
+            self.breakers = {model: self._breaker_factory() for model in self.models}
+            self.calls = self.failovers = self.hedges = self.hedge_wins = self.rejected = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failovers": self.failovers,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "rejected": self.rejected,
+            "models": {
+                model: dict(self.breakers[model].stats(), p95_ms=_ms(self.breakers[model].p95()))
+                for model in self.models
+            },
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[int]:
+    return None if seconds is None else int(seconds * 1000)
+
+
+def configured_models() -> List[str]:
+    models = getattr(settings, "OPENROUTER_MODELS", None) or []
+    if isinstance(models, str):
+        models = [m.strip() for m in models.split(",")]
+    models = [m for m in models if m]
+    return models or [openrouter_model()]
+
+
+def _pool_config() -> Tuple[Any, ...]:
+    return (
+        tuple(configured_models()),
+        int(getattr(settings, "CHAT_BREAKER_WINDOW", 20)),
+        int(getattr(settings, "CHAT_BREAKER_MIN_CALLS", 5)),
+        float(getattr(settings, "CHAT_BREAKER_FAILURE_RATIO", 0.5)),
+        float(getattr(settings, "CHAT_BREAKER_SLOW_SECONDS", 20)),
+        float(getattr(settings, "CHAT_BREAKER_COOLDOWN", 30)),
+        bool(getattr(settings, "CHAT_HEDGE_ENABLED", False)),
+        float(getattr(settings, "CHAT_HEDGE_DELAY", 2.0)),
+        float(getattr(settings, "CHAT_HEDGE_MIN_DELAY", 0.25)),
+    )
+
+
+_model_pool: Optional[ModelPool] = None
+_model_pool_config: Optional[Tuple[Any, ...]] = None
+_model_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> ModelPool:
+    """
+    Process-wide pool configured from settings. It is rebuilt (with fresh
+    breakers) when the configuration changes, e.g. under override_settings.
+    """
+    global _model_pool, _model_pool_config
+    config = _pool_config()
+    if _model_pool is None or _model_pool_config != config:
+        with _model_pool_lock:
+            if _model_pool is None or _model_pool_config != config:
+                if _model_pool is not None:
+                    _model_pool.close()
+                models, window, min_calls, ratio, slow, cooldown, hedge, delay, min_delay = config
+                _model_pool = ModelPool(
+                    list(models),
+                    breaker_factory=lambda: CircuitBreaker(
+                        window=window,
+                        min_calls=min_calls,
+                        failure_ratio=ratio,
+                        slow_call_seconds=slow,
+                        cooldown=cooldown,
+                    ),
+                    hedge=hedge,
+                    hedge_delay=delay,
+                    hedge_min_delay=min_delay,
+                )
+                _model_pool_config = config
+    return _model_pool
@@ -0,0 +1,64 @@
+"""
+Optional heavy dependencies (LangChain, LangGraph), loaded on first use.
+
+The chat path talks to the model through the raw client (home/ai/client.py)
+and runs its graphs on the native executor (home/ai/graph.py), so importing
+these packages at module level only added cold-start time and memory to
+every worker. Availability is checked with `find_spec`, which does not
+import anything; the packages themselves are imported by the accessors
+below when a code path actually needs them. A package that is installed
+but fails to import is reported once and then treated as unavailable.
+"""
+
+import importlib
+import importlib.util
+import threading
+from typing import Any, Dict, Optional
+
+
+_modules: Dict[str, Optional[Any]] = {}
+_lock = threading.Lock()
+
+
+def installed(*names: str) -> bool:
+    """True if every top-level package in `names` can be imported (nothing is imported)."""
+    for name in names:
+        try:
+            if importlib.util.find_spec(name) is None:
+                return False
+        except (ImportError, ValueError):
+            return False
+    return True
+
+
+def load(name: str) -> Optional[Any]:
+    """Import and return module `name`, or None if it is unavailable."""
+    if name in _modules:
+        return _modules[name]
+    with _lock:
+        if name not in _modules:
+            try:
+                _modules[name] = importlib.import_module(name)
+            except Exception as e:  # ImportError or anything unexpected
+                print(f"WARN: optional dependency {name} could not be imported: {e}")
+                _modules[name] = None
+    return _modules[name]
+
+
+LANGCHAIN_AVAILABLE = installed("langchain_openai", "langchain_core")
+LANGGRAPH_AVAILABLE = installed("langgraph")
+
+
+def langgraph_graph() -> Optional[Any]:
+    """`langgraph.graph` (StateGraph, START, END), or None."""
+    return load("langgraph.graph") if LANGGRAPH_AVAILABLE else None
+
+
+def langchain_openai() -> Optional[Any]:
+    """`langchain_openai` (ChatOpenAI), or None."""
+    return load("langchain_openai") if LANGCHAIN_AVAILABLE else None
+
+
+def langchain_prompts() -> Optional[Any]:
+    """`langchain_core.prompts` (PromptTemplate), or None."""
+    return load("langchain_core.prompts") if LANGCHAIN_AVAILABLE else None
@@ -1,87 +1,360 @@
-import json
-from typing import Any, Dict
-
-
-def normalize_ai_payload(raw_text: str) -> Dict[str, Any]:
-    """
-    Ensure the AI output is a valid JSON payload with the required shape:
-    { "intent": "answer|lead|booking|greeting|unknown", "message": "text", "data": {} }
-
-    Falls back gracefully if parsing fails or the structure is invalid.
-    """
-    raw_text = (raw_text or "").strip()
-
-    # Default fallback if anything goes wrong
-    fallback = {
-        "intent": "unknown",
-        "message": raw_text or "Sorry, I couldn't fetch a response from the AI.",
-        "data": {},
-    }
-
-    # Some models (e.g. Gemma) may wrap JSON in Markdown code fences,
-    # e.g. ```json { ... } ``` – strip those if present.
-    candidate = raw_text
-    if candidate.startswith("```"):
-        # Remove leading ```lang and trailing ```
-        parts = candidate.split("```")
-        if len(parts) >= 3:
-            # parts[0] == "", parts[1] == "json\n{...}", parts[-1] == ""
-            inner = parts[1]
-            # Drop possible language prefix like "json\n"
-            if "\n" in inner:
-                inner = inner.split("\n", 1)[1]
-            candidate = inner.strip()
-
-    try:
-        parsed = json.loads(candidate)
-    except Exception:
-        # Model returned free text instead of JSON
-        return fallback
-
-    if not isinstance(parsed, dict):
-        return fallback
-
-    intent = parsed.get("intent", "unknown")
-    message = parsed.get("message", "")
-    data = parsed.get("data", {})
-
-    allowed_intents = {"answer", "lead", "booking", "greeting", "unknown"}
-
-    if intent not in allowed_intents:
-        intent = "unknown"
-
-    if not isinstance(message, str) or not message.strip():
-        message = fallback["message"]
-
-    if not isinstance(data, dict):
-        data = {}
-
-    # Allow an optional `image` object inside data. Normalize minimal expected fields.
-    image = data.get("image")
-    if isinstance(image, dict):
-        image_url = image.get("url")
-        caption = image.get("caption") or image.get("description") or image.get("reason") or ""
-        # Keep only the safe fields we expect; URL may be absent (backend can attach it).
-        normalized_image = {}
-        if isinstance(image_url, str) and image_url.strip():
-            normalized_image["url"] = image_url.strip()
-        if isinstance(caption, str) and caption.strip():
-            normalized_image["caption"] = caption.strip()
-
-        if normalized_image:
-            data["image"] = normalized_image
-        else:
-            # Keep descriptive reason if present but no URL/caption
-            reason = image.get("reason")
-            if isinstance(reason, str) and reason.strip():
-                data["image"] = {"reason": reason.strip()}
-            else:
-                data.pop("image", None)
-
-    return {
-        "intent": intent,
-        "message": message.strip(),
-        "data": data,
-    }
-
-
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+_DECODER = json.JSONDecoder()
+_OPENERS = {"{": "}", "[": "]"}
+_STRUCTURE_RE = re.compile(r"[{}\[\]\"']")
+_STRING_END_RE = {'"': re.compile(r'["\\]'), "'": re.compile(r"['\\]")}
+_BARE_WORD_RE = re.compile(r"[A-Za-z_]+")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+def _repair_json(text: str, start: int) -> Optional[str]:
+    """
+    Rewrite the balanced JSON-ish value opening at `text[start]` as strict
+    JSON: single-quoted strings become double-quoted, trailing commas are
+    dropped, raw newlines inside strings are escaped and Python literals
+    (True/False/None) are mapped. None when the value never closes or its
+    brackets do not match.
+    """
+    out = [text[start]]
+    stack = [_OPENERS[text[start]]]
+    quote = None  # the quote character of the string being read
+    escape = False
+    pending_comma = False
+    i = start + 1
+    end = len(text)
+    while i < end:
+        char = text[i]
+        if quote is not None:
+            if escape:
+                escape = False
+                # \' is not a JSON escape; inside a double-quoted string it is just '.
+                out.append("'" if char == "'" else "\\" + char)
+            elif char == "\\":
+                escape = True
+            elif char == quote:
+                quote = None
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')  # only reachable inside a single-quoted string
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char in " \t\r\n":
+            i += 1
+            continue
+        if pending_comma:
+            pending_comma = False
+            if char not in "}]":
+                out.append(",")
+        if char == ",":
+            pending_comma = True
+        elif char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in _OPENERS:
+            stack.append(_OPENERS[char])
+            out.append(char)
+        elif char in "}]":
+            if char != stack.pop():
+                return None
+            out.append(char)
+            if not stack:
+                return "".join(out)
+        else:
+            word = _BARE_WORD_RE.match(text, i)
+            if word is not None:
+                out.append(_PYTHON_LITERALS.get(word.group(), word.group()))
+                i = word.end()
+                continue
+            out.append(char)
+        i += 1
+    return None
+
+
+# Bounds on the work `extract_json` does for one reply: longer text is
+# cut, at most MAX_JSON_ATTEMPTS values are decoded or repaired and
+# their lengths add up to at most MAX_JSON_WORK_FACTOR times the text's,
+# and unterminated strings are rescanned at most MAX_JSON_RESCANS times.
+MAX_JSON_CHARS = 100_000
+MAX_JSON_ATTEMPTS = 1000
+MAX_JSON_WORK_FACTOR = 4
+MAX_JSON_RESCANS = 4
+
+
+def _balanced_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    (start, end) of the bracketed values in `text` whose brackets balance,
+    from one left-to-right pass tracking bracket depth and string state.
+    Values are yielded by start position once their outermost bracket
+    closes (or breaks on a mismatched closer, which spoils every value
+    still open). Quotes only open strings inside brackets, so apostrophes
+    in prose are ignored; a quote inside brackets that runs to the end of
+    the text is taken as prose too, and the region is scanned again from
+    its second opener (at most MAX_JSON_RESCANS times).
+    """
+    stack: List[Tuple[int, str]] = []
+    spans: List[Tuple[int, int]] = []
+    rescans = 0
+    pos = 0
+    while True:
+        match = _STRUCTURE_RE.search(text, pos)
+        if match is None:
+            break
+        i = match.start()
+        char = text[i]
+        pos = i + 1
+        if char in _OPENERS:
+            stack.append((i, _OPENERS[char]))
+        elif char in "}]":
+            if not stack:
+                continue
+            start, closer = stack.pop()
+            if char == closer:
+                spans.append((start, pos))
+                if stack:
+                    continue
+            else:
+                stack.clear()
+            yield from sorted(spans)
+            spans.clear()
+        elif stack:
+            end_re = _STRING_END_RE[char]
+            while True:
+                end = end_re.search(text, pos)
+                if end is None or text[end.start()] != "\\":
+                    break
+                pos = end.end() + 1
+            if end is not None:
+                pos = end.end()
+                continue
+            if rescans >= MAX_JSON_RESCANS:
+                break
+            rescans += 1
+            pos = stack[0][0] + 1
+            stack.clear()
+            spans.clear()
+    # Values nested in brackets that never close.
+    yield from sorted(spans)
+
+
+def extract_json(text: str, kind: Optional[type] = None) -> Any:
+    """
+    The first JSON object or array in a model reply, or None.
+
+    Tolerates what models wrap around or get wrong in their JSON: Markdown
+    fences, prose before or after the value, trailing commas and
+    single-quoted strings. One pass over the text finds the bracketed
+    values that balance (`_balanced_spans`); they are decoded in place (no
+    copies) and only values that fail to decode go through `_repair_json`.
+    With `kind` (dict or list), values of the other type are skipped.
+    Unbalanced brackets are never decoded and the values tried are bounded
+    in total length, so the work stays linear in the length of the text
+    (itself capped at MAX_JSON_CHARS).
+    """
+    if not text:
+        return None
+    text = text[:MAX_JSON_CHARS]
+    attempts = 0
+    budget = MAX_JSON_WORK_FACTOR * len(text)
+    for start, end in _balanced_spans(text):
+        if kind is not None and (text[start] == "{") != (kind is dict):
+            continue
+        attempts += 1
+        budget -= end - start
+        if attempts > MAX_JSON_ATTEMPTS or budget < 0:
+            return None
+        try:
+            return _DECODER.raw_decode(text, start)[0]
+        except (ValueError, RecursionError):
+            pass
+        repaired = _repair_json(text, start)
+        if repaired is None:
+            continue
+        try:
+            return json.loads(repaired)
+        except (ValueError, RecursionError):
+            continue
+    return None
+
+
+def normalize_ai_payload(raw_text: str) -> Dict[str, Any]:
+    """
+    Ensure the AI output is a valid JSON payload with the required shape:
+    { "intent": "answer|lead|booking|greeting|unknown", "message": "text", "data": {} }
+
+    Falls back gracefully if parsing fails or the structure is invalid.
+    """
+    raw_text = (raw_text or "").strip()
+
+    # Default fallback if anything goes wrong
+    fallback = {
+        "intent": "unknown",
+        "message": raw_text or "Sorry, I couldn't fetch a response from the AI.",
+        "data": {},
+    }
+
+    # Some models (e.g. Gemma) wrap the JSON in Markdown fences or prose,
+    # or get its syntax slightly wrong; salvage the object if there is one.
+    parsed = extract_json(raw_text, dict)
+    if parsed is None:
+        # Model returned free text instead of JSON
+        return fallback
+
+    intent = parsed.get("intent", "unknown")
+    message = parsed.get("message", "")
+    data = parsed.get("data", {})
+
+    allowed_intents = {"answer", "lead", "booking", "greeting", "unknown"}
+
+    if intent not in allowed_intents:
+        intent = "unknown"
+
+    if not isinstance(message, str) or not message.strip():
+        message = fallback["message"]
+
+    if not isinstance(data, dict):
+        data = {}
+
+    # Allow an optional `image` object inside data. Normalize minimal expected fields.
+    image = data.get("image")
+    if isinstance(image, dict):
+        image_url = image.get("url")
+        caption = image.get("caption") or image.get("description") or image.get("reason") or ""
+        # Keep only the safe fields we expect; URL may be absent (backend can attach it).
+        normalized_image = {}
+        if isinstance(image_url, str) and image_url.strip():
+            normalized_image["url"] = image_url.strip()
+        if isinstance(caption, str) and caption.strip():
+            normalized_image["caption"] = caption.strip()
+
+        if normalized_image:
+            data["image"] = normalized_image
+        else:
+            # Keep descriptive reason if present but no URL/caption
+            reason = image.get("reason")
+            if isinstance(reason, str) and reason.strip():
+                data["image"] = {"reason": reason.strip()}
+            else:
+                data.pop("image", None)
+
+    return {
+        "intent": intent,
+        "message": message.strip(),
+        "data": data,
+    }
+
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class MessageStreamParser:
+    """
+    Incremental parser pulling the top-level `"message"` string out of a
+    JSON object that arrives in arbitrary chunks (a streamed completion).
+
+    `feed(chunk)` returns the message text decoded from that chunk, so it
+    can be forwarded to the user before the object is complete. Anything
+    before the first `{` (e.g. a Markdown fence) is ignored, nested values
+    are skipped, and escapes, including `\\uXXXX` surrogate pairs split
+    across chunks, are decoded. The full response text should still be
+    passed to `normalize_ai_payload` once the stream ends.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.expect = "key"  # at depth 1: key | colon | value | comma
+        self.in_string = False
+        self.escape = False
+        self.unicode_digits: Optional[str] = None
+        self.high_surrogate: Optional[int] = None
+        self.reading_key = False
+        self.capturing = False
+        self.key_chars: List[str] = []
+        self.last_key = ""
+        self.message = ""
+        self.complete = False
+
+    def _emit(self, char: str, out: List[str]) -> None:
+        if self.reading_key:
+            self.key_chars.append(char)
+        elif self.capturing:
+            out.append(char)
+
+    def _emit_code_point(self, code: int, out: List[str]) -> None:
+        if 0xD800 <= code <= 0xDBFF:
+            self.high_surrogate = code
+            return
+        if 0xDC00 <= code <= 0xDFFF and self.high_surrogate is not None:
+            code = 0x10000 + ((self.high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self.high_surrogate = None
+        self._emit(chr(code), out)
+
+    def _end_string(self) -> None:
+        self.in_string = False
+        if self.reading_key:
+            self.reading_key = False
+            self.last_key = "".join(self.key_chars)
+            self.expect = "colon"
+        else:
+            if self.capturing:
+                self.capturing = False
+                self.complete = True
+            if self.depth == 1:
+                self.expect = "comma"
+
+    def feed(self, chunk: str) -> str:
+        out: List[str] = []
+        for char in chunk:
+            if self.in_string:
+                if self.unicode_digits is not None:
+                    self.unicode_digits += char
+                    if len(self.unicode_digits) == 4:
+                        try:
+                            self._emit_code_point(int(self.unicode_digits, 16), out)
+                        except ValueError:
+                            pass
+                        self.unicode_digits = None
+                elif self.escape:
+                    self.escape = False
+                    if char == "u":
+                        self.unicode_digits = ""
+                    else:
+                        self._emit(_ESCAPES.get(char, char), out)
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self._end_string()
+                else:
+                    self._emit(char, out)
+            elif self.depth == 0:
+                if char == "{" and not self.complete:
+                    self.depth = 1
+                    self.expect = "key"
+            elif char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect == "key":
+                    self.reading_key = True
+                    self.key_chars = []
+                elif self.depth == 1 and self.expect == "value":
+                    self.capturing = self.last_key == "message" and not self.complete
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1:
+                    self.expect = "comma"
+            elif self.depth == 1:
+                if char == ":" and self.expect == "colon":
+                    self.expect = "value"
+                elif char == ",":
+                    self.expect = "key"
+        text = "".join(out)
+        self.message += text
+        return text
@@ -0,0 +1,184 @@
+"""
+Cached bot_key → project resolution for the widget and chat endpoints.
+
+Every widget load and every chat message used to look the project up by
+`bot_key` in the database. `ProjectResolver.resolve` returns a
+`ProjectSnapshot` (the few fields these endpoints need, immutable)
+from a Django cache instead, so repeated lookups of a key cost no
+query:
+
+- found keys are cached for CHAT_PROJECT_CACHE_TTL seconds,
+- unknown keys are cached as misses for CHAT_PROJECT_CACHE_NEGATIVE_TTL
+  seconds, so scans over random keys do not reach the database either
+  (keys longer than the column are rejected outright).
+
+Entries are dropped when a project is saved or deleted and when its
+knowledge base changes (`kb_version` is cached too, and the answer,
+semantic and prompt-context caches key on it), see home/signals.py.
+With a cache shared by the workers (Redis, Memcached) that reaches
+every worker; with the default LocMemCache other workers see the change
+once their entry expires, so multi-worker deployments should point
+CHAT_PROJECT_CACHE at a shared cache.
+
+Tunables (Django settings):
+- CHAT_PROJECT_CACHE_ENABLED       default True
+- CHAT_PROJECT_CACHE               cache alias, default "default"
+- CHAT_PROJECT_CACHE_TTL           seconds, default 60
+- CHAT_PROJECT_CACHE_NEGATIVE_TTL  seconds, default 30
+"""
+
+import hashlib
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Stored for keys that match no project.
+_MISSING = "-"
+BOT_KEY_MAX_LENGTH = 64
+
+
+class ProjectSnapshot(NamedTuple):
+    """The cached project fields the embed and chat endpoints read."""
+
+    id: int
+    name: str
+    bot_key: str
+    allowed_intents: Tuple[str, ...]
+    voice_enabled: bool
+    workflow_config: Optional[Dict[str, Any]]
+    kb_version: int
+    retrieval_top_k: int
+    prompt_token_budget: int
+
+    @property
+    def pk(self) -> int:
+        return self.id
+
+    def as_project(self):
+        """
+        A Project instance built from the snapshot without a query, for
+        code that needs a model (foreign keys, `project.qas`). Other
+        fields are deferred and load on first access.
+        """
+        from home.models import Project
+
+        values = dict(self._asdict(), allowed_intents=list(self.allowed_intents))
+        # from_db takes the values in model field order.
+        names = [f.attname for f in Project._meta.concrete_fields if f.attname in values]
+        return Project.from_db("default", names, [values[name] for name in names])
+
+
+class ProjectResolver:
+    def __init__(self, cache_alias: str = "default", ttl: float = 60, negative_ttl: float = 30):
+        self.cache_alias = cache_alias
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, bot_key: str) -> str:
+        digest = hashlib.sha1(bot_key.encode("utf-8")).hexdigest()
+        return f"chat:project:{self._generation}:key:{digest}"
+
+    def _id_key(self, project_id: int) -> str:
+        return f"chat:project:{self._generation}:id:{project_id}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def resolve(self, bot_key: Optional[str]) -> Optional[ProjectSnapshot]:
+        """The project with this bot key, or None."""
+        from home.models import Project
+
+        if not bot_key or len(bot_key) > BOT_KEY_MAX_LENGTH:
+            return None
+        key = self._key(bot_key)
+        cached = self.cache.get(key)
+        if cached == _MISSING:
+            self._count("negative_hits")
+            return None
+        if cached is not None:
+            self._count("hits")
+            return ProjectSnapshot(*cached)
+
+        self._count("misses")
+        row = Project.objects.filter(bot_key=bot_key).values_list(*ProjectSnapshot._fields).first()
+        if row is None:
+            self.cache.set(key, _MISSING, self.negative_ttl)
+            return None
+        snapshot = ProjectSnapshot(*row)
+        snapshot = snapshot._replace(allowed_intents=tuple(snapshot.allowed_intents or ()))
+        # Stored as a plain tuple; the id entry lets saves find the key.
+        self.cache.set_many({key: tuple(snapshot), self._id_key(snapshot.id): bot_key}, self.ttl)
+        return snapshot
+
+    async def aresolve(self, bot_key: Optional[str]) -> Optional[ProjectSnapshot]:
+        from asgiref.sync import sync_to_async
+
+        return await sync_to_async(self.resolve)(bot_key)
+
+    def project(self, bot_key: Optional[str]):
+        """The Project for a chat turn with this bot key (no query when cached), or None."""
+        snapshot = self.resolve(bot_key)
+        return snapshot.as_project() if snapshot is not None else None
+
+    async def aproject(self, bot_key: Optional[str]):
+        from asgiref.sync import sync_to_async
+
+        return await sync_to_async(self.project)(bot_key)
+
+    def invalidate_project(self, project_id: int, bot_key: Optional[str] = None) -> None:
+        """Forget a project's entry (and a negative entry for its new key)."""
+        id_key = self._id_key(project_id)
+        keys = [id_key]
+        for known in {self.cache.get(id_key), bot_key}:
+            if known:
+                keys.append(self._key(known))
+        self.cache.delete_many(keys)
+
+    def clear(self) -> None:
+        """Forget this worker's entries (left to expire in the cache) and counters."""
+        with self._lock:
+            self._generation += 1
+            self.hits = self.negative_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "db_lookups": self.misses,
+                "hit_ratio": round((self.hits + self.negative_hits) / lookups, 4) if lookups else 0.0,
+                "ttl": self.ttl,
+            }
+
+
+_resolver: Optional[ProjectResolver] = None
+_resolver_lock = threading.Lock()
+
+
+def get_project_resolver() -> Optional[ProjectResolver]:
+    """Process-wide resolver configured from settings; None when disabled."""
+    global _resolver
+    if not getattr(settings, "CHAT_PROJECT_CACHE_ENABLED", True):
+        return None
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = ProjectResolver(
+                    cache_alias=getattr(settings, "CHAT_PROJECT_CACHE", "default") or "default",
+                    ttl=float(getattr(settings, "CHAT_PROJECT_CACHE_TTL", 60)),
+                    negative_ttl=float(getattr(settings, "CHAT_PROJECT_CACHE_NEGATIVE_TTL", 30)),
+                )
+    return _resolver
@@ -0,0 +1,136 @@
+"""
+Compiled per-project prompt context.
+
+Every chat turn used to query all QuestionAnswer rows of the project and
+re-render the `Q1:/A1:` context, although the knowledge base only
+changes when the owner edits it. A `CompiledContext` holds what depends
+on the knowledge base alone:
+
+- the loaded QA rows (no per-turn query),
+- for knowledge bases that fit the retrieval window (`retrieval_top_k`)
+  without compressing any answer, the rendered context block itself and
+  the smallest token budget for which it is valid, so such turns only
+  splice the user question into the cached template parts.
+
+Entries are keyed on (project id, `kb_version`, `retrieval_top_k`,
+CHAT_MAX_ANSWER_TOKENS). The language only changes the instruction
+template, whose parts are memoized per language in home/ai/prompts.py,
+so one entry serves both languages. `kb_version` is bumped on QA
+save/delete and after bulk imports (home/signals.py), which also drops
+this worker's entries of the project eagerly.
+
+Tunables (Django settings):
+- CHAT_PROMPT_CACHE_ENABLED      default True
+- CHAT_PROMPT_CACHE_MAX_ENTRIES  projects kept compiled, default 128
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from django.conf import settings
+
+
+class CompiledContext:
+    """The knowledge-base part of a project's prompt, built once per KB version."""
+
+    def __init__(
+        self,
+        qas: List[Any],
+        block: Optional[str] = None,
+        stats: Optional[Dict[str, int]] = None,
+        min_budget: int = 0,
+    ):
+        self.qas = qas
+        # Set only when the context does not depend on the question.
+        self.block = block
+        self.stats = stats or {}
+        self.min_budget = min_budget
+        # Normalized QA fields, derived on first use by home/ai/snapshot.py.
+        self.entries = None
+
+    def static_context(self, budget: int) -> Optional[Tuple[str, Dict[str, int]]]:
+        """The cached block and stats if valid for `budget` (0 = unlimited)."""
+        if self.block is None or (budget and budget < self.min_budget):
+            return None
+        return self.block, dict(self.stats)
+
+
+class PromptContextCache:
+    """Thread-safe LRU of `CompiledContext` entries with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CompiledContext]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(project: Any) -> Tuple[int, int, int, int]:
+        return (
+            project.pk,
+            getattr(project, "kb_version", 0) or 0,
+            getattr(project, "retrieval_top_k", 8),
+            int(getattr(settings, "CHAT_MAX_ANSWER_TOKENS", 300)),
+        )
+
+    def get(self, project: Any) -> Optional[CompiledContext]:
+        key = self.key_for(project)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, project: Any, entry: CompiledContext) -> None:
+        key = self.key_for(project)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_project(self, project_id: int) -> int:
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == project_id]
+            for k in stale:
+                del self._entries[k]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "static_entries": sum(1 for e in self._entries.values() if e.block is not None),
+            }
+
+
+_prompt_cache: Optional[PromptContextCache] = None
+_prompt_cache_lock = threading.Lock()
+
+
+def get_prompt_cache() -> Optional[PromptContextCache]:
+    """Process-wide compiled-context cache; None when disabled."""
+    global _prompt_cache
+    if not getattr(settings, "CHAT_PROMPT_CACHE_ENABLED", True):
+        return None
+    if _prompt_cache is None:
+        with _prompt_cache_lock:
+            if _prompt_cache is None:
+                _prompt_cache = PromptContextCache(
+                    max_entries=int(getattr(settings, "CHAT_PROMPT_CACHE_MAX_ENTRIES", 128)),
+                )
+    return _prompt_cache
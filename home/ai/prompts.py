@@ -1,63 +1,265 @@
-from typing import Any
-
-from home.models import Project
-
-
-def build_context_prompt(project: Project, user_question: str, language_code: str = "en") -> str:
-    """
-    Build the strict context prompt for the per-project chatbot.
-
-    This is kept in a separate module so it can be swapped or extended
-    (e.g., with LangChain prompt templates) without touching views.
-    """
-    qas = project.qas.all()
-    context = "\n".join(
-        f"Q{idx + 1}: {qa.question}\nA{idx + 1}: {qa.answer}"
-        for idx, qa in enumerate(qas)
-    )
-
-    # Constrain to supported languages, defaulting to English.
-    language_code = (language_code or "en").lower()
-    if language_code not in {"en", "hi"}:
-        language_code = "en"
-
-    language_label = "English" if language_code == "en" else "Hindi"
-
-    return f"""
-You are a strict assistant. Only answer based on the context provided below.
-Do NOT make up any answers or add extra information.
-
-The user's preferred language code is "{language_code}" and the corresponding
-language is "{language_label}". You MUST write the "message" field of your
-JSON response entirely in this language and be natural and fluent.
-
-Context:
-{context}
-
-If the answer is not found in the above context, you MUST set "intent" to "unknown"
-and respond with a helpful fallback message in the JSON "message" field in the same
-language as requested above.
-
-You MUST respond ONLY with a single valid JSON object with this exact structure
-and no extra text before or after it:
-{{
-  "intent": "answer" | "lead" | "booking" | "greeting" | "unknown",
-  "message": "text response to show to the user",
-  "data": {{}}
-}}
-
-
-Note on images: If the correct response should include an image that exists in the
-project's knowledge base, set the `data` field to include an `image` object with
-non-sensitive descriptive fields only (the backend will attach the actual image URL
-if available). Example:
-
-    "data": {{"image": {{"reason": "illustrates the product feature", "caption": "Front view of Model X"}}}}
-
-Do NOT include external URLs in the `image` field — leave URL resolution to the
-backend code which has access to project media.
-
-User Question: {user_question}
-"""
-
-
+import functools
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from home.ai.client import openrouter_model
+from home.ai.prompt_cache import CompiledContext, get_prompt_cache
+from home.ai.retrieval import select_relevant_qas, tokenize
+from home.ai.tokens import CHARS_PER_TOKEN, estimate_tokens, model_prompt_budget
+from home.models import Project
+
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?।])\s+")
+
+# Below this many free tokens another QA is not worth adding.
+MIN_ENTRY_TOKENS = 32
+
+
+def compress_answer(answer: str, question: str, max_tokens: int) -> str:
+    """
+    Fit an answer into `max_tokens`: long answers (e.g. scraped pages
+    from `import_from_website`) are reduced to the sentences sharing the
+    most words with the question, kept in their original order; a
+    single oversized sentence is cut at a word boundary.
+    """
+    answer = (answer or "").strip()
+    if max_tokens <= 0 or estimate_tokens(answer) <= max_tokens:
+        return answer
+
+    sentences = [s for s in _SENTENCE_RE.split(answer) if s]
+    query = set(tokenize(question))
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: (-len(query.intersection(tokenize(sentences[i]))), i),
+    )
+    chosen, used = [], 0
+    for i in ranked:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost <= max_tokens:
+            chosen.append(i)
+            used += cost
+    if chosen:
+        return " ".join(sentences[i] for i in sorted(chosen)) + " …"
+
+    cut = answer[: max(1, max_tokens - 1) * CHARS_PER_TOKEN]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut + " …"
+
+
+def assemble_context(
+    project: Project, user_question: str, qas: Iterable[Any], budget: int = 0
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Render the `Q1:/A1:` context from the QAs most relevant to the
+    question (top `project.retrieval_top_k`, best first) within `budget`
+    tokens (0 = unlimited). Answers are compressed to at most
+    CHAT_MAX_ANSWER_TOKENS, and further to fit what is left of the
+    budget; the best match is always included.
+
+    Returns the block and its stats (tokens, QAs, compressed answers).
+    """
+    top_k = getattr(project, "retrieval_top_k", 8)
+    max_answer = int(getattr(settings, "CHAT_MAX_ANSWER_TOKENS", 300))
+
+    entries: List[str] = []
+    used = 0
+    compressed = 0
+    for qa in select_relevant_qas(project, qas, user_question, top_k):
+        n = len(entries) + 1
+        head = f"Q{n}: {qa.question}\nA{n}: "
+        cap = max_answer if max_answer > 0 else 0
+        if budget:
+            remaining = budget - used - estimate_tokens(head) - 1
+            if entries and remaining < MIN_ENTRY_TOKENS:
+                # Smaller, less relevant QAs may still fit further down.
+                continue
+            room = max(remaining, MIN_ENTRY_TOKENS)
+            cap = min(cap, room) if cap else room
+        answer = compress_answer(qa.answer, user_question, cap)
+        if answer != (qa.answer or "").strip():
+            compressed += 1
+        entry = head + answer
+        entries.append(entry)
+        used += estimate_tokens(entry) + 1
+
+    return "\n".join(entries), {"context_tokens": used, "context_qas": len(entries), "compressed_answers": compressed}
+
+
+def build_context_block(project: Project, user_question: str, qas: Iterable[Any]) -> str:
+    """
+    The context block alone, within `project.prompt_token_budget`.
+    """
+    budget = getattr(project, "prompt_token_budget", 0) or 0
+    return assemble_context(project, user_question, qas, budget)[0]
+
+
+def compile_context(project: Project, qas: Iterable[Any]) -> CompiledContext:
+    """
+    Precompute the question-independent part of the context. When all
+    QAs go into the prompt (the KB fits `retrieval_top_k`, or retrieval
+    is off) and no answer needs compressing, the block is rendered once
+    together with the smallest budget for which `assemble_context` would
+    render exactly the same block.
+    """
+    qas = list(qas)
+    top_k = getattr(project, "retrieval_top_k", 8)
+    if top_k > 0 and len(qas) > top_k:
+        return CompiledContext(qas)
+
+    block, stats = assemble_context(project, "", qas)
+    if stats["compressed_answers"]:
+        return CompiledContext(qas)
+
+    used = min_budget = 0
+    for n, qa in enumerate(qas, 1):
+        head = f"Q{n}: {qa.question}\nA{n}: "
+        answer = (qa.answer or "").strip()
+        answer_tokens = estimate_tokens(answer)
+        if n > 1:
+            # `assemble_context` skips entries once less than this is left.
+            answer_tokens = max(answer_tokens, MIN_ENTRY_TOKENS)
+        min_budget = max(min_budget, used + estimate_tokens(head) + 1 + answer_tokens)
+        used += estimate_tokens(head + answer) + 1
+    return CompiledContext(qas, block, stats, min_budget)
+
+
+def cached_prompt_context(project: Project) -> Optional[CompiledContext]:
+    """The compiled context of a saved project if cached, else None."""
+    cache = get_prompt_cache()
+    if cache is None or project.pk is None:
+        return None
+    return cache.get(project)
+
+
+def store_prompt_context(project: Project, qas: Iterable[Any]) -> CompiledContext:
+    """Compile the context from `qas` and cache it (saved projects only)."""
+    compiled = compile_context(project, qas)
+    cache = get_prompt_cache()
+    if cache is not None and project.pk is not None:
+        cache.set(project, compiled)
+    return compiled
+
+
+def prompt_context(project: Project) -> CompiledContext:
+    """The project's compiled context, querying its QAs on a cache miss."""
+    return cached_prompt_context(project) or store_prompt_context(project, project.qas.all())
+
+
+def build_context_prompt(
+    project: Project,
+    user_question: str,
+    language_code: str = "en",
+    qas: Optional[Iterable[Any]] = None,
+) -> str:
+    """
+    Build the strict context prompt for the per-project chatbot.
+
+    This is kept in a separate module so it can be swapped or extended
+    (e.g., with LangChain prompt templates) without touching views.
+
+    See `assemble_prompt`, which also reports the prompt size.
+    """
+    return assemble_prompt(project, user_question, language_code=language_code, qas=qas)[0]
+
+
+def assemble_prompt(
+    project: Project,
+    user_question: str,
+    language_code: str = "en",
+    qas: Optional[Iterable[Any]] = None,
+    model: Optional[str] = None,
+    compiled: Optional[CompiledContext] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    Build the prompt within the token budget of `model` (default: the
+    configured OpenRouter model), further capped by
+    `project.prompt_token_budget` for the context. Only the QAs most
+    relevant to the question are included (see `assemble_context`).
+
+    `qas` may be passed to build from exactly those QuestionAnswer rows;
+    otherwise the project's compiled context is used (`compiled`, or the
+    cached one, see home/ai/prompt_cache.py), so a turn usually runs no
+    query and, for small knowledge bases, only splices in the question.
+
+    Returns `(prompt, stats)`; stats holds `prompt_tokens`, `budget` and
+    the context counters.
+    """
+    if qas is None:
+        compiled = compiled or prompt_context(project)
+        qas = compiled.qas
+
+    # Constrain to supported languages, defaulting to English.
+    language_code = (language_code or "en").lower()
+    if language_code not in {"en", "hi"}:
+        language_code = "en"
+
+    prefix, middle, suffix = _template_parts(language_code)
+    frame = estimate_tokens(prefix + middle + user_question + suffix)
+    budget = max(MIN_ENTRY_TOKENS, model_prompt_budget(model or openrouter_model()) - frame)
+    project_budget = getattr(project, "prompt_token_budget", 0) or 0
+    if project_budget:
+        budget = min(budget, project_budget)
+
+    static = compiled.static_context(budget) if compiled is not None else None
+    context, stats = static or assemble_context(project, user_question, qas, budget)
+    prompt = prefix + context + middle + user_question + suffix
+    stats.update(prompt_tokens=estimate_tokens(prompt), budget=budget)
+    return prompt, stats
+
+
+_CONTEXT_MARK = "\x00context\x00"
+_QUESTION_MARK = "\x00question\x00"
+
+
+@functools.lru_cache(maxsize=None)
+def _template_parts(language_code: str) -> Tuple[str, str, str]:
+    """The instruction template split around the context and the question."""
+    prefix, rest = _render_prompt(language_code, _CONTEXT_MARK, _QUESTION_MARK).split(_CONTEXT_MARK)
+    middle, suffix = rest.split(_QUESTION_MARK)
+    return prefix, middle, suffix
+
+
+def _render_prompt(language_code: str, context: str, user_question: str) -> str:
+    language_label = "English" if language_code == "en" else "Hindi"
+
+    return f"""
+You are a strict assistant. Only answer based on the context provided below.
+Do NOT make up any answers or add extra information.
+
+The user's preferred language code is "{language_code}" and the corresponding
+language is "{language_label}". You MUST write the "message" field of your
+JSON response entirely in this language and be natural and fluent.
+
+Context:
+{context}
+
+If the answer is not found in the above context, you MUST set "intent" to "unknown"
+and respond with a helpful fallback message in the JSON "message" field in the same
+language as requested above.
+
+You MUST respond ONLY with a single valid JSON object with this exact structure
+and no extra text before or after it:
+{{
+  "intent": "answer" | "lead" | "booking" | "greeting" | "unknown",
+  "message": "text response to show to the user",
+  "data": {{}}
+}}
+
+
+Note on images: If the correct response should include an image that exists in the
+project's knowledge base, set the `data` field to include an `image` object with
+non-sensitive descriptive fields only (the backend will attach the actual image URL
+if available). Example:
+
+    "data": {{"image": {{"reason": "illustrates the product feature", "caption": "Front view of Model X"}}}}
+
+Do NOT include external URLs in the `image` field — leave URL resolution to the
+backend code which has access to project media.
+
+User Question: {user_question}
+"""
+
+
@@ -0,0 +1,72 @@
+"""
+Inverted index over a project's QuestionAnswer text.
+
+Matching paths (the substring lookup, image enrichment, the fuzzy image
+matcher's candidates and `debug_qa_match`) ask the index for the QAs
+sharing words with the input and only check those, so lookups scale with
+the number of candidates instead of with the size of the knowledge base.
+
+The index lives in memory: the request snapshot (home/ai/snapshot.py)
+builds one per KB version and keeps it with the compiled prompt context,
+so it is rebuilt when `kb_version` moves and never updated in place.
+Words come from `retrieval.tokenize`, the tokenizer every matcher uses.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+from home.ai.retrieval import tokenize, whole_words
+
+
+def _postings(token_sets: Iterable[Iterable[str]]) -> Dict[str, Set[int]]:
+    postings: Dict[str, Set[int]] = {}
+    for i, tokens in enumerate(token_sets):
+        for token in tokens:
+            postings.setdefault(token, set()).add(i)
+    return postings
+
+
+class QAIndex:
+    """
+    Word -> positions postings over a list of QAs, given their question
+    tokens and (lowercased) answers. Question postings are built up
+    front; postings over question and answer text on first use.
+    """
+
+    def __init__(self, question_tokens: Sequence[Iterable[str]], answers: Sequence[str]):
+        self.question_tokens = question_tokens
+        self.answers = answers
+        self.question = _postings(question_tokens)
+        self._text: Optional[Dict[str, Set[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.question_tokens)
+
+    @property
+    def text(self) -> Dict[str, Set[int]]:
+        if self._text is None:
+            self._text = _postings(
+                set(tokens).union(tokenize(answer)) for tokens, answer in zip(self.question_tokens, self.answers)
+            )
+        return self._text
+
+    def sharing_any(self, *texts: str) -> List[int]:
+        """Positions (ascending) of the QAs whose question shares a word with any of `texts`."""
+        found: Set[int] = set()
+        for text in texts:
+            for word in set(tokenize(text)):
+                found.update(self.question.get(word, ()))
+        return sorted(found)
+
+    def possibly_containing(self, needle: str, field: str = "question") -> Optional[List[int]]:
+        """
+        Positions (ascending) of the QAs whose question (`field="text"`:
+        question or answer) may contain `needle` as a substring: those
+        having all of its whole words. None when it has none (a needle of
+        one or two possibly partial words), as every QA may contain it.
+        """
+        words = set(whole_words(needle))
+        if not words:
+            return None
+        postings = self.question if field == "question" else self.text
+        sets = sorted((postings.get(word, set()) for word in words), key=len)
+        return sorted(set(sets[0]).intersection(*sets[1:]))
@@ -0,0 +1,139 @@
+"""
+Retrieval stage for prompt building.
+
+Instead of pasting every QuestionAnswer of a project into each prompt,
+rank them against the user question with Okapi BM25 over question and
+answer text and keep only the top-k most relevant pairs.
+"""
+
+import heapq
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# The question text is a better summary of a QA than its answer, so its
+# terms are counted this many times in the BM25 document.
+QUESTION_BOOST = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens (Unicode-aware, works for Devanagari too)."""
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def whole_words(text: str) -> List[str]:
+    """
+    Tokens of `text` that are whole words in any text containing `text`:
+    the first and last tokens are left out when they touch its ends, as
+    they may be parts of longer words there.
+    """
+    text = (text or "").lower()
+    return [m.group() for m in _TOKEN_RE.finditer(text) if m.start() > 0 and m.end() < len(text)]
+
+
+def qa_terms(qa: Any) -> Counter:
+    """Term frequencies of one QA as a BM25 document."""
+    terms = Counter(tokenize(getattr(qa, "answer", "") or ""))
+    for token in tokenize(getattr(qa, "question", "") or ""):
+        terms[token] += QUESTION_BOOST
+    return terms
+
+
+class BM25:
+    """
+    Okapi BM25 over an in-memory list of QuestionAnswer-like objects.
+
+    Term frequencies are kept as posting lists (term -> [(doc, tf)]), so
+    scoring a question only touches documents sharing a term with it.
+    """
+
+    def __init__(self, qas: Sequence[Any], k1: float = 1.5, b: float = 0.75):
+        self.qas = list(qas)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = {}
+        self.doc_lengths: List[int] = []
+        for i, qa in enumerate(self.qas):
+            terms = qa_terms(qa)
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings.setdefault(term, []).append((i, tf))
+        n = len(self.qas)
+        self.avg_length = (sum(self.doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """Scores of matching documents only, keyed by document index."""
+        scores: Dict[int, float] = {}
+        if not self.avg_length:
+            return scores
+        k1, b, avg = self.k1, self.b, self.avg_length
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for i, tf in docs:
+                norm = k1 * (1 - b + b * self.doc_lengths[i] / avg)
+                scores[i] = scores.get(i, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return scores
+
+    def top_k(self, query: str, k: int) -> List[Tuple[Any, float]]:
+        """
+        The `k` best-scoring QAs (score > 0) as (qa, score), best first.
+        """
+        best = heapq.nsmallest(k, ((-score, i) for i, score in self.scores(query).items() if score > 0))
+        return [(self.qas[i], -neg) for neg, i in best]
+
+
+_INDEX_CACHE_SIZE = 64
+_index_cache: "OrderedDict[Tuple[int, int], BM25]" = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def get_bm25(project: Any, qas: Sequence[Any]) -> BM25:
+    """
+    BM25 index for a project's knowledge base, memoized per
+    (project id, `kb_version`) so it is built once per KB edit rather than
+    once per chat message. Unsaved projects are never memoized.
+    """
+    if getattr(project, "pk", None) is None:
+        return BM25(qas)
+    key = (project.pk, getattr(project, "kb_version", 0) or 0)
+    with _index_lock:
+        index = _index_cache.get(key)
+        if index is not None and len(index.qas) == len(qas):
+            _index_cache.move_to_end(key)
+            return index
+    index = BM25(qas)
+    with _index_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > _INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def select_relevant_qas(project: Any, qas: Iterable[Any], question: str, top_k: int) -> List[Any]:
+    """
+    Choose which QAs go into the prompt, most relevant first.
+
+    - `top_k <= 0` disables retrieval: all QAs in their stored order.
+    - Knowledge bases no larger than `top_k` are returned unchanged.
+    - When nothing matches (e.g. a greeting), the first `top_k` QAs are
+      used so the model still sees what the business is about.
+    """
+    qas = list(qas)
+    if top_k <= 0 or len(qas) <= top_k:
+        return qas
+    ranked = get_bm25(project, qas).top_k(question or "", top_k)
+    if not ranked:
+        return qas[:top_k]
+    return [qa for qa, _ in ranked]
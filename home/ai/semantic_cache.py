@@ -0,0 +1,276 @@
+"""
+Semantic near-duplicate answer cache.
+
+The exact cache (home/ai/cache.py) misses rephrasings such as "what are
+your prices" vs "what are the prices?". This cache embeds questions with
+a local hashing vectorizer (word unigrams + character trigrams hashed
+into a fixed-size signed vector, NumPy only, no network or model files)
+and returns a cached payload when the cosine similarity to a previously
+answered question of the same project, language and KB version is at
+least `threshold`.
+
+A hashing vectorizer captures lexical closeness, not meaning: it links
+"prices"/"pricing" partially but not "cost", and two questions that
+differ in a single key word ("ship to India" vs "ship to USA") still
+share most features, which is why the default threshold is conservative.
+The best similarity of every lookup is recorded in a histogram so the
+threshold can be tuned from real traffic (`stats()`).
+
+Tunables (Django settings):
+- CHAT_SEMANTIC_CACHE_ENABLED          default True (needs NumPy)
+- CHAT_SEMANTIC_CACHE_THRESHOLD        cosine, default 0.9
+- CHAT_SEMANTIC_CACHE_MAX_PER_PROJECT  entries per project, default 256
+- CHAT_SEMANTIC_CACHE_TTL              seconds, default 600
+"""
+
+import copy
+import re
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+from home.ai.cache import CACHEABLE_INTENTS, normalize_question
+
+# Optional NumPy import – without it the semantic cache is disabled and
+# the exact cache keeps working on its own.
+try:  # pragma: no cover - import-time optional dependency
+    import numpy as np
+
+    NUMPY_AVAILABLE = True
+except Exception:
+    np = None  # type: ignore
+    NUMPY_AVAILABLE = False
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Function words carry little meaning but dominate short questions.
+# Single letters and digits are kept as features: "plan a" and "plan i"
+# name different things.
+_STOP_WORDS = frozenset(
+    "an the is are am was were be do does did to of in on for at by with and or "
+    "you your we our my me it this that what which how can could would please".split()
+)
+
+HISTOGRAM_BUCKETS = 20  # 0.05-wide similarity buckets
+
+
+class HashingVectorizer:
+    """
+    Stateless text → unit vector embedding using the hashing trick.
+    Word tokens and in-word character trigrams are hashed (crc32) into
+    `dim` buckets with a hash-derived sign to reduce collision bias.
+    """
+
+    def __init__(self, dim: int = 512, word_weight: float = 1.0, ngram_weight: float = 0.5):
+        self.dim = dim
+        self.word_weight = word_weight
+        self.ngram_weight = ngram_weight
+
+    def features(self, text: str) -> List[Tuple[str, float]]:
+        words = [w for w in _TOKEN_RE.findall(normalize_question(text)) if w not in _STOP_WORDS]
+        feats: List[Tuple[str, float]] = []
+        for word in words:
+            feats.append(("w:" + word, self.word_weight))
+            padded = f"<{word}>"
+            for i in range(len(padded) - 2):
+                feats.append(("c:" + padded[i:i + 3], self.ngram_weight))
+        return feats
+
+    def transform(self, text: str):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature, weight in self.features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vec[h % self.dim] += weight if (h >> 31) & 1 else -weight
+        norm = float(np.linalg.norm(vec))
+        if norm:
+            vec /= norm
+        return vec
+
+
+class _Store:
+    """
+    Vector table for one (project, KB version, language). Starts small
+    and doubles up to `capacity`, so idle projects stay cheap.
+    """
+
+    def __init__(self, capacity: int, dim: int, initial: int = 16):
+        self.capacity = capacity
+        allocated = min(initial, capacity)
+        self.matrix = np.zeros((allocated, dim), dtype=np.float32)
+        self.payloads: List[Optional[Dict[str, Any]]] = [None] * allocated
+        self.expires = np.zeros(allocated, dtype=np.float64)
+        self.last_used = np.zeros(allocated, dtype=np.float64)
+        self.size = 0
+
+    def recency(self) -> float:
+        return float(self.last_used[: self.size].max(initial=0.0))
+
+    def grow(self) -> None:
+        allocated = min(self.capacity, max(1, len(self.payloads)) * 2)
+        extra = allocated - len(self.payloads)
+        self.matrix = np.vstack([self.matrix, np.zeros((extra, self.matrix.shape[1]), dtype=np.float32)])
+        self.payloads.extend([None] * extra)
+        self.expires = np.concatenate([self.expires, np.zeros(extra)])
+        self.last_used = np.concatenate([self.last_used, np.zeros(extra)])
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries_per_project: int = 256,
+        ttl: float = 600.0,
+        dim: int = 512,
+        max_projects: int = 128,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.threshold = threshold
+        self.max_entries_per_project = max_entries_per_project
+        self.ttl = ttl
+        self.max_projects = max_projects
+        self.vectorizer = HashingVectorizer(dim=dim)
+        self._clock = clock
+        self._stores: Dict[Tuple[int, int, str], _Store] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._histogram = [0] * HISTOGRAM_BUCKETS
+        self._hit_similarity_sum = 0.0
+
+    @staticmethod
+    def _store_key(project: Any, language_code: str) -> Tuple[int, int, str]:
+        return (project.id, getattr(project, "kb_version", 0) or 0, (language_code or "en").lower())
+
+    def _record(self, similarity: float, hit: bool) -> None:
+        bucket = min(HISTOGRAM_BUCKETS - 1, max(0, int(similarity * HISTOGRAM_BUCKETS)))
+        self._histogram[bucket] += 1
+        if hit:
+            self.hits += 1
+            self._hit_similarity_sum += similarity
+        else:
+            self.misses += 1
+
+    def lookup(self, project: Any, language_code: str, question: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not normalize_question(question):
+            return None
+        vec = self.vectorizer.transform(question or "")
+        now = self._clock()
+        with self._lock:
+            store = self._stores.get(self._store_key(project, language_code))
+            if store is None or store.size == 0:
+                self._record(0.0, False)
+                return None
+            sims = store.matrix[: store.size] @ vec
+            sims[store.expires[: store.size] <= now] = -1.0
+            idx = int(np.argmax(sims))
+            similarity = float(sims[idx])
+            if similarity < self.threshold:
+                self._record(max(similarity, 0.0), False)
+                return None
+            store.last_used[idx] = now
+            self._record(similarity, True)
+            payload = store.payloads[idx]
+        return copy.deepcopy(payload)
+
+    def store(self, project: Any, language_code: str, question: Optional[str], payload: Dict[str, Any]) -> bool:
+        if not normalize_question(question) or not isinstance(payload, dict):
+            return False
+        if payload.get("intent") not in CACHEABLE_INTENTS:
+            return False
+
+        vec = self.vectorizer.transform(question or "")
+        if not vec.any():
+            return False
+        value = {
+            "intent": payload.get("intent"),
+            "message": payload.get("message", ""),
+            "data": copy.deepcopy(payload.get("data") or {}),
+        }
+        now = self._clock()
+        key = self._store_key(project, language_code)
+        with self._lock:
+            store = self._stores.get(key)
+            if store is None:
+                if len(self._stores) >= self.max_projects:
+                    # Drop the least recently used store as a whole.
+                    oldest = min(self._stores, key=lambda k: self._stores[k].recency())
+                    del self._stores[oldest]
+                store = self._stores[key] = _Store(self.max_entries_per_project, self.vectorizer.dim)
+
+            if store.size < self.max_entries_per_project:
+                if store.size == len(store.payloads):
+                    store.grow()
+                idx = store.size
+                store.size += 1
+            else:
+                # Evict expired entries first, otherwise the least recently used.
+                expired = np.flatnonzero(store.expires[: store.size] <= now)
+                idx = int(expired[0]) if expired.size else int(np.argmin(store.last_used))
+                self.evictions += 1
+
+            store.matrix[idx] = vec
+            store.payloads[idx] = value
+            store.expires[idx] = now + self.ttl
+            store.last_used[idx] = now
+        return True
+
+    def invalidate_project(self, project_id: int) -> None:
+        with self._lock:
+            for key in [k for k in self._stores if k[0] == project_id]:
+                del self._stores[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._stores.clear()
+            self.hits = self.misses = self.evictions = 0
+            self._histogram = [0] * HISTOGRAM_BUCKETS
+            self._hit_similarity_sum = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit rate, mean similarity of hits, and a histogram of the best
+        similarity seen per lookup ("0.85-0.90": n), for threshold tuning.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            width = 1.0 / HISTOGRAM_BUCKETS
+            histogram = {
+                f"{i * width:.2f}-{(i + 1) * width:.2f}": count
+                for i, count in enumerate(self._histogram)
+                if count
+            }
+            return {
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "mean_hit_similarity": round(self._hit_similarity_sum / self.hits, 4) if self.hits else None,
+                "evictions": self.evictions,
+                "entries": sum(s.size for s in self._stores.values()),
+                "similarity_histogram": histogram,
+            }
+
+
+_semantic_cache: Optional[SemanticAnswerCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticAnswerCache]:
+    """Process-wide semantic cache; None when disabled or NumPy is missing."""
+    global _semantic_cache
+    if not NUMPY_AVAILABLE or not getattr(settings, "CHAT_SEMANTIC_CACHE_ENABLED", True):
+        return None
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticAnswerCache(
+                    threshold=float(getattr(settings, "CHAT_SEMANTIC_CACHE_THRESHOLD", 0.9)),
+                    max_entries_per_project=int(getattr(settings, "CHAT_SEMANTIC_CACHE_MAX_PER_PROJECT", 256)),
+                    ttl=float(getattr(settings, "CHAT_SEMANTIC_CACHE_TTL", 600)),
+                )
+    return _semantic_cache
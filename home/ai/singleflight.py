@@ -0,0 +1,245 @@
+"""
+Single-flight coalescing of identical concurrent chat requests.
+
+When many visitors ask the same suggested question at the same moment,
+only the first request calls the LLM; concurrent duplicates wait for its
+result instead of firing their own call. Requests are keyed like the
+answer cache: (project id, KB version, language, normalized question).
+
+Two layers:
+- in-process: followers in the same worker wait on the leader's event
+  (threads) or future (asyncio);
+- across workers: the leader holds a short lock in the shared Django
+  cache (`cache.add`) and publishes its result there; leaders of other
+  workers that find the lock taken poll for that result instead of
+  calling the model. This needs a cache shared by the workers (Redis,
+  Memcached, database); with the default LocMemCache it is per-process.
+
+Followers give up after `wait_timeout` seconds and call the model
+themselves, so a stuck leader never blocks them for longer than that.
+
+Tunables (Django settings):
+- CHAT_SINGLE_FLIGHT_ENABLED   default True
+- CHAT_SINGLE_FLIGHT_CACHE     cache alias for the cross-worker layer,
+                               default "default" ("" disables it)
+- CHAT_SINGLE_FLIGHT_WAIT      seconds a follower waits, default 35
+"""
+
+import asyncio
+import copy
+import hashlib
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.failed = False
+
+
+class SingleFlight:
+    """
+    `do(key, fn)` / `ado(key, coro_fn)` run the function once per key
+    among concurrent callers and return `(result, coalesced)`; followers
+    receive a deep copy of the leader's result.
+    """
+
+    def __init__(
+        self,
+        cache_alias: Optional[str] = "default",
+        wait_timeout: float = 35.0,
+        result_ttl: float = 10.0,
+        poll_interval: float = 0.05,
+    ):
+        self.cache_alias = cache_alias
+        self.wait_timeout = wait_timeout
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Tuple[int, Hashable], "asyncio.Future[Any]"] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.collapsed_local = 0
+        self.collapsed_remote = 0
+        self.timeouts = 0
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _shared_keys(self, key: Hashable) -> Tuple[str, str]:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return f"chat-single-flight:lock:{digest}", f"chat-single-flight:result:{digest}"
+
+    # -- threads -----------------------------------------------------------
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            if call.done.wait(self.wait_timeout) and not call.failed:
+                self._count("collapsed_local")
+                return copy.deepcopy(call.result), True
+            if not call.failed:
+                self._count("timeouts")
+            return fn(), False
+
+        try:
+            result, coalesced = self._run_shared(key, fn)
+            call.result = copy.deepcopy(result)
+            return result, coalesced
+        except BaseException:
+            call.failed = True
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run_shared(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        if not self.cache_alias:
+            self._count("leaders")
+            return fn(), False
+
+        shared = caches[self.cache_alias]
+        lock_key, result_key = self._shared_keys(key)
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            if shared.add(lock_key, 1, timeout=math.ceil(self.wait_timeout)):
+                try:
+                    shared.delete(result_key)
+                    self._count("leaders")
+                    result = fn()
+                    shared.set(result_key, result, timeout=math.ceil(self.result_ttl))
+                    return result, False
+                finally:
+                    shared.delete(lock_key)
+
+            # Another worker is calling the model for this key.
+            while time.monotonic() < deadline:
+                result = shared.get(result_key)
+                if result is not None:
+                    self._count("collapsed_remote")
+                    return result, True
+                if shared.get(lock_key) is None:
+                    break  # its leader gave up; try to lead
+                time.sleep(self.poll_interval)
+            else:
+                self._count("timeouts")
+                return fn(), False
+
+    # -- asyncio -----------------------------------------------------------
+
+    async def ado(self, key: Hashable, coro_fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        loop_key = (id(asyncio.get_running_loop()), key)
+        future = self._futures.get(loop_key)
+        if future is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), self.wait_timeout)
+            except asyncio.TimeoutError:
+                self._count("timeouts")
+                return await coro_fn(), False
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this follower itself was cancelled
+                return await coro_fn(), False
+            except Exception:
+                return await coro_fn(), False
+            self._count("collapsed_local")
+            return copy.deepcopy(result), True
+
+        future = self._futures[loop_key] = asyncio.get_running_loop().create_future()
+        try:
+            result, coalesced = await self._arun_shared(key, coro_fn)
+            future.set_result(copy.deepcopy(result))
+            return result, coalesced
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Only followers observe the exception; don't warn if there are none.
+            future.exception()
+            raise
+        finally:
+            self._futures.pop(loop_key, None)
+
+    async def _arun_shared(self, key: Hashable, coro_fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        if not self.cache_alias:
+            self._count("leaders")
+            return await coro_fn(), False
+
+        shared = caches[self.cache_alias]
+        lock_key, result_key = self._shared_keys(key)
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            if await shared.aadd(lock_key, 1, timeout=math.ceil(self.wait_timeout)):
+                try:
+                    await shared.adelete(result_key)
+                    self._count("leaders")
+                    result = await coro_fn()
+                    await shared.aset(result_key, result, timeout=math.ceil(self.result_ttl))
+                    return result, False
+                finally:
+                    await shared.adelete(lock_key)
+
+            while time.monotonic() < deadline:
+                result = await shared.aget(result_key)
+                if result is not None:
+                    self._count("collapsed_remote")
+                    return result, True
+                if await shared.aget(lock_key) is None:
+                    break
+                await asyncio.sleep(self.poll_interval)
+            else:
+                self._count("timeouts")
+                return await coro_fn(), False
+
+    # -- metrics -----------------------------------------------------------
+
+    def clear(self) -> None:
+        with self._lock:
+            self.leaders = self.collapsed_local = self.collapsed_remote = self.timeouts = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """How many model calls were made and how many duplicates were collapsed."""
+        with self._lock:
+            collapsed = self.collapsed_local + self.collapsed_remote
+            return {
+                "leader_calls": self.leaders,
+                "collapsed_in_process": self.collapsed_local,
+                "collapsed_across_workers": self.collapsed_remote,
+                "wait_timeouts": self.timeouts,
+                "llm_calls_saved": collapsed,
+                "in_flight": len(self._calls) + len(self._futures),
+            }
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Process-wide coalescer configured from settings; None when disabled."""
+    global _single_flight
+    if not getattr(settings, "CHAT_SINGLE_FLIGHT_ENABLED", True):
+        return None
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight(
+                    cache_alias=getattr(settings, "CHAT_SINGLE_FLIGHT_CACHE", "default") or None,
+                    wait_timeout=float(getattr(settings, "CHAT_SINGLE_FLIGHT_WAIT", 35)),
+                )
+    return _single_flight
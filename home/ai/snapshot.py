@@ -0,0 +1,134 @@
+"""
+Request-scoped knowledge-base snapshot.
+
+One chat message used to read the project's QuestionAnswer rows several
+times: the graph node re-fetched the project, the prompt builder, the
+image enrichment and the view's image matcher (`iexact`, `icontains`
+and a fuzzy scan) each ran their own queries. A `KnowledgeBaseSnapshot`
+is created once per chat turn, travels through `ChatState` and is the
+only way those consumers look at the knowledge base.
+
+The rows come from the compiled prompt context (home/ai/prompt_cache.py),
+so a turn reads them at most once, and not at all while the cache is
+warm. The lowercased and tokenized fields, the inverted index behind
+the lookups (home/ai/qa_index.py) and the fuzzy image matcher are
+derived once per KB version and kept on the compiled context as well,
+so lookups only look at a few candidate QAs.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+from home.ai.image_match import ImageMatcher
+from home.ai.prompt_cache import CompiledContext
+from home.ai.prompts import cached_prompt_context, prompt_context, store_prompt_context
+from home.ai.qa_index import QAIndex
+from home.ai.retrieval import tokenize
+
+
+class QAEntry:
+    """One QuestionAnswer with the normalized fields the matchers need."""
+
+    __slots__ = ("qa", "question_lower", "answer_lower", "question_tokens", "has_image")
+
+    def __init__(self, qa: Any):
+        self.qa = qa
+        self.question_lower = (qa.question or "").lower()
+        self.answer_lower = (qa.answer or "").lower()
+        self.question_tokens = frozenset(tokenize(self.question_lower))
+        self.has_image = bool(qa.image)
+
+
+class _Entries:
+    """Entries of one KB version, in primary-key order, plus lookups."""
+
+    def __init__(self, qas: Iterable[Any]):
+        self.all: List[QAEntry] = sorted((QAEntry(qa) for qa in qas), key=lambda e: e.qa.pk or 0)
+        self.with_image: List[QAEntry] = [e for e in self.all if e.has_image]
+        self.by_question: Dict[str, QAEntry] = {}
+        for entry in self.all:
+            self.by_question.setdefault(entry.question_lower, entry)
+        # Positions in the index are positions in `all`.
+        self.index = QAIndex([e.question_tokens for e in self.all], [e.answer_lower for e in self.all])
+        # Built on the first fuzzy image lookup of this KB version.
+        self.image_matcher: Optional[ImageMatcher] = None
+
+
+class KnowledgeBaseSnapshot:
+    """
+    The project and its QAs as seen by one chat turn. QAs are loaded
+    lazily on first use; `aload` prepares them from async code.
+    """
+
+    def __init__(self, project: Any, compiled: Optional[CompiledContext] = None):
+        self.project = project
+        self._compiled = compiled
+
+    @classmethod
+    async def aload(cls, project: Any) -> "KnowledgeBaseSnapshot":
+        compiled = cached_prompt_context(project)
+        if compiled is None:
+            compiled = store_prompt_context(project, [qa async for qa in project.qas.all()])
+        return cls(project, compiled)
+
+    @property
+    def compiled(self) -> CompiledContext:
+        if self._compiled is None:
+            self._compiled = prompt_context(self.project)
+        return self._compiled
+
+    @property
+    def _entries(self) -> _Entries:
+        compiled = self.compiled
+        if compiled.entries is None:
+            compiled.entries = _Entries(compiled.qas)
+        return compiled.entries
+
+    @property
+    def qas(self) -> List[Any]:
+        return self.compiled.qas
+
+    def find_exact(self, question: str) -> Optional[Any]:
+        """First QA (by pk) whose question equals `question`, ignoring case."""
+        entry = self._entries.by_question.get((question or "").lower())
+        return entry.qa if entry is not None else None
+
+    def find_containing(self, question: str) -> Optional[Any]:
+        """First QA (by pk) whose question contains `question`, ignoring case."""
+        needle = (question or "").lower()
+        entries = self._entries
+        # Only QAs having the needle's whole words can contain it.
+        found = entries.index.possibly_containing(needle)
+        pool = entries.all if found is None else [entries.all[i] for i in found]
+        for entry in pool:
+            if needle in entry.question_lower:
+                return entry.qa
+        return None
+
+    def image_entries_mentioning(self, text: str) -> List[QAEntry]:
+        """QAs with an image whose question or answer contains `text` (lowercased)."""
+        entries = self._entries
+        found = entries.index.possibly_containing(text, field="text")
+        pool = entries.with_image if found is None else [entries.all[i] for i in found]
+        return [e for e in pool if e.has_image and (text in e.question_lower or text in e.answer_lower)]
+
+    def question_candidates(self, *texts: str) -> List[QAEntry]:
+        """QAs whose question shares a word with any of `texts`."""
+        entries = self._entries
+        return [entries.all[i] for i in entries.index.sharing_any(*texts)]
+
+    @property
+    def image_matcher(self) -> ImageMatcher:
+        """Postings for fuzzy image matching (home/ai/image_match.py)."""
+        entries = self._entries
+        if entries.image_matcher is None:
+            entries.image_matcher = ImageMatcher(
+                entries.with_image,
+                shortlist_size=int(getattr(settings, "CHAT_IMAGE_MATCH_SHORTLIST", 8)),
+            )
+        return entries.image_matcher
+
+    def first_image(self) -> Optional[Any]:
+        with_image = self._entries.with_image
+        return with_image[0].qa if with_image else None
@@ -0,0 +1,53 @@
+"""
+Fast local token estimation and per-model prompt budgets.
+
+We only need budgets to be roughly right, not exact per-model counts,
+so this avoids shipping a tokenizer: ~4 characters per token is the
+usual rule of thumb for English BPE vocabularies, while scripts such as
+Devanagari split into many more tokens (~2 characters per token).
+
+Tunables (Django settings):
+- CHAT_MODEL_CONTEXT_TOKENS        {model: context window} overrides
+- CHAT_COMPLETION_RESERVE_TOKENS   kept free for the answer, default 1024
+"""
+
+import math
+import re
+from typing import Optional
+
+from django.conf import settings
+
+
+CHARS_PER_TOKEN = 4
+NON_ASCII_CHARS_PER_TOKEN = 2
+
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+# Context windows of the models we route to; unknown models get the
+# conservative default.
+MODEL_CONTEXT_TOKENS = {
+    "google/gemma-3-12b-it:free": 32768,
+}
+DEFAULT_CONTEXT_TOKENS = 8192
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if text.isascii():
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    non_ascii = len(_NON_ASCII_RE.findall(text))
+    return math.ceil((len(text) - non_ascii) / CHARS_PER_TOKEN + non_ascii / NON_ASCII_CHARS_PER_TOKEN)
+
+
+def model_context_tokens(model: Optional[str]) -> int:
+    overrides = getattr(settings, "CHAT_MODEL_CONTEXT_TOKENS", None) or {}
+    if model in overrides:
+        return int(overrides[model])
+    return MODEL_CONTEXT_TOKENS.get(model or "", DEFAULT_CONTEXT_TOKENS)
+
+
+def model_prompt_budget(model: Optional[str]) -> int:
+    """Tokens a prompt may use on `model`, leaving room for the completion."""
+    reserve = int(getattr(settings, "CHAT_COMPLETION_RESERVE_TOKENS", 1024))
+    return max(0, model_context_tokens(model) - reserve)
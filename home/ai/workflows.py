@@ -1,252 +1,391 @@
-from __future__ import annotations
-
-from typing import Any, Callable, Dict, List, Optional, TypedDict, Type
-
-
-class WorkflowNode(TypedDict):
-    """
-    JSON schema for a workflow node.
-
-    Example:
-    {
-      "id": "classify",
-      "type": "classify_intent",
-      "config": { ... }
-    }
-    """
-
-    id: str
-    type: str
-    config: Dict[str, Any]
-
-
-class WorkflowEdge(TypedDict):
-    """
-    JSON schema for a workflow edge.
-
-    Example:
-    {
-      "from": "classify",
-      "to": "respond",
-      "condition": "answer"   # free-form label, used by routers
-    }
-    """
-
-    from_: str  # "from" in JSON
-    to: str
-    condition: Any
-
-
-class WorkflowDefinition(TypedDict, total=False):
-    """
-    Top-level workflow JSON schema.
-
-    {
-      "nodes": [ ... ],
-      "edges": [ ... ]
-    }
-    """
-
-    nodes: List[Dict[str, Any]]
-    edges: List[Dict[str, Any]]
-
-
-WORKFLOW_JSON_SCHEMA: Dict[str, Any] = {
-    "type": "object",
-    "properties": {
-        "nodes": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "required": ["id", "type", "config"],
-                "properties": {
-                    "id": {"type": "string", "minLength": 1},
-                    "type": {"type": "string", "minLength": 1},
-                    "config": {"type": "object"},
-                },
-            },
-        },
-        "edges": {
-            "type": "array",
-            "items": {
-                "type": "object",
-                "required": ["from", "to"],
-                "properties": {
-                    "from": {"type": "string", "minLength": 1},
-                    "to": {"type": "string", "minLength": 1},
-                    # `condition` is free-form; strings work well with routers
-                    "condition": {},
-                },
-            },
-        },
-    },
-    "required": ["nodes", "edges"],
-}
-
-
-def validate_workflow_json(data: Dict[str, Any]) -> List[str]:
-    """
-    Lightweight validator for workflow JSON.
-
-    Returns a list of human-readable error strings. If the list is empty,
-    the workflow is considered valid.
-    """
-    errors: List[str] = []
-
-    if not isinstance(data, dict):
-        return ["Workflow must be a JSON object."]
-
-    nodes = data.get("nodes")
-    edges = data.get("edges")
-
-    if not isinstance(nodes, list) or not nodes:
-        errors.append("'nodes' must be a non-empty array.")
-    if not isinstance(edges, list):
-        errors.append("'edges' must be an array.")
-
-    if errors:
-        return errors
-
-    node_ids: Dict[str, str] = {}
-    for idx, raw_node in enumerate(nodes):
-        if not isinstance(raw_node, dict):
-            errors.append(f"nodes[{idx}] must be an object.")
-            continue
-
-        node_id = raw_node.get("id")
-        node_type = raw_node.get("type")
-        config = raw_node.get("config")
-
-        if not isinstance(node_id, str) or not node_id.strip():
-            errors.append(f"nodes[{idx}].id must be a non-empty string.")
-        elif node_id in node_ids:
-            errors.append(f"Duplicate node id '{node_id}'.")
-        else:
-            node_ids[node_id] = node_type or ""
-
-        if not isinstance(node_type, str) or not node_type.strip():
-            errors.append(f"nodes[{idx}].type must be a non-empty string.")
-
-        if not isinstance(config, dict):
-            errors.append(f"nodes[{idx}].config must be an object.")
-
-    for idx, raw_edge in enumerate(edges or []):
-        if not isinstance(raw_edge, dict):
-            errors.append(f"edges[{idx}] must be an object.")
-            continue
-
-        from_id = raw_edge.get("from")
-        to_id = raw_edge.get("to")
-
-        if not isinstance(from_id, str) or not from_id.strip():
-            errors.append(f"edges[{idx}].from must be a non-empty string.")
-        elif from_id not in node_ids:
-            errors.append(f"edges[{idx}].from refers to unknown node '{from_id}'.")
-
-        if not isinstance(to_id, str) or not to_id.strip():
-            errors.append(f"edges[{idx}].to must be a non-empty string.")
-        elif to_id not in node_ids:
-            errors.append(f"edges[{idx}].to refers to unknown node '{to_id}'.")
-
-    return errors
-
-
-# LangGraph integration (optional).
-try:  # pragma: no cover - optional dependency
-    from langgraph.graph import StateGraph, START, END
-
-    LANGGRAPH_AVAILABLE = True
-except Exception:
-    StateGraph = None  # type: ignore
-    START = None  # type: ignore
-    END = None  # type: ignore
-    LANGGRAPH_AVAILABLE = False
-
-
-def build_langgraph_from_workflow(
-    workflow: Dict[str, Any],
-    state_type: Type[Any],
-    node_functions: Dict[str, Callable[[Any], Any]],
-    routers: Optional[Dict[str, Callable[[Any], str]]] = None,
-):
-    """
-    Convert a validated workflow JSON definition into a LangGraph app.
-
-    - `workflow` must follow the JSON schema defined above.
-    - `state_type` is the TypedDict / dataclass representing the graph state.
-    - `node_functions` maps node IDs to Python callables used as graph nodes.
-    - `routers` optionally maps node IDs to routing functions used to decide
-      which `condition` label to follow from a branching node.
-
-    This function does NOT persist anything or touch Django; it simply returns
-    a compiled LangGraph app that can be invoked per chat request.
-    """
-    if not LANGGRAPH_AVAILABLE:
-        raise RuntimeError("LangGraph is not installed; cannot build workflow graph.")
-
-    errors = validate_workflow_json(workflow)
-    if errors:
-        raise ValueError(f"Invalid workflow definition: {errors}")
-
-    routers = routers or {}
-    nodes = workflow["nodes"]
-    edges = workflow["edges"]
-
-    graph = StateGraph(state_type)
-
-    # Add all nodes with their corresponding functions.
-    for node in nodes:
-        node_id = node["id"]
-        if node_id not in node_functions:
-            raise KeyError(f"No node function provided for node id '{node_id}'.")
-        graph.add_node(node_id, node_functions[node_id])
-
-    # Group edges by source node to detect branching points.
-    edges_by_from: Dict[str, List[Dict[str, Any]]] = {}
-    for edge in edges:
-        from_id = edge["from"]
-        edges_by_from.setdefault(from_id, []).append(edge)
-
-    for from_id, group in edges_by_from.items():
-        if len(group) == 1 or from_id not in routers:
-            # Single edge or no router provided: simple linear edge(s).
-            for edge in group:
-                graph.add_edge(edge["from"], edge["to"])
-        else:
-            # Conditional routing using a router function.
-            router = routers[from_id]
-            mapping: Dict[str, str] = {}
-            for edge in group:
-                label = edge.get("condition")
-                if not isinstance(label, str) or not label:
-                    raise ValueError(
-                        f"Conditional edges from '{from_id}' must have a non-empty "
-                        f"string 'condition'. Problematic edge: {edge}"
-                    )
-                mapping[label] = edge["to"]
-
-            # Use the first target as a safe default branch.
-            default_target = group[0]["to"]
-            graph.add_conditional_edges(from_id, router, mapping, default_target)
-
-    # Link START and END automatically:
-    # - START → all nodes that have no incoming edges.
-    # - All nodes with no outgoing edges → END.
-    all_node_ids = {n["id"] for n in nodes}
-    from_ids = {e["from"] for e in edges}
-    to_ids = {e["to"] for e in edges}
-
-    start_candidates = sorted(all_node_ids - to_ids)
-    end_candidates = sorted(all_node_ids - from_ids)
-
-    if start_candidates:
-        # Use the first start candidate as graph START.
-        graph.add_edge(START, start_candidates[0])
-
-    for node_id in end_candidates:
-        graph.add_edge(node_id, END)
-
-    return graph.compile()
-
-
-
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypedDict, Type
+
+# LangGraph is optional and imported on first use (home/ai/optional.py).
+from home.ai.optional import langgraph_graph
+
+
+class WorkflowNode(TypedDict):
+    """
+    JSON schema for a workflow node.
+
+    Example:
+    {
+      "id": "classify",
+      "type": "classify_intent",
+      "config": { ... }
+    }
+    """
+
+    id: str
+    type: str
+    config: Dict[str, Any]
+
+
+class WorkflowEdge(TypedDict):
+    """
+    JSON schema for a workflow edge.
+
+    Example:
+    {
+      "from": "classify",
+      "to": "respond",
+      "condition": "answer"   # free-form label, used by routers
+    }
+    """
+
+    from_: str  # "from" in JSON
+    to: str
+    condition: Any
+
+
+class WorkflowDefinition(TypedDict, total=False):
+    """
+    Top-level workflow JSON schema.
+
+    {
+      "nodes": [ ... ],
+      "edges": [ ... ]
+    }
+    """
+
+    nodes: List[Dict[str, Any]]
+    edges: List[Dict[str, Any]]
+
+
+WORKFLOW_JSON_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "nodes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["id", "type", "config"],
+                "properties": {
+                    "id": {"type": "string", "minLength": 1},
+                    "type": {"type": "string", "minLength": 1},
+                    "config": {"type": "object"},
+                },
+            },
+        },
+        "edges": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["from", "to"],
+                "properties": {
+                    "from": {"type": "string", "minLength": 1},
+                    "to": {"type": "string", "minLength": 1},
+                    # `condition` is free-form; strings work well with routers
+                    "condition": {},
+                },
+            },
+        },
+    },
+    "required": ["nodes", "edges"],
+}
+
+
+def validate_workflow_json(data: Dict[str, Any]) -> List[str]:
+    """
+    Lightweight validator for workflow JSON.
+
+    Returns a list of human-readable error strings. If the list is empty,
+    the workflow is considered valid.
+    """
+    errors: List[str] = []
+
+    if not isinstance(data, dict):
+        return ["Workflow must be a JSON object."]
+
+    nodes = data.get("nodes")
+    edges = data.get("edges")
+
+    if not isinstance(nodes, list) or not nodes:
+        errors.append("'nodes' must be a non-empty array.")
+    if not isinstance(edges, list):
+        errors.append("'edges' must be an array.")
+
+    if errors:
+        return errors
+
+    node_ids: Dict[str, str] = {}
+    for idx, raw_node in enumerate(nodes):
+        if not isinstance(raw_node, dict):
+            errors.append(f"nodes[{idx}] must be an object.")
+            continue
+
+        node_id = raw_node.get("id")
+        node_type = raw_node.get("type")
+        config = raw_node.get("config")
+
+        if not isinstance(node_id, str) or not node_id.strip():
+            errors.append(f"nodes[{idx}].id must be a non-empty string.")
+        elif node_id in node_ids:
+            errors.append(f"Duplicate node id '{node_id}'.")
+        else:
+            node_ids[node_id] = node_type or ""
+
+        if not isinstance(node_type, str) or not node_type.strip():
+            errors.append(f"nodes[{idx}].type must be a non-empty string.")
+
+        if not isinstance(config, dict):
+            errors.append(f"nodes[{idx}].config must be an object.")
+
+    for idx, raw_edge in enumerate(edges or []):
+        if not isinstance(raw_edge, dict):
+            errors.append(f"edges[{idx}] must be an object.")
+            continue
+
+        from_id = raw_edge.get("from")
+        to_id = raw_edge.get("to")
+
+        if not isinstance(from_id, str) or not from_id.strip():
+            errors.append(f"edges[{idx}].from must be a non-empty string.")
+        elif from_id not in node_ids:
+            errors.append(f"edges[{idx}].from refers to unknown node '{from_id}'.")
+
+        if not isinstance(to_id, str) or not to_id.strip():
+            errors.append(f"edges[{idx}].to must be a non-empty string.")
+        elif to_id not in node_ids:
+            errors.append(f"edges[{idx}].to refers to unknown node '{to_id}'.")
+
+    return errors
+
+
+# Node types a workflow may use; the agent maps them to its node
+# functions (see `home.ai.agent.WORKFLOW_NODE_FUNCTIONS`). Nodes of the
+# routing types branch on their edges' `condition` labels.
+WORKFLOW_NODE_TYPES = ("classify_intent", "save_lead", "fallback", "respond")
+ROUTING_NODE_TYPES = ("classify_intent",)
+
+
+def build_graph_from_workflow(
+    workflow: Dict[str, Any],
+    state_type: Type[Any],
+    node_functions: Dict[str, Callable[[Any], Any]],
+    routers: Optional[Dict[str, Callable[[Any], str]]] = None,
+    graph_module: Any = None,
+    validate: bool = True,
+):
+    """
+    Convert a workflow JSON definition into a compiled graph app.
+
+    - `workflow` must follow the JSON schema defined above.
+    - `state_type` is the TypedDict / dataclass representing the graph state.
+    - `node_functions` maps node IDs to Python callables used as graph nodes.
+    - `routers` optionally maps node IDs to routing functions used to decide
+      which `condition` label to follow from a branching node.
+    - `graph_module` provides `StateGraph`, `START` and `END`: the native
+      executor (home/ai/graph.py, default) or `langgraph.graph`.
+    - `validate=False` skips `validate_workflow_json` for definitions
+      already validated when they were saved.
+
+    On the native executor, independent nodes fan out and join, and
+    cycles are rejected at compile time (see home/ai/graph.py).
+
+    This function does NOT persist anything or touch Django; it simply returns
+    a compiled app that can be invoked per chat request.
+    """
+    if graph_module is None:
+        from home.ai import graph as graph_module
+
+    if validate:
+        errors = validate_workflow_json(workflow)
+        if errors:
+            raise ValueError(f"Invalid workflow definition: {errors}")
+
+    routers = routers or {}
+    nodes = workflow["nodes"]
+    edges = workflow["edges"]
+
+    graph = graph_module.StateGraph(state_type)
+
+    # Add all nodes with their corresponding functions.
+    for node in nodes:
+        node_id = node["id"]
+        if node_id not in node_functions:
+            raise KeyError(f"No node function provided for node id '{node_id}'.")
+        graph.add_node(node_id, node_functions[node_id])
+
+    # Group edges by source node to detect branching points.
+    edges_by_from: Dict[str, List[Dict[str, Any]]] = {}
+    for edge in edges:
+        from_id = edge["from"]
+        edges_by_from.setdefault(from_id, []).append(edge)
+
+    for from_id, group in edges_by_from.items():
+        if len(group) == 1 or from_id not in routers:
+            # Single edge, or several without a router: the targets run
+            # as parallel branches, joined where their edges meet.
+            for edge in group:
+                graph.add_edge(edge["from"], edge["to"])
+        else:
+            # Conditional routing using a router function.
+            router = routers[from_id]
+            mapping: Dict[str, str] = {}
+            for edge in group:
+                label = edge.get("condition")
+                if not isinstance(label, str) or not label:
+                    raise ValueError(
+                        f"Conditional edges from '{from_id}' must have a non-empty "
+                        f"string 'condition'. Problematic edge: {edge}"
+                    )
+                mapping[label] = edge["to"]
+
+            # Use the first target as a safe default branch.
+            default_target = group[0]["to"]
+            graph.add_conditional_edges(from_id, router, mapping, default_target)
+
+    # Link START and END automatically:
+    # - START → all nodes that have no incoming edges.
+    # - All nodes with no outgoing edges → END.
+    all_node_ids = {n["id"] for n in nodes}
+    from_ids = {e["from"] for e in edges}
+    to_ids = {e["to"] for e in edges}
+
+    start_candidates = sorted(all_node_ids - to_ids)
+    end_candidates = sorted(all_node_ids - from_ids)
+
+    # Several roots start as parallel branches.
+    for node_id in start_candidates:
+        graph.add_edge(graph_module.START, node_id)
+
+    for node_id in end_candidates:
+        graph.add_edge(node_id, graph_module.END)
+
+    return graph.compile()
+
+
+def build_langgraph_from_workflow(
+    workflow: Dict[str, Any],
+    state_type: Type[Any],
+    node_functions: Dict[str, Callable[[Any], Any]],
+    routers: Optional[Dict[str, Callable[[Any], str]]] = None,
+):
+    """
+    `build_graph_from_workflow` on the LangGraph backend.
+    """
+    graph_module = langgraph_graph()
+    if graph_module is None:
+        raise RuntimeError("LangGraph is not installed; cannot build workflow graph.")
+
+    return build_graph_from_workflow(workflow, state_type, node_functions, routers, graph_module=graph_module)
+
+
+def workflow_errors(workflow: Dict[str, Any]) -> List[str]:
+    """
+    Full save-time check of a project's workflow: the JSON schema, known
+    node types, and that the graph compiles on the native executor.
+    An empty workflow (no custom graph) is valid.
+    """
+    if not workflow:
+        return []
+    errors = validate_workflow_json(workflow)
+    if errors:
+        return errors
+
+    for node in workflow["nodes"]:
+        if node["type"] not in WORKFLOW_NODE_TYPES:
+            errors.append(
+                f"Node '{node['id']}' has unknown type '{node['type']}' "
+                f"(expected one of: {', '.join(WORKFLOW_NODE_TYPES)})."
+            )
+    if errors:
+        return errors
+
+    try:
+        build_graph_from_workflow(
+            workflow,
+            dict,
+            {node["id"]: (lambda state: state) for node in workflow["nodes"]},
+            {node["id"]: (lambda state: "") for node in workflow["nodes"] if node["type"] in ROUTING_NODE_TYPES},
+            validate=False,
+        )
+    except Exception as e:
+        errors.append(f"Workflow graph cannot be built: {e}")
+    return errors
+
+
+def workflow_hash(workflow: Dict[str, Any]) -> str:
+    """Stable digest of a workflow definition, used in cache keys."""
+    raw = json.dumps(workflow, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class WorkflowGraphCache:
+    """
+    Bounded LRU of compiled workflow graphs keyed on (project id,
+    `workflow_hash`), so a project's graph is compiled once per
+    configuration rather than once per message. Entries may also hold
+    `None`, remembering a configuration that failed to compile.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, str], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.compiles = 0
+
+    def get_or_compile(self, project_id: int, digest: str, compile_fn: Callable[[], Any]) -> Any:
+        key = (project_id, digest)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        app = compile_fn()
+        with self._lock:
+            self.compiles += 1
+            self._entries[key] = app
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return app
+
+    def invalidate_project(self, project_id: int) -> int:
+        with self._lock:
+            stale = [k for k in self._entries if k[0] == project_id]
+            for k in stale:
+                del self._entries[k]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.compiles = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "compiles": self.compiles,
+                "entries": len(self._entries),
+            }
+
+
+_workflow_cache: Optional[WorkflowGraphCache] = None
+_workflow_cache_lock = threading.Lock()
+
+
+def get_workflow_cache() -> WorkflowGraphCache:
+    """Process-wide compiled workflow cache (CHAT_WORKFLOW_CACHE_SIZE entries)."""
+    global _workflow_cache
+    if _workflow_cache is None:
+        with _workflow_cache_lock:
+            if _workflow_cache is None:
+                from django.conf import settings
+
+                _workflow_cache = WorkflowGraphCache(
+                    max_entries=int(getattr(settings, "CHAT_WORKFLOW_CACHE_SIZE", 64)),
+                )
+    return _workflow_cache
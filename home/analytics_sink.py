@@ -0,0 +1,271 @@
+"""
+Write-behind sink for analytics events.
+
+A chat turn records up to six AnalyticsEvent rows (message_sent,
+intent_detected, fallback_triggered, lead_created, mcq_present,
+qa_image_matched). Instead of one INSERT each on the request path, events
+are appended to an in-memory queue and a background thread writes them
+with `bulk_create`: as soon as `batch_size` events are waiting, or
+`flush_interval` seconds after the oldest one was queued.
+
+Memory is bounded by `max_queued` events. When the queue is full the
+overflow policy decides what gives:
+- "drop_oldest"  evict the oldest queued event (default; keeps recent data),
+- "drop_new"     reject the incoming event,
+- "block"        make the caller wait up to `block_timeout` seconds for
+                 the writer to catch up, then reject the event.
+Async views never block; for them "block" behaves like "drop_new".
+
+Queued events are flushed when the process exits (atexit, which runs on
+a normal gunicorn/uvicorn worker shutdown); `close()` does the same on
+demand. A batch the database refuses is retried row by row, so one bad
+row (e.g. a project deleted meanwhile) only loses itself. Event
+timestamps are set when the batch is inserted, up to `flush_interval`
+after the event happened.
+
+Events only become visible to other connections once flushed, and the
+writer thread cannot see rows inside a test's transaction, so tests that
+go through the chat path turn the sink off with override_settings.
+
+Tunables (Django settings):
+- ANALYTICS_WRITE_BEHIND          default True
+- ANALYTICS_BATCH_SIZE            default 100
+- ANALYTICS_FLUSH_INTERVAL        seconds, default 1.0
+- ANALYTICS_MAX_QUEUED            default 10000
+- ANALYTICS_OVERFLOW              "drop_oldest" | "drop_new" | "block"
+- ANALYTICS_BLOCK_TIMEOUT         seconds, default 0.05
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from django.conf import settings
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_new", "block")
+
+# (project id, event type, metadata, monotonic time queued)
+Event = Tuple[int, str, Dict[str, Any], float]
+
+
+def write_events(events: List[Event]) -> None:
+    """Insert a batch of events with one bulk INSERT."""
+    from home.models import AnalyticsEvent
+
+    AnalyticsEvent.objects.bulk_create(
+        [AnalyticsEvent(project_id=pid, event_type=kind, metadata=meta) for pid, kind, meta, _ in events]
+    )
+
+
+class AnalyticsEventSink:
+    """
+    Bounded event queue drained by a lazily started writer thread.
+    `writer` receives lists of at most `batch_size` events.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queued: int = 10000,
+        overflow: str = "drop_oldest",
+        block_timeout: float = 0.05,
+        writer: Callable[[List[Event]], None] = write_events,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; expected one of {OVERFLOW_POLICIES}")
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queued = max(1, max_queued)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.writer = writer
+        self._queue: Deque[Event] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._closing = False
+        self._writing = 0  # events taken off the queue but not yet written
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, project_id: int, event_type: str, metadata: Optional[Dict[str, Any]] = None, block: bool = True) -> bool:
+        """Queue one event; False when the overflow policy dropped it."""
+        event = (project_id, event_type, metadata or {}, time.monotonic())
+        with self._cond:
+            self._ensure_worker()
+            if len(self._queue) >= self.max_queued:
+                if self.overflow == "drop_oldest":
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.overflow == "block" and block:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.max_queued:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.dropped += 1
+                            return False
+                        self._cond.notify_all()
+                        self._cond.wait(remaining)
+                else:
+                    self.dropped += 1
+                    return False
+            self._queue.append(event)
+            self.queued += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return True
+
+    def _ensure_worker(self) -> None:
+        # Called with the lock held. A forked worker (gunicorn --preload)
+        # inherits the queue but not the thread, so start a fresh one.
+        if self._closing or (self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()):
+            return
+        if self._pid != os.getpid():
+            self._queue.clear()
+            self._writing = 0
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="analytics-sink", daemon=True)
+        self._thread.start()
+        _register_atexit()
+
+    def _take_batch(self) -> List[Event]:
+        batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+        self._writing += len(batch)
+        return batch
+
+    def _run(self) -> None:
+        try:
+            self._drain()
+        finally:
+            from django.db import connection
+
+            connection.close()  # this thread's connection
+
+    def _drain(self) -> None:
+        from django.db import close_old_connections
+
+        while True:
+            with self._cond:
+                while not self._closing:
+                    if len(self._queue) >= self.batch_size:
+                        break
+                    if self._queue:
+                        wait = self._queue[0][3] + self.flush_interval - time.monotonic()
+                        if wait <= 0:
+                            break
+                    else:
+                        wait = None
+                    self._cond.wait(wait)
+                if self._closing:
+                    return
+                batch = self._take_batch()
+                self._cond.notify_all()  # wake producers blocked on a full queue
+            # Like a request would: drop this thread's connection once it
+            # is past CONN_MAX_AGE or broken.
+            close_old_connections()
+            self._write(batch)
+
+    def _write(self, batch: List[Event]) -> None:
+        try:
+            self.writer(batch)
+            written, failed = len(batch), 0
+        except Exception as e:
+            print(f"WARN: analytics batch of {len(batch)} events failed ({e}); retrying row by row")
+            written = failed = 0
+            for event in batch:
+                try:
+                    self.writer([event])
+                    written += 1
+                except Exception:
+                    failed += 1
+        with self._cond:
+            self._writing -= len(batch)
+            self.written += written
+            self.failed += failed
+            self.batches += 1
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = 5.0) -> int:
+        """
+        Write everything queued now, from the calling thread, and wait (up
+        to `timeout`) for batches the writer thread is still inserting.
+        Returns the number of events written by this call.
+        """
+        written = 0
+        while True:
+            with self._cond:
+                batch = self._take_batch()
+            if not batch:
+                break
+            self._write(batch)
+            written += len(batch)
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._writing and time.monotonic() < deadline:
+                self._cond.wait(deadline - time.monotonic())
+        return written
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread and flush what is left."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        self.flush(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "queued": self.queued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "failed": self.failed,
+                "batches": self.batches,
+                "pending": len(self._queue) + self._writing,
+                "max_queued": self.max_queued,
+                "overflow": self.overflow,
+            }
+
+
+_sink: Optional[AnalyticsEventSink] = None
+_sink_lock = threading.Lock()
+_atexit_registered = False
+
+
+def _register_atexit() -> None:
+    global _atexit_registered
+    if not _atexit_registered:
+        _atexit_registered = True
+        atexit.register(_close_sink)
+
+
+def _close_sink() -> None:
+    if _sink is not None:
+        _sink.close()
+
+
+def get_analytics_sink() -> Optional[AnalyticsEventSink]:
+    """Process-wide sink configured from settings; None when writes are direct."""
+    global _sink
+    if not getattr(settings, "ANALYTICS_WRITE_BEHIND", True):
+        return None
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = AnalyticsEventSink(
+                    batch_size=int(getattr(settings, "ANALYTICS_BATCH_SIZE", 100)),
+                    flush_interval=float(getattr(settings, "ANALYTICS_FLUSH_INTERVAL", 1.0)),
+                    max_queued=int(getattr(settings, "ANALYTICS_MAX_QUEUED", 10000)),
+                    overflow=getattr(settings, "ANALYTICS_OVERFLOW", "drop_oldest"),
+                    block_timeout=float(getattr(settings, "ANALYTICS_BLOCK_TIMEOUT", 0.05)),
+                )
+    return _sink
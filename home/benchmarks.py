@@ -0,0 +1,1032 @@
+"""
+Benchmarks for the chat pipeline, run via `python manage.py benchmark`.
+
+Each benchmark is a plain function registered under a short name. It
+receives the parsed command options and returns a dict of results that
+the management command prints as JSON.
+"""
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+
+BENCHMARKS: Dict[str, Callable[..., Dict[str, Any]]] = {}
+
+
+def register(name: str):
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; `pct` is in the 0-100 range."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize_ms(samples: List[float]) -> Dict[str, float]:
+    """Summarize per-call durations (seconds) as p50/p99/mean in ms."""
+    if not samples:
+        return {"count": 0, "p50_ms": 0.0, "p99_ms": 0.0, "mean_ms": 0.0}
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+    }
+
+
+def _timed(func: Callable[[], Any], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+@register("http_client")
+def bench_http_client(iterations: int = 200, latency_ms: float = 0.0, **_):
+    """
+    Bare `requests.post` (new connection per call) vs the shared pooled
+    client, both against the local fake OpenRouter server.
+    """
+    import requests
+
+    from home.ai.client import close_clients, openrouter_headers, post_chat_completion
+    from home.ai.fake_openrouter import FakeOpenRouter
+
+    data = {"model": "bench", "messages": [{"role": "user", "content": "ping"}]}
+
+    with FakeOpenRouter(latency=latency_ms / 1000.0) as fake:
+        url = f"{fake.base_url}/chat/completions"
+
+        def bare():
+            requests.post(url, headers=openrouter_headers(), json=data, timeout=30).json()
+
+        def pooled():
+            post_chat_completion(data, base_url=fake.base_url).json()
+
+        close_clients()
+        before = _timed(bare, iterations)
+        after = _timed(pooled, iterations)
+        close_clients()
+
+    return {"before_bare_requests": summarize_ms(before), "after_pooled_client": summarize_ms(after)}
+
+
+class _BenchProject:
+    """
+    Context manager creating a throwaway user + project (with `qa_count`
+    QuestionAnswer rows) in the configured database, deleted on exit.
+    """
+
+    def __init__(self, qa_count: int = 20, qas=None):
+        self.qa_count = qa_count
+        self.qas = qas
+        self.project = None
+
+    def __enter__(self):
+        import uuid
+
+        from django.contrib.auth.models import User
+
+        from home.models import Project, QuestionAnswer
+
+        user = User.objects.create(username=f"bench-{uuid.uuid4().hex[:12]}")
+        self.project = Project.objects.create(user=user, name="Benchmark project")
+        if self.qas is not None:
+            for qa in self.qas:
+                qa.pk, qa.project = None, self.project
+            QuestionAnswer.objects.bulk_create(self.qas)
+        else:
+            QuestionAnswer.objects.bulk_create(
+                QuestionAnswer(project=self.project, question=f"Question {i}?", answer=f"Answer number {i}.")
+                for i in range(self.qa_count)
+            )
+        return self.project
+
+    def __exit__(self, *exc):
+        from home.analytics_sink import get_analytics_sink
+
+        sink = get_analytics_sink()
+        if sink is not None:
+            sink.flush()  # queued events still point at the project
+        self.project.user.delete()
+
+
+def _load_summary(samples: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    summary: Dict[str, Any] = summarize_ms(samples)
+    summary["errors"] = errors
+    summary["wall_s"] = round(wall, 3)
+    summary["throughput_rps"] = round(len(samples) / wall, 2) if wall else 0.0
+    return summary
+
+
+@register("wsgi_vs_asgi")
+def bench_wsgi_vs_asgi(iterations: int = 200, latency_ms: float = 0.0, concurrency: int = 50, workers: int = 4, **_):
+    """
+    Concurrent chat throughput against a fake LLM with `latency_ms`:
+
+    - WSGI: the sync `ask_bot` view driven by `workers` threads, which is
+      what a gunicorn deployment with that many worker threads can serve.
+    - ASGI: the async `ask_bot_async` view driven by `concurrency`
+      in-flight requests on a single event loop (one uvicorn worker).
+    """
+    import asyncio
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from django.test import AsyncClient, Client, override_settings
+    from django.urls import reverse
+
+    from home.ai.fake_openrouter import FakeOpenRouter
+
+    with FakeOpenRouter(latency=latency_ms / 1000.0) as fake, override_settings(
+        OPENROUTER_BASE_URL=fake.base_url
+    ), _BenchProject() as project:
+        sync_url = reverse("ask_bot", args=[project.id])
+        async_url = reverse("ask_bot_async", args=[project.id])
+        local = threading.local()
+
+        def one_sync(i):
+            client = getattr(local, "client", None)
+            if client is None:
+                client = local.client = Client()
+            started = time.perf_counter()
+            resp = client.post(sync_url, {"question": f"Question {i % 20}?"}, secure=True)
+            return time.perf_counter() - started, resp.status_code != 200
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            sync_results = list(pool.map(one_sync, range(iterations)))
+        sync_wall = time.perf_counter() - started
+
+        async def run_async():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one_async(i):
+                async with semaphore:
+                    client = AsyncClient(raise_request_exception=False)
+                    t0 = time.perf_counter()
+                    resp = await client.post(async_url, {"question": f"Question {i % 20}?"}, secure=True)
+                    return time.perf_counter() - t0, resp.status_code != 200
+
+            return await asyncio.gather(*(one_async(i) for i in range(iterations)))
+
+        started = time.perf_counter()
+        async_results = asyncio.run(run_async())
+        async_wall = time.perf_counter() - started
+
+    return {
+        "fake_llm_latency_ms": latency_ms,
+        "wsgi_threads": workers,
+        "asgi_concurrency": concurrency,
+        "wsgi": _load_summary([r[0] for r in sync_results], sum(r[1] for r in sync_results), sync_wall),
+        "asgi": _load_summary([r[0] for r in async_results], sum(r[1] for r in async_results), async_wall),
+    }
+
+
+_WORDS = (
+    "price plan order refund shipping delivery account password store hours "
+    "support warranty return payment invoice discount product size color stock "
+    "battery screen install update login email phone address location booking "
+    "table menu vegan gluten parking pickup subscription trial cancel upgrade"
+).split()
+
+
+def synthetic_qas(count: int, seed: int = 7, answer_words: int = 40):
+    """
+    Unsaved QuestionAnswer objects with pseudo-random vocabulary, for
+    benchmarks that only need in-memory knowledge bases.
+    """
+    import random
+
+    from home.models import QuestionAnswer
+
+    rng = random.Random(seed)
+    qas = []
+    for i in range(count):
+        q_words = rng.sample(_WORDS, 4)
+        question = f"What about {' '.join(q_words)} item {i}?"
+        answer = " ".join(rng.choice(_WORDS) for _ in range(answer_words)) + f" (ref {i})."
+        qas.append(QuestionAnswer(id=i + 1, project_id=1, question=question, answer=answer))
+    return qas
+
+
+@register("prompt_retrieval")
+def bench_prompt_retrieval(iterations: int = 20, qa_count: int = 5000, latency_ms: float = 200.0, **_):
+    """
+    Prompt size and end-to-end latency for a synthetic 5,000-QA project:
+    the whole knowledge base in every prompt vs BM25 top-k retrieval.
+    The fake LLM charges `latency_ms` plus 20 ms per 1k prompt tokens.
+    """
+    from django.test import override_settings
+
+    from home.ai.agent import _call_openrouter_raw
+    from home.ai.client import openrouter_model
+    from home.ai.fake_openrouter import FakeOpenRouter
+    from home.ai.prompts import build_context_prompt
+    from home.ai.tokens import estimate_tokens
+    from home.models import Project
+
+    qas = synthetic_qas(qa_count)
+    questions = [qa.question for qa in qas[:: max(1, qa_count // iterations)]][:iterations]
+    # The "before" variant disables retrieval, budgets and answer compression.
+    unbounded = {"CHAT_MODEL_CONTEXT_TOKENS": {openrouter_model(): 10**9}, "CHAT_MAX_ANSWER_TOKENS": 0}
+    variants = {
+        "full_knowledge_base": (Project(id=1, name="bench", retrieval_top_k=0, prompt_token_budget=0), unbounded),
+        # Saved-project ids memoize the BM25 index per KB version, like production.
+        "bm25_top_k": (Project(id=1, name="bench"), {}),
+    }
+
+    results: Dict[str, Any] = {"qa_count": qa_count}
+    with FakeOpenRouter(latency=latency_ms / 1000.0, latency_per_1k_tokens=0.02) as fake, override_settings(
+        OPENROUTER_BASE_URL=fake.base_url
+    ):
+        for label, (project, overrides) in variants.items():
+            build_times, totals, sizes = [], [], []
+            for question in questions:
+                started = time.perf_counter()
+                with override_settings(**overrides):
+                    prompt = build_context_prompt(project, question, qas=qas)
+                built = time.perf_counter()
+                _call_openrouter_raw(prompt)
+                build_times.append(built - started)
+                totals.append(time.perf_counter() - started)
+                sizes.append(estimate_tokens(prompt))
+            results[label] = {
+                "prompt_tokens_mean": round(sum(sizes) / len(sizes)),
+                "build": summarize_ms(build_times),
+                "end_to_end": summarize_ms(totals),
+            }
+    return results
+
+
+@register("qa_index")
+def bench_qa_index(iterations: int = 50, qa_count: int = 5000, **_):
+    """
+    Fuzzy QA matching (difflib + word overlap, as in the views) over a
+    5,000-QA knowledge base: scoring every QA vs scoring the candidates
+    returned by the snapshot's in-memory QAIndex.
+    """
+    import difflib
+    import random
+
+    from home.ai.qa_index import QAIndex
+    from home.ai.retrieval import tokenize
+    from home.models import QuestionAnswer
+
+    # A 2,000-word vocabulary, so most words are rare as in real FAQs.
+    rng = random.Random(11)
+    syllables = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "po", "de", "gu"]
+    vocabulary = sorted({"".join(rng.choice(syllables) for _ in range(4)) for _ in range(2400)})[:2000]
+    qas = []
+    for i in range(qa_count):
+        words = rng.sample(vocabulary, 4)
+        qas.append(QuestionAnswer(question=f"What is your {' '.join(words)}?", answer=" ".join(words)))
+    questions = [
+        "how about " + " ".join(qa.question.lower().split()[2:5])
+        for qa in qas[:: max(1, qa_count // iterations)]
+    ][:iterations]
+
+    started = time.perf_counter()
+    index = QAIndex([tokenize(qa.question) for qa in qas], [qa.answer.lower() for qa in qas])
+    build_s = time.perf_counter() - started
+
+    def score(question, qa):
+        qa_q = qa.question.lower()
+        sa, sb = set(question.split()), set(qa_q.split())
+        overlap = len(sa & sb) / max(1, min(len(sa), len(sb)))
+        return max(difflib.SequenceMatcher(None, question, qa_q).ratio(), overlap)
+
+    def scan(question):
+        return [qa for qa in qas if score(question, qa) >= 0.45]
+
+    def indexed(question):
+        return [qas[i] for i in index.sharing_any(question) if score(question, qas[i]) >= 0.45]
+
+    results: Dict[str, Any] = {"qa_count": qa_count, "terms": len(index.question), "build_s": round(build_s, 3)}
+    for label, func in (("full_scan", scan), ("inverted_index", indexed)):
+        sizes = []
+
+        def run(it=iter(questions * 2), func=func):
+            sizes.append(len(func(next(it))))
+
+        results[label] = summarize_ms(_timed(run, len(questions)))
+        results[label]["matches_mean"] = round(sum(sizes) / len(sizes), 2)
+    return results
+
+
+def _image_match_queries(qas: List[Any], count: int) -> List[Tuple[str, str]]:
+    """(question, bot reply) pairs near the questions of `qas`: truncated, reworded, misspelled."""
+    import random
+
+    rng = random.Random(5)
+    replies = ["", "you can find the store hours and parking details below", "refund policy for orders"]
+    queries = []
+    for qa in qas[:: max(1, len(qas) // count)][:count]:
+        words = qa.question.lower().split()
+        variants = (
+            " ".join(words[:-1]),
+            " ".join(words[2:6]),
+            "is there " + " ".join(rng.sample(words[2:6], 2)),
+            qa.question.lower().replace("a", "e"),
+        )
+        queries.append((variants[len(queries) % 4], replies[len(queries) % 3]))
+    return queries
+
+
+@register("image_match")
+def bench_image_match(iterations: int = 40, sizes: Tuple[int, ...] = (1000, 10000), **_):
+    """
+    Fuzzy QA image matching (the last step of attaching an image to a
+    chat answer) on in-memory knowledge bases where every third QA has an
+    image: scoring every image QA vs the indexed ImageMatcher, how
+    often the two pick the same QA with the same score, and how often
+    both accept a QA (or both reject).
+    """
+    from home.ai.image_match import ImageMatcher, scan_best
+    from home.ai.prompt_cache import CompiledContext
+    from home.ai.snapshot import KnowledgeBaseSnapshot
+    from home.models import Project
+
+    results: Dict[str, Any] = {}
+    for size in sizes:
+        qas = synthetic_qas(size)
+        for i, qa in enumerate(qas):
+            qa.project_id = None
+            if i % 3 == 0:
+                qa.image = f"answers/bench-{i}.png"
+        snapshot = KnowledgeBaseSnapshot(Project(name="bench"), CompiledContext(qas))
+        entries = snapshot._entries.with_image
+        started = time.perf_counter()
+        matcher = ImageMatcher(entries)
+        build_s = time.perf_counter() - started
+        queries = _image_match_queries(qas, iterations)
+
+        def scan(q, msg):
+            best, score = scan_best(entries, q, msg)
+            return (best, score) if score >= 0.45 else (None, 0.0)
+
+        picks = {}
+        row: Dict[str, Any] = {"image_qas": len(entries), "build_ms": round(build_s * 1000, 1)}
+        for label, func in (("full_scan", scan), ("indexed", matcher.best)):
+            found = []
+
+            def run(it=iter(queries), func=func):
+                q, msg = next(it)
+                best, score = func(q, msg)
+                found.append((best.id if best else None, round(score, 9)))
+
+            row[label] = summarize_ms(_timed(run, len(queries)))
+            picks[label] = found
+        pairs = list(zip(picks["full_scan"], picks["indexed"]))
+        row["same_result"] = sum(a == b for a, b in pairs)
+        row["same_acceptance"] = sum((a[0] is None) == (b[0] is None) for a, b in pairs)
+        row["queries"] = len(queries)
+        results[str(size)] = row
+    return results
+
+
+@register("streaming_ttfb")
+def bench_streaming_ttfb(iterations: int = 20, latency_ms: float = 300.0, **_):
+    """
+    Time until the user sees the first words of the answer: the JSON
+    `ask_bot_by_key` view (whole body) vs the SSE `ask_bot_by_key_stream`
+    view (first `token` event). The fake LLM needs `latency_ms` before
+    its first chunk and 30 ms per further 8-character chunk.
+    """
+    from django.test import Client, override_settings
+    from django.urls import reverse
+
+    from home.ai.cache import get_answer_cache
+    from home.ai.fake_openrouter import FakeOpenRouter
+    from home.ai.semantic_cache import get_semantic_cache
+
+    def clear_caches():
+        for cache in (get_answer_cache(), get_semantic_cache()):
+            if cache is not None:
+                cache.clear()
+
+    results: Dict[str, Any] = {"fake_llm_latency_ms": latency_ms}
+    with FakeOpenRouter(latency=latency_ms / 1000.0, stream_interval=0.03) as fake, override_settings(
+        OPENROUTER_BASE_URL=fake.base_url
+    ), _BenchProject() as project:
+        client = Client()
+        json_url = reverse("ask_bot_by_key")
+        stream_url = reverse("ask_bot_by_key_stream")
+
+        json_totals = []
+        for i in range(iterations):
+            clear_caches()
+            started = time.perf_counter()
+            client.post(json_url, {"question": f"Question {i}?", "key": project.bot_key}, secure=True)
+            json_totals.append(time.perf_counter() - started)
+
+        first_tokens, stream_totals = [], []
+        for i in range(iterations):
+            clear_caches()
+            started = time.perf_counter()
+            resp = client.post(stream_url, {"question": f"Question {i}?", "key": project.bot_key}, secure=True)
+            first = None
+            for chunk in resp.streaming_content:
+                if first is None and chunk.startswith(b"event: token"):
+                    first = time.perf_counter() - started
+            first_tokens.append(first if first is not None else time.perf_counter() - started)
+            stream_totals.append(time.perf_counter() - started)
+
+    results["json_first_words"] = summarize_ms(json_totals)
+    results["sse_first_token"] = summarize_ms(first_tokens)
+    results["sse_complete"] = summarize_ms(stream_totals)
+    return results
+
+
+@register("single_flight")
+def bench_single_flight(latency_ms: float = 300.0, concurrency: int = 50, **_):
+    """
+    `concurrency` visitors asking the same question at the same moment
+    (threads behind a barrier) with request coalescing off and on:
+    model calls made and wall time.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from django.db import connection
+    from django.test import override_settings
+
+    from home.ai import singleflight
+    from home.ai.agent import generate_openrouter_answer
+    from home.ai.cache import get_answer_cache
+    from home.ai.fake_openrouter import FakeOpenRouter
+    from home.ai.semantic_cache import get_semantic_cache
+
+    results: Dict[str, Any] = {"concurrency": concurrency, "fake_llm_latency_ms": latency_ms}
+    with FakeOpenRouter(latency=latency_ms / 1000.0) as fake, _BenchProject() as project:
+        for label, enabled in (("without_coalescing", False), ("with_coalescing", True)):
+            for cache in (get_answer_cache(), get_semantic_cache()):
+                if cache is not None:
+                    cache.clear()
+            singleflight._single_flight = None
+            barrier = threading.Barrier(concurrency)
+            before = fake.request_count
+
+            def ask(_):
+                try:
+                    barrier.wait()
+                    started = time.perf_counter()
+                    generate_openrouter_answer(project, "What are your opening hours?")
+                    return time.perf_counter() - started
+                finally:
+                    connection.close()
+
+            with override_settings(OPENROUTER_BASE_URL=fake.base_url, CHAT_SINGLE_FLIGHT_ENABLED=enabled):
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    samples = list(pool.map(ask, range(concurrency)))
+                wall = time.perf_counter() - started
+            results[label] = _load_summary(samples, 0, wall)
+            results[label]["llm_calls"] = fake.request_count - before
+        singleflight._single_flight = None
+    return results
+
+
+@register("prompt_context")
+def bench_prompt_context(iterations: int = 200, qa_count: int = 2000, **_):
+    """
+    Per-turn prompt assembly for a saved 2,000-QA project and a small
+    8-QA one: rebuilt from a fresh QA query on every turn (compiled
+    prompt-context cache off) vs served from the cache (on, warm).
+    Reports latency and database queries per turn.
+    """
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    from home.ai.prompt_cache import get_prompt_cache
+    from home.ai.prompts import assemble_prompt
+
+    results: Dict[str, Any] = {"iterations": iterations}
+    for size in (qa_count, 8):
+        qas = synthetic_qas(size)
+        questions = [qa.question for qa in qas[:: max(1, size // 20)]]
+        with _BenchProject(qas=qas) as project:
+            sized: Dict[str, Any] = {}
+            for label, enabled in (("uncached", False), ("cached", True)):
+                with override_settings(CHAT_PROMPT_CACHE_ENABLED=enabled):
+                    if enabled:
+                        get_prompt_cache().clear()
+                    assemble_prompt(project, questions[0])  # warm-up (BM25 memo, cache)
+
+                    def turn(it=iter(questions * iterations)):
+                        assemble_prompt(project, next(it))
+
+                    with CaptureQueriesContext(connection) as queries:
+                        samples = _timed(turn, iterations)
+                sized[label] = summarize_ms(samples)
+                sized[label]["queries_per_turn"] = round(len(queries) / iterations, 2)
+            results[f"{size}_qas"] = sized
+    return results
+
+
+_GRAPH_RSS_SCRIPT = """
+import json, sys, time
+
+def rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+backend = sys.argv[1]
+before = rss_kb()
+started = time.perf_counter()
+if backend == "langgraph":
+    from langgraph.graph import StateGraph, START, END
+else:
+    from home.ai.graph import StateGraph, START, END
+imported = time.perf_counter()
+
+graph = StateGraph(dict)
+graph.add_node("classify", lambda s: {"intent": "answer"})
+graph.add_node("respond", lambda s: s)
+graph.add_edge(START, "classify")
+graph.add_conditional_edges("classify", lambda s: s["intent"], {"answer": "respond"})
+graph.add_edge("respond", END)
+app = graph.compile()
+for _ in range(1000):
+    app.invoke({"question": "hi"})
+print(json.dumps({"import_ms": round((imported - started) * 1000, 1), "rss_delta_kb": rss_kb() - before}))
+"""
+
+
+@register("graph_executor")
+def bench_graph_executor(iterations: int = 2000, **_):
+    """
+    The agent's intent graph on the native executor vs LangGraph:
+    per-invoke overhead (real nodes, taking the no-project path so no
+    LLM or database is involved), plus import time and the RSS a fresh
+    worker process gains from importing, compiling and running it.
+    """
+    import json
+    import subprocess
+    import sys
+
+    from django.conf import settings
+
+    from home.ai import agent
+
+    backends = ["native"] + (["langgraph"] if agent.LANGGRAPH_AVAILABLE else [])
+    results: Dict[str, Any] = {"iterations": iterations}
+    for backend in backends:
+        app = agent._get_graph_app(backend)
+        state = {"question": "hi", "language": "en"}
+        samples = _timed(lambda: app.invoke(dict(state)), iterations)
+        out = subprocess.run(
+            [sys.executable, "-c", _GRAPH_RSS_SCRIPT, backend],
+            cwd=str(settings.BASE_DIR),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        summary = summarize_ms(samples)
+        summary["per_invoke_us"] = round(sum(samples) / len(samples) * 1e6, 1)
+        summary.update(json.loads(out.stdout.strip().splitlines()[-1]))
+        results[backend] = summary
+    return results
+
+
+# A chat traffic sample: small talk and contact details mixed with real questions.
+_TRAFFIC_MIX = [
+    "hi", "Hello!", "What are your opening hours?", "Do you ship abroad?", "How much is the premium plan?",
+    "namaste", "thanks a lot", "Can I return a product after 30 days?", "my email is asha@example.com",
+    "Is there parking near the store?", "Do you have vegan options?", "bye", "धन्यवाद",
+    "What payment methods do you accept?", "How do I reset my password?", "hi, do you deliver on Sundays?",
+    "Call me on +91 98765 43210", "Where is your store located?", "good morning", "Can I upgrade my subscription?",
+]
+
+
+@register("project_resolve")
+def bench_project_resolve(iterations: int = 200, **_):
+    """
+    Resolving a widget's bot_key to its project: the database lookup the
+    endpoints used to do vs the resolver's cache hit, for a known key
+    and for an unknown one (negative entry).
+    """
+    from home.ai.project_cache import ProjectResolver
+    from home.models import Project
+
+    resolver = ProjectResolver(ttl=600, negative_ttl=600)
+    results: Dict[str, Any] = {}
+    with _BenchProject(qa_count=0) as project:
+        for label, key in (("known_key", project.bot_key), ("unknown_key", "bench-no-such-key")):
+            resolver.resolve(key)
+            results[label] = {
+                "db": summarize_ms(_timed(lambda: Project.objects.filter(bot_key=key).first(), iterations)),
+                "resolver": summarize_ms(_timed(lambda: resolver.resolve(key), iterations)),
+            }
+    results["resolver_stats"] = resolver.stats()
+    return results
+
+
+@register("fast_path")
+def bench_fast_path(latency_ms: float = 0.0, **_):
+    """
+    A 20-message traffic sample (greetings, thanks, contact details and
+    questions) through `generate_openrouter_answer` with a fake LLM
+    (`latency_ms`, default 300) and answer caches off, with the
+    fast-path classifier off and on: share of messages it answers,
+    per-message latency and total model time saved.
+    """
+    from django.test import override_settings
+
+    from home.ai import fastpath
+    from home.ai.agent import generate_openrouter_answer
+    from home.ai.fake_openrouter import FakeOpenRouter
+
+    latency_ms = latency_ms or 300.0
+    results: Dict[str, Any] = {"messages": len(_TRAFFIC_MIX), "fake_llm_latency_ms": latency_ms}
+    with FakeOpenRouter(latency=latency_ms / 1000.0) as fake, _BenchProject() as project:
+        answered = [q for q in _TRAFFIC_MIX if fastpath.classify(project, q) is not None]
+        results["fast_path_answered"] = len(answered)
+        results["fast_path_ratio"] = round(len(answered) / len(_TRAFFIC_MIX), 3)
+        results["classify_us"] = round(
+            sum(_timed(lambda: [fastpath.classify(project, q) for q in _TRAFFIC_MIX], 100)) / (100 * len(_TRAFFIC_MIX)) * 1e6,
+            1,
+        )
+        for label, enabled in (("fast_path_off", False), ("fast_path_on", True)):
+            with override_settings(
+                OPENROUTER_BASE_URL=fake.base_url,
+                CHAT_FAST_PATH_ENABLED=enabled,
+                CHAT_ANSWER_CACHE_ENABLED=False,
+                CHAT_SEMANTIC_CACHE_ENABLED=False,
+            ):
+                before = fake.request_count
+                started = time.perf_counter()
+                samples = _timed(lambda it=iter(_TRAFFIC_MIX): generate_openrouter_answer(project, next(it)), len(_TRAFFIC_MIX))
+                wall = time.perf_counter() - started
+            results[label] = summarize_ms(samples)
+            results[label]["total_ms"] = round(wall * 1000, 1)
+            results[label]["llm_calls"] = fake.request_count - before
+    results["saved_ms_per_100_messages"] = round(
+        (results["fast_path_off"]["total_ms"] - results["fast_path_on"]["total_ms"]) * 100 / len(_TRAFFIC_MIX), 1
+    )
+    return results
+
+
+_TURN_EVENTS = ("message_sent", "intent_detected", "fallback_triggered", "lead_created", "mcq_present", "qa_image_matched")
+
+
+@register("analytics_sink")
+def bench_analytics_sink(iterations: int = 200, **_):
+    """
+    `iterations` chat turns' worth of analytics events (six per turn),
+    recorded with one INSERT each vs through the write-behind sink:
+    time the request thread spends per event and per turn, and events
+    per second until everything is in the database.
+    """
+    from home.analytics_sink import AnalyticsEventSink
+    from home.models import AnalyticsEvent
+
+    events = [(kind, {"turn": i}) for i in range(iterations) for kind in _TURN_EVENTS]
+    results: Dict[str, Any] = {"events": len(events)}
+    with _BenchProject(qa_count=0) as project:
+        started = time.perf_counter()
+        samples = []
+        for kind, meta in events:
+            t0 = time.perf_counter()
+            AnalyticsEvent.objects.create(project=project, event_type=kind, metadata=meta)
+            samples.append(time.perf_counter() - t0)
+        wall = time.perf_counter() - started
+        results["direct"] = {
+            "caller": summarize_ms(samples),
+            "caller_ms_per_turn": round(sum(samples) * 1000 / iterations, 3),
+            "events_per_sec": round(len(events) / wall),
+        }
+
+        sink = AnalyticsEventSink(batch_size=100, flush_interval=0.05)
+        started = time.perf_counter()
+        samples = []
+        for kind, meta in events:
+            t0 = time.perf_counter()
+            sink.submit(project.id, kind, meta)
+            samples.append(time.perf_counter() - t0)
+        sink.close()
+        wall = time.perf_counter() - started
+        results["write_behind"] = {
+            "caller": summarize_ms(samples),
+            "caller_ms_per_turn": round(sum(samples) * 1000 / iterations, 3),
+            "events_per_sec": round(len(events) / wall),
+            "sink": sink.stats(),
+        }
+        results["stored"] = AnalyticsEvent.objects.filter(project=project).count()
+    results["caller_speedup"] = round(
+        results["direct"]["caller_ms_per_turn"] / max(results["write_behind"]["caller_ms_per_turn"], 1e-6), 1
+    )
+    return results
+
+
+# Model replies that are not plain JSON, as seen from Gemma and friends:
+# prose around the object, fences with trailing chatter, trailing commas,
+# single quotes, Python literals and raw newlines inside strings. Every
+# one contains a payload; the tests assert all of them are salvaged.
+MALFORMED_MODEL_OUTPUTS = [
+    'Sure! Here is the JSON:\n{"intent": "answer", "message": "We open at 9 am.", "data": {}}',
+    '{"intent": "answer", "message": "Delivery takes 3-5 days.", "data": {}}\n\nLet me know if you need more help!',
+    '```json\n{"intent": "lead", "message": "Thanks, we will call you.", "data": {"phone": "+919812345678"}}\n```\nI extracted the phone number.',
+    'Here you go:\n```\n{"intent": "answer", "message": "Yes, we have parking.", "data": {}}\n```',
+    '{"intent": "answer", "message": "Refunds take 7 days.", "data": {},}',
+    '{"intent": "booking", "message": "Booked for Monday.", "data": {"date": "Monday", "slots": ["10:00", "11:00",],},}',
+    "{'intent': 'greeting', 'message': 'Hello! How can I help?', 'data': {}}",
+    "{'intent': 'answer', 'message': \"It's open on Sundays.\", 'data': {}}",
+    "{'intent': 'answer', 'message': 'Our \"Gold\" plan costs $20.', 'data': {'confidence': 0.7}}",
+    '{"intent": "answer", "message": "Line one.\nLine two.", "data": {}}',
+    '{"intent": "lead", "message": "Noted!", "data": {"email": "a@b.co", "callback": True, "name": None}}',
+    'Based on the context [1], the answer is:\n{"intent": "answer", "message": "Yes.", "data": {}}',
+    '<think>The user asks about hours.</think>\n{"intent": "answer", "message": "9 to 5.", "data": {}}',
+    '```json\n{\n  "intent": "answer",\n  "message": "We ship to the UK.",\n  "data": {},\n}\n```',
+    # A degenerate reply: thousands of openers that never close.
+    "{" * 4000 + '{"intent": "answer", "message": "Sorry about that.", "data": {}}',
+]
+
+
+def _fence_only_parse(raw_text: str):
+    """The pre-salvage parser: strip a leading ``` fence, then json.loads."""
+    candidate = raw_text.strip()
+    if candidate.startswith("```"):
+        parts = candidate.split("```")
+        if len(parts) >= 3:
+            inner = parts[1]
+            if "\n" in inner:
+                inner = inner.split("\n", 1)[1]
+            candidate = inner.strip()
+    try:
+        parsed = json.loads(candidate)
+    except Exception:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+@register("json_salvage")
+def bench_json_salvage(iterations: int = 200, **_):
+    """
+    Payloads recovered from MALFORMED_MODEL_OUTPUTS by the fence-only
+    parser vs `extract_json`, and the cost per reply of each on the
+    malformed corpus and on clean JSON replies.
+    """
+    from home.ai.parsers import extract_json
+
+    clean = [json.dumps({"intent": "answer", "message": f"Answer {i}.", "data": {}}) for i in range(10)]
+    results: Dict[str, Any] = {"corpus": len(MALFORMED_MODEL_OUTPUTS)}
+    for label, parse in (("fence_only", _fence_only_parse), ("extract_json", lambda text: extract_json(text, dict))):
+        results[label] = {
+            "salvaged": sum(parse(text) is not None for text in MALFORMED_MODEL_OUTPUTS),
+            "malformed_us": round(
+                min(_timed(lambda: [parse(t) for t in MALFORMED_MODEL_OUTPUTS], iterations))
+                / len(MALFORMED_MODEL_OUTPUTS) * 1e6,
+                2,
+            ),
+            "clean_us": round(min(_timed(lambda: [parse(t) for t in clean], iterations)) / len(clean) * 1e6, 2),
+        }
+    return results
+
+
+# Chat load test: simulated widget sessions against the real chat views.
+
+_CHAT_ENDPOINTS = {
+    "sync": "ask_bot_by_key",
+    "stream": "ask_bot_by_key_stream",
+    "async": "ask_bot_by_key_async",
+}
+
+
+class _QueryCounter:
+    """
+    Counts SQL queries per chat request in every thread, including the
+    ones async views hand their ORM calls to: an execute wrapper is added
+    to each database connection, and the counter of the request being
+    served travels in a context variable (copied by `sync_to_async`).
+    """
+
+    def __init__(self):
+        import contextvars
+
+        self.current = contextvars.ContextVar("loadtest_queries", default=None)
+
+    def __call__(self, execute, sql, params, many, context):
+        counter = self.current.get()
+        if counter is not None:
+            counter[0] += 1
+        return execute(sql, params, many, context)
+
+    def _install(self, connection, **_):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __enter__(self):
+        from django.db import connection
+        from django.db.backends.signals import connection_created
+
+        connection_created.connect(self._install)
+        self._install(connection)
+        return self
+
+    def __exit__(self, *exc):
+        from django.db import connection
+        from django.db.backends.signals import connection_created
+
+        connection_created.disconnect(self._install)
+        if self in connection.execute_wrappers:
+            connection.execute_wrappers.remove(self)
+
+
+def _session_questions(pool: List[str], session: int, count: int, seed: int) -> List[str]:
+    import random
+
+    rng = random.Random(seed * 100003 + session)
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def run_load_test(
+    sessions: int = 20,
+    messages: int = 5,
+    endpoint: str = "sync",
+    bot_key: str = None,
+    base_url: str = None,
+    qa_count: int = 50,
+    think_ms: float = 0.0,
+    cache: bool = True,
+    seed: int = 1,
+    fake=None,
+) -> Dict[str, Any]:
+    """
+    Drive `sessions` concurrent simulated widget sessions, each loading
+    the embed page and then sending `messages` chat messages (one at a
+    time, `think_ms` apart) to the `endpoint` chat view ("sync", "stream"
+    or "async"), in-process through Django's test clients.
+
+    The project is `bot_key`'s, or a throwaway one with `qa_count`
+    synthetic QAs. The model is `base_url` (e.g. `manage.py
+    fake_openrouter`), else the given or a default `fake` LLM.
+
+    Returns throughput, p50/p95/p99 latency (and time to the first token
+    for "stream"), SQL queries per message and the LLM calls made.
+    """
+    import asyncio
+    import contextlib
+    from concurrent.futures import ThreadPoolExecutor
+
+    from django.db import connection
+    from django.test import AsyncClient, Client, override_settings
+    from django.urls import reverse
+
+    from home.ai.fake_openrouter import FakeOpenRouter
+    from home.models import Project
+
+    if endpoint not in _CHAT_ENDPOINTS:
+        raise ValueError(f"Unknown endpoint {endpoint!r} (expected one of: {', '.join(_CHAT_ENDPOINTS)})")
+    chat_url = reverse(_CHAT_ENDPOINTS[endpoint])
+    embed_url = reverse("embed_chatbot")
+
+    with contextlib.ExitStack() as stack:
+        if base_url is None:
+            if fake is None:
+                fake = stack.enter_context(FakeOpenRouter(latency=0.3))
+            base_url = fake.base_url
+        else:
+            fake = None
+        if bot_key:
+            project = Project.objects.get(bot_key=bot_key)
+        else:
+            project = stack.enter_context(_BenchProject(qas=synthetic_qas(qa_count)))
+        stack.enter_context(
+            override_settings(
+                OPENROUTER_BASE_URL=base_url,
+                **({} if cache else {"CHAT_ANSWER_CACHE_ENABLED": False, "CHAT_SEMANTIC_CACHE_ENABLED": False}),
+            )
+        )
+        counter = stack.enter_context(_QueryCounter())
+        pool = _TRAFFIC_MIX + list(project.qas.values_list("question", flat=True)[:200])
+        key = project.bot_key
+        llm_before = (fake.request_count, fake.error_count) if fake is not None else (0, 0)
+
+        def record(samples, status, body, started, ttfb, queries):
+            samples.append(
+                {
+                    "ms": (time.perf_counter() - started) * 1000,
+                    "ttfb_ms": None if ttfb is None else (ttfb - started) * 1000,
+                    "queries": queries[0],
+                    "error": status != 200 or (endpoint == "stream" and "event: done" not in body),
+                }
+            )
+
+        def sync_session(i):
+            client = Client(raise_request_exception=False)
+            samples = []
+            try:
+                client.get(embed_url, {"key": key}, secure=True)
+                for question in _session_questions(pool, i, messages, seed):
+                    queries = [0]
+                    token = counter.current.set(queries)
+                    started = time.perf_counter()
+                    ttfb, body = None, ""
+                    try:
+                        resp = client.post(chat_url, {"question": question, "key": key}, secure=True)
+                        if endpoint == "stream":
+                            parts = []
+                            for chunk in resp.streaming_content:
+                                if ttfb is None and b"event: token" in chunk:
+                                    ttfb = time.perf_counter()
+                                parts.append(chunk)
+                            body = b"".join(parts).decode()
+                    finally:
+                        counter.current.reset(token)
+                    record(samples, resp.status_code, body, started, ttfb, queries)
+                    if think_ms:
+                        time.sleep(think_ms / 1000.0)
+            finally:
+                connection.close()
+            return samples
+
+        async def async_session(i):
+            client = AsyncClient(raise_request_exception=False)
+            samples = []
+            await client.get(embed_url, {"key": key}, secure=True)
+            for question in _session_questions(pool, i, messages, seed):
+                queries = [0]
+                token = counter.current.set(queries)
+                started = time.perf_counter()
+                try:
+                    resp = await client.post(chat_url, {"question": question, "key": key}, secure=True)
+                finally:
+                    counter.current.reset(token)
+                record(samples, resp.status_code, "", started, None, queries)
+                if think_ms:
+                    await asyncio.sleep(think_ms / 1000.0)
+            return samples
+
+        started = time.perf_counter()
+        if endpoint == "async":
+
+            async def run_all():
+                return await asyncio.gather(*(async_session(i) for i in range(sessions)))
+
+            per_session = asyncio.run(run_all())
+        else:
+            with ThreadPoolExecutor(max_workers=sessions) as executor:
+                per_session = list(executor.map(sync_session, range(sessions)))
+        wall = time.perf_counter() - started
+
+    samples = [s for session in per_session for s in session]
+    latencies = [s["ms"] / 1000.0 for s in samples]
+    queries = [s["queries"] for s in samples]
+    result: Dict[str, Any] = {
+        "endpoint": endpoint,
+        "sessions": sessions,
+        "messages": len(samples),
+        "errors": sum(1 for s in samples if s["error"]),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(samples) / wall, 2) if wall else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 1),
+            "p95": round(percentile(latencies, 95) * 1000, 1),
+            "p99": round(percentile(latencies, 99) * 1000, 1),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+        },
+        "db_queries": {
+            "total": sum(queries),
+            "per_message_mean": round(sum(queries) / len(queries), 2) if queries else 0.0,
+            "per_message_p95": percentile(queries, 95),
+            "per_message_max": max(queries, default=0),
+        },
+    }
+    ttfbs = [s["ttfb_ms"] / 1000.0 for s in samples if s["ttfb_ms"] is not None]
+    if ttfbs:
+        result["ttfb_ms"] = {"p50": round(percentile(ttfbs, 50) * 1000, 1), "p95": round(percentile(ttfbs, 95) * 1000, 1)}
+    if fake is not None:
+        result["llm"] = {"calls": fake.request_count - llm_before[0], "failed": fake.error_count - llm_before[1]}
+    return result
+
+
+@register("chat_load")
+def bench_chat_load(latency_ms: float = 0.0, concurrency: int = 50, **_):
+    """
+    `run_load_test` on each chat endpoint: `concurrency` widget sessions
+    of 5 messages against a fake LLM with log-normal latency (median
+    `latency_ms`, default 300) and answer caches off.
+    """
+    from home.ai.fake_openrouter import FakeOpenRouter
+
+    results: Dict[str, Any] = {"sessions": concurrency, "fake_llm_latency_ms": latency_ms or 300.0}
+    with FakeOpenRouter(latency=(latency_ms or 300.0) / 1000.0, latency_sigma=0.3, seed=1) as fake:
+        for endpoint in _CHAT_ENDPOINTS:
+            results[endpoint] = run_load_test(sessions=concurrency, endpoint=endpoint, cache=False, fake=fake)
+    return results
@@ -1 +1 @@
-# package init for management commands
+# package init for management commands
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    help = 'Run chat pipeline benchmarks and print the results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help='Benchmarks to run (default: all). Use --list to see them.')
+        parser.add_argument('--list', action='store_true', help='List available benchmarks and exit')
+        parser.add_argument('--iterations', '-n', type=int, default=200)
+        parser.add_argument('--latency-ms', type=float, default=0.0, help='Latency injected by the fake LLM')
+        parser.add_argument('--concurrency', type=int, default=50, help='In-flight requests for load benchmarks')
+        parser.add_argument('--workers', type=int, default=4, help='Sync worker threads for load benchmarks')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name in sorted(BENCHMARKS):
+                self.stdout.write(name)
+            return
+
+        names = options['names'] or sorted(BENCHMARKS)
+        unknown = [n for n in names if n not in BENCHMARKS]
+        if unknown:
+            raise CommandError('Unknown benchmark(s): %s' % ', '.join(unknown))
+
+        results = {}
+        for name in names:
+            self.stderr.write('Running %s...' % name)
+            results[name] = BENCHMARKS[name](**options)
+
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from home.ai.fake_openrouter import FakeOpenRouter, load_payloads
+
+
+def add_fake_llm_arguments(parser):
+    """Options shaping the fake LLM, shared with the loadtest command."""
+    parser.add_argument('--latency-ms', type=float, default=300.0, help='Median time to the first token')
+    parser.add_argument('--latency-sigma', type=float, default=0.0, help='Log-normal spread of the latency (0 = constant)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of completions answered with HTTP 503')
+    parser.add_argument('--stream-interval-ms', type=float, default=0.0, help='Delay between streamed chunks')
+    parser.add_argument('--payloads', help='JSON file with a list of canned payloads (see home/ai/fake_openrouter.py)')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for the latency and error draws')
+
+
+def fake_llm_from_options(options, port=0):
+    return FakeOpenRouter(
+        port=port,
+        latency=options['latency_ms'] / 1000.0,
+        latency_sigma=options['latency_sigma'],
+        error_rate=options['error_rate'],
+        stream_interval=options['stream_interval_ms'] / 1000.0,
+        payloads=load_payloads(options['payloads']) if options['payloads'] else (),
+        seed=options['seed'],
+    )
+
+
+class Command(BaseCommand):
+    help = 'Serve a fake OpenAI-compatible /v1/chat/completions endpoint for local load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        add_fake_llm_arguments(parser)
+
+    def handle(self, *args, **options):
+        fake = fake_llm_from_options(options, port=options['port']).start()
+        self.stdout.write('Fake OpenRouter listening; run the app with OPENROUTER_BASE_URL=%s' % fake.base_url)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            fake.stop()
+            self.stdout.write('Served %d completions (%d failed)' % (fake.request_count, fake.error_count))
@@ -0,0 +1,49 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.benchmarks import run_load_test
+from home.management.commands.fake_openrouter import add_fake_llm_arguments, fake_llm_from_options
+
+
+class Command(BaseCommand):
+    help = (
+        'Drive concurrent simulated chat widget sessions against the chat endpoints and report '
+        'throughput, p50/p95/p99 latency and DB queries per message'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', '-c', type=int, default=20, help='Concurrent widget sessions')
+        parser.add_argument('--messages', '-m', type=int, default=5, help='Messages sent by each session')
+        parser.add_argument('--endpoint', choices=['sync', 'stream', 'async'], default='sync')
+        parser.add_argument('--think-ms', type=float, default=0.0, help='Pause between a session\'s messages')
+        parser.add_argument('--key', help='Bot key of an existing project (default: a throwaway project)')
+        parser.add_argument('--qas', type=int, default=50, help='Synthetic QAs in the throwaway project')
+        parser.add_argument('--no-cache', action='store_true', help='Disable the exact and semantic answer caches')
+        parser.add_argument(
+            '--base-url',
+            help='LLM to use, e.g. a running `manage.py fake_openrouter` (default: an embedded fake LLM)',
+        )
+        add_fake_llm_arguments(parser)
+
+    def handle(self, *args, **options):
+        fake = None if options['base_url'] else fake_llm_from_options(options).start()
+        try:
+            result = run_load_test(
+                sessions=max(1, options['sessions']),
+                messages=max(1, options['messages']),
+                endpoint=options['endpoint'],
+                bot_key=options['key'],
+                base_url=options['base_url'],
+                qa_count=options['qas'],
+                think_ms=options['think_ms'],
+                cache=not options['no_cache'],
+                seed=options['seed'] or 1,
+                fake=fake,
+            )
+        except Exception as e:
+            raise CommandError('Load test failed: %s' % e)
+        finally:
+            if fake is not None:
+                fake.stop()
+        self.stdout.write(json.dumps(result, indent=2))
@@ -0,0 +1,44 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from home.microbench import BASELINE_PATH, SIZES, compare, load_baseline, run_suite
+
+
+class Command(BaseCommand):
+    help = 'Run the chat hot-path microbenchmarks and check them against the stored baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('cases', nargs='*', help='Only run cases starting with these names')
+        parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='Synthetic knowledge-base sizes')
+        parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per timed round')
+        parser.add_argument('--output', '-o', help='Write the results JSON to this file')
+        parser.add_argument('--baseline', default=str(BASELINE_PATH), help='Baseline JSON to compare with')
+        parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+        parser.add_argument('--tolerance', type=float, default=0.4, help='Allowed calibrated throughput drop (0.4 = 40%%)')
+        parser.add_argument('--alloc-tolerance', type=float, default=0.2, help='Allowed peak allocation growth')
+
+    def handle(self, *args, **options):
+        results = run_suite(options['sizes'], options['min_time'], options['cases'])
+        raw = json.dumps(results, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(raw + '\n')
+        else:
+            self.stdout.write(raw)
+
+        if options['save_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as f:
+                f.write(raw + '\n')
+            self.stderr.write('Saved baseline to %s' % options['baseline'])
+            return
+
+        try:
+            baseline = load_baseline(options['baseline'])
+        except FileNotFoundError:
+            self.stderr.write('No baseline at %s; run with --save-baseline to record one.' % options['baseline'])
+            return
+        regressions = compare(results, baseline, options['tolerance'], options['alloc_tolerance'])
+        if regressions:
+            raise CommandError('Microbenchmark regressions:\n  ' + '\n  '.join(regressions))
+        self.stderr.write('No regressions against %s' % options['baseline'])
@@ -0,0 +1,91 @@
+import json
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from home.ai.optional import LANGCHAIN_AVAILABLE, LANGGRAPH_AVAILABLE
+
+# Packages that should only be imported by the code paths that need them.
+HEAVY_PACKAGES = ('langchain', 'langchain_core', 'langchain_openai', 'langgraph', 'openai')
+
+DEFAULT_MODULES = ['home.models', 'home.ai.graph', 'home.ai.workflows', 'home.ai.agent', 'home.views', 'home.urls']
+
+# Runs in a fresh interpreter per module, so each import is measured cold
+# (on top of django.setup(), which is reported separately).
+_PROFILE_SCRIPT = """
+import importlib, json, sys, time
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+heavy = set(sys.argv[2].split(","))
+started = time.perf_counter()
+import django
+django.setup()
+setup_done = time.perf_counter()
+rss_before = rss_kb()
+loaded_before = set(sys.modules)
+importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+loaded = set(sys.modules) - loaded_before
+print(json.dumps({
+    "module": sys.argv[1],
+    "setup_ms": round((setup_done - started) * 1000, 1),
+    "import_ms": round((imported - setup_done) * 1000, 1),
+    "rss_kb": rss_kb() - rss_before,
+    "modules_loaded": len(loaded),
+    "heavy": sorted({m.split(".")[0] for m in loaded} & heavy),
+}))
+"""
+
+
+def profile_import(module):
+    """Import `module` in a fresh process; returns its import time, RSS growth and heavy packages pulled in."""
+    out = subprocess.run(
+        [sys.executable, '-c', _PROFILE_SCRIPT, module, ','.join(HEAVY_PACKAGES)],
+        cwd=str(settings.BASE_DIR),
+        capture_output=True,
+        text=True,
+    )
+    if out.returncode != 0:
+        raise CommandError('Importing %s failed:\n%s' % (module, out.stderr.strip()))
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+class Command(BaseCommand):
+    help = 'Report the cold import time and memory of app modules, each in a fresh process'
+
+    def add_arguments(self, parser):
+        parser.add_argument('modules', nargs='*', help='Modules to import (default: the app entry points and optional AI packages)')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+        parser.add_argument('--budget-ms', type=float, default=None, help='Fail if any module takes longer to import')
+
+    def handle(self, *args, **options):
+        modules = options['modules'] or DEFAULT_MODULES + (
+            (['langchain_openai'] if LANGCHAIN_AVAILABLE else []) + (['langgraph.graph'] if LANGGRAPH_AVAILABLE else [])
+        )
+        results = [profile_import(m) for m in modules]
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.stdout.write('django.setup(): %.1f ms' % results[0]['setup_ms'])
+            self.stdout.write('%-28s %10s %10s %8s  %s' % ('module', 'import ms', 'RSS KB', 'modules', 'heavy packages'))
+            for r in results:
+                self.stdout.write('%-28s %10.1f %10d %8d  %s' % (
+                    r['module'], r['import_ms'], r['rss_kb'], r['modules_loaded'], ', '.join(r['heavy']) or '-',
+                ))
+
+        budget = options['budget_ms']
+        over = [r['module'] for r in results if budget is not None and r['import_ms'] > budget]
+        if over:
+            raise CommandError('Over the %.0f ms import budget: %s' % (budget, ', '.join(over)))
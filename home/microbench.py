@@ -0,0 +1,205 @@
+"""
+Microbenchmarks for the chat hot-path helpers, run via
+`python manage.py microbench`.
+
+Each case measures one helper in isolation: throughput (best of a few
+timed rounds, in ops/sec) and memory (the peak bytes a single call
+allocates, traced with `tracemalloc`). Cases whose cost depends on the
+knowledge base run on synthetic projects of 10, 1,000 and 10,000 QAs.
+
+Results are written as JSON and compared with a stored baseline
+(home/microbench_baseline.json): a case is a regression when its
+throughput drops, or its peak allocation grows, by more than the
+tolerance. To compare runs on machines of different speed (or on a busy
+one), throughputs are first divided by the throughput of a fixed
+pure-Python calibration workload measured in the same run. Re-record
+the baseline with `--save-baseline` after an intended change.
+"""
+
+import json
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+BASELINE_PATH = Path(__file__).resolve().parent / "microbench_baseline.json"
+
+SIZES = (10, 1000, 10000)
+
+# Raw model outputs seen in practice: clean JSON, fenced JSON and JSON
+# wrapped in prose.
+_MODEL_OUTPUTS = [
+    '{"intent": "answer", "message": "We open at 9 am.", "data": {}}',
+    '```json\n{"intent": "lead", "message": "Thanks!", "data": {"email": "a@b.c"}}\n```',
+    'Sure! Here is the answer:\n{"intent": "answer", "message": "Shipping takes 3 days.", "data": {"confidence": 0.8}}\nHope it helps.',
+]
+_MESSAGES = [
+    "What are your opening hours?",
+    "kya aap Sunday ko khule hain?",
+    "मुझे रिफंड कैसे मिलेगा?",
+    "Do you have vegan options on the menu?",
+]
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, rounds: int = 3) -> Dict[str, float]:
+    """Best-of-`rounds` ops/sec (each round runs for about `min_time`) and peak bytes of one call."""
+    func()  # warm-up (lazy imports, memoized templates)
+
+    # Memory first, so it is always measured on the same (second) input.
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    calls = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time / 4 or calls >= 1 << 20:
+            break
+        calls *= 2
+    best = elapsed
+    for _ in range(rounds - 1):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        best = min(best, time.perf_counter() - started)
+    ops = calls / best if best else float("inf")
+    return {"ops_per_sec": round(ops, 1), "us_per_op": round(1e6 / ops, 2), "peak_bytes": peak}
+
+
+def _calibration_workload():
+    data = {str(i): i * 7919 % 1000 for i in range(500)}
+    return sorted(data.items(), key=lambda kv: kv[1])[:10]
+
+
+def calibrate(min_time: float = 0.2) -> float:
+    """Ops/sec of the calibration workload: this machine's speed, right now."""
+    return measure(_calibration_workload, min_time)["ops_per_sec"]
+
+
+def _cycle(items: List[Any]) -> Callable[[], Any]:
+    state = {"i": 0}
+
+    def next_item():
+        state["i"] += 1
+        return items[state["i"] % len(items)]
+
+    return next_item
+
+
+def _image_qas(count: int):
+    from home.benchmarks import synthetic_qas
+
+    qas = synthetic_qas(count)
+    for i, qa in enumerate(qas):
+        qa.project_id = None
+        if i % 3 == 0:
+            qa.image = f"answers/bench-{i}.png"
+    return qas
+
+
+def _sized_cases(size: int) -> Iterable[Tuple[str, Callable[[], Any]]]:
+    from home.ai.prompt_cache import CompiledContext
+    from home.ai.prompts import build_context_prompt
+    from home.ai.snapshot import KnowledgeBaseSnapshot
+    from home.models import Project
+    from home.pipeline import _fuzzy_image_match
+
+    qas = _image_qas(size)
+    project = Project(name="Microbench", retrieval_top_k=8, prompt_token_budget=2000)
+    questions = _cycle([qa.question for qa in qas[:: max(1, size // 16)]])
+    yield "build_context_prompt", lambda: build_context_prompt(project, questions(), qas=qas)
+
+    snapshot = KnowledgeBaseSnapshot(project, CompiledContext(qas))
+    replies = _cycle(["you can find the store hours and parking details below", "refund policy for orders"])
+    yield "fuzzy_image_match", lambda: _fuzzy_image_match(snapshot, questions().lower(), replies())
+
+
+def _fixed_cases(project) -> Iterable[Tuple[str, Callable[[], Any]]]:
+    from home.ai.i18n import detect_language
+    from home.ai.parsers import normalize_ai_payload
+    from home.pipeline import _handle_intent
+
+    outputs = _cycle(_MODEL_OUTPUTS)
+    yield "normalize_ai_payload", lambda: normalize_ai_payload(outputs())
+    messages = _cycle(_MESSAGES)
+    yield "detect_language", lambda: detect_language(messages())
+    yield "handle_intent_answer", lambda: _handle_intent(project, {"intent": "answer", "message": "Hi", "data": {}})
+    yield "handle_intent_unknown", lambda: _handle_intent(project, {"intent": "unknown", "message": "", "data": {}})
+
+
+def run_suite(sizes: Iterable[int] = SIZES, min_time: float = 0.2, only: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Run every case (or those whose name starts with one of `only`) and
+    return `{"meta": ..., "results": {case: measurement}}`; sized cases
+    are named `case[size]`.
+    """
+    from home.benchmarks import _BenchProject
+
+    only = tuple(only)
+    results: Dict[str, Dict[str, float]] = {}
+
+    def wanted(name):
+        return not only or name.startswith(only)
+
+    calibration = [calibrate(min_time)]
+    with _BenchProject(qa_count=0) as project:
+        for name, func in _fixed_cases(project):
+            if wanted(name):
+                results[name] = measure(func, min_time)
+    for size in sizes:
+        for name, func in _sized_cases(size):
+            if wanted(name):
+                results[f"{name}[{size}]"] = measure(func, min_time)
+    calibration.append(calibrate(min_time))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "sizes": list(sizes),
+            # Mean of the runs before and after the cases.
+            "calibration_ops_per_sec": round(sum(calibration) / len(calibration), 1),
+        },
+        "results": results,
+    }
+
+
+def compare(
+    results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.4, alloc_tolerance: float = 0.2
+) -> List[str]:
+    """
+    Regressions of `results` against `baseline`, as readable lines:
+    calibrated throughput below (1 - tolerance) x baseline, or peak
+    allocation above (1 + alloc_tolerance) x baseline (plus 1 KB of slack
+    for tiny calls). Cases missing on either side are ignored.
+    """
+    regressions = []
+    current = results.get("results", {})
+    now_speed = results.get("meta", {}).get("calibration_ops_per_sec") or 1.0
+    base_speed = baseline.get("meta", {}).get("calibration_ops_per_sec") or 1.0
+    for name, base in sorted(baseline.get("results", {}).items()):
+        now = current.get(name)
+        if now is None:
+            continue
+        ratio = (now["ops_per_sec"] / now_speed) / (base["ops_per_sec"] / base_speed)
+        if ratio < 1 - tolerance:
+            regressions.append(
+                f"{name}: {now['ops_per_sec']:.0f} ops/s vs baseline {base['ops_per_sec']:.0f} "
+                f"({ratio - 1:+.0%} after calibration)"
+            )
+        if now["peak_bytes"] > base["peak_bytes"] * (1 + alloc_tolerance) + 1024:
+            regressions.append(f"{name}: peak {now['peak_bytes']} bytes vs baseline {base['peak_bytes']}")
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
@@ -1,16 +1,42 @@
-from django.db.models import F
-from home.models import Blog
-
-
-class BlogViewCounterMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        response = self.get_response(request)
-
-        if request.resolver_match and request.resolver_match.url_name == "blog_detail":
-            slug = request.resolver_match.kwargs.get("slug")
-            Blog.objects.filter(slug=slug).update(views=F("views") + 1)
-
-        return response
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.models import F
+from home.models import Blog
+
+
+class BlogViewCounterMiddleware:
+    # Supporting both modes matters: a single sync-only middleware makes
+    # Django run every async view (e.g. the ASGI chat endpoints) through
+    # one thread, serializing them.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _blog_slug(self, request):
+        if request.resolver_match and request.resolver_match.url_name == "blog_detail":
+            return request.resolver_match.kwargs.get("slug")
+        return None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        response = self.get_response(request)
+
+        slug = self._blog_slug(request)
+        if slug:
+            Blog.objects.filter(slug=slug).update(views=F("views") + 1)
+
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        slug = self._blog_slug(request)
+        if slug:
+            await Blog.objects.filter(slug=slug).aupdate(views=F("views") + 1)
+
+        return response
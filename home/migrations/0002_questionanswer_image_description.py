@@ -1,18 +1,18 @@
-# Generated by Django 5.2 on 2025-06-29 07:42
-
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('home', '0001_initial'),
-    ]
-
-    operations = [
-        migrations.AddField(
-            model_name='questionanswer',
-            name='image_description',
-            field=models.CharField(blank=True, max_length=255, null=True),
-        ),
-    ]
+# Generated by Django 5.2 on 2025-06-29 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionanswer',
+            name='image_description',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
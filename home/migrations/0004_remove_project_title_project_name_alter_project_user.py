@@ -1,32 +1,32 @@
-# Generated by Django 5.2 on 2025-06-29 10:06
-
-import django.db.models.deletion
-import django.utils.timezone
-from django.conf import settings
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('home', '0003_project_bot_key'),
-        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
-    ]
-
-    operations = [
-        migrations.RemoveField(
-            model_name='project',
-            name='title',
-        ),
-        migrations.AddField(
-            model_name='project',
-            name='name',
-            field=models.CharField(default=django.utils.timezone.now, max_length=255),
-            preserve_default=False,
-        ),
-        migrations.AlterField(
-            model_name='project',
-            name='user',
-            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
-        ),
-    ]
+# Generated by Django 5.2 on 2025-06-29 10:06
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0003_project_bot_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='project',
+            name='title',
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='name',
+            field=models.CharField(default=django.utils.timezone.now, max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='user',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
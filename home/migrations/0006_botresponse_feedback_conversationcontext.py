@@ -1,53 +1,53 @@
-# Generated by Django 5.2.4 on 2025-12-18 13:05
-
-import django.db.models.deletion
-from django.db import migrations, models
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        ('home', '0005_project_allowed_intents_project_voice_enabled_and_more'),
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='BotResponse',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('question', models.TextField(blank=True)),
-                ('response', models.TextField(blank=True)),
-                ('confidence', models.FloatField(blank=True, null=True)),
-                ('payload', models.JSONField(blank=True, null=True)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='home.project')),
-            ],
-        ),
-        migrations.CreateModel(
-            name='Feedback',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('question', models.TextField(blank=True)),
-                ('response', models.TextField(blank=True)),
-                ('rating', models.IntegerField(blank=True, null=True)),
-                ('comment', models.TextField(blank=True)),
-                ('selected_option', models.CharField(blank=True, max_length=255, null=True)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedbacks', to='home.project')),
-            ],
-        ),
-        migrations.CreateModel(
-            name='ConversationContext',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('session_key', models.CharField(blank=True, max_length=255, null=True)),
-                ('key', models.CharField(max_length=255)),
-                ('value', models.JSONField()),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contexts', to='home.project')),
-            ],
-            options={
-                'indexes': [models.Index(fields=['project', 'session_key', 'key'], name='home_conver_project_68e08b_idx')],
-            },
-        ),
-    ]
+# Generated by Django 5.2.4 on 2025-12-18 13:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_project_allowed_intents_project_voice_enabled_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BotResponse',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.TextField(blank=True)),
+                ('response', models.TextField(blank=True)),
+                ('confidence', models.FloatField(blank=True, null=True)),
+                ('payload', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='responses', to='home.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Feedback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question', models.TextField(blank=True)),
+                ('response', models.TextField(blank=True)),
+                ('rating', models.IntegerField(blank=True, null=True)),
+                ('comment', models.TextField(blank=True)),
+                ('selected_option', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedbacks', to='home.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ConversationContext',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.CharField(blank=True, max_length=255, null=True)),
+                ('key', models.CharField(max_length=255)),
+                ('value', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contexts', to='home.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'session_key', 'key'], name='home_conver_project_68e08b_idx')],
+            },
+        ),
+    ]
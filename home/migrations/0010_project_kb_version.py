@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0009_newsletter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='kb_version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text="Bumped whenever the project's QuestionAnswer rows change; keys AI-side caches."),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0010_project_kb_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='prompt_token_budget',
+            field=models.PositiveIntegerField(default=2000, help_text='Approximate token budget for the knowledge-base context of each prompt (0 = unlimited).'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='retrieval_top_k',
+            field=models.PositiveSmallIntegerField(default=8, help_text='How many of the most relevant Q&A pairs are sent to the model per message. 0 sends the whole knowledge base.'),
+        ),
+    ]
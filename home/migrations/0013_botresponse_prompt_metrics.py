@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0011_project_retrieval_settings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='botresponse',
+            name='llm_latency_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='botresponse',
+            name='prompt_tokens',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
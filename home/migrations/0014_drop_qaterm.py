@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Drop the table of the removed QATerm index, which databases migrated
+    with its former 0012 migration still have; its foreign key to
+    QuestionAnswer would otherwise block QA deletes.
+    """
+
+    dependencies = [
+        ('home', '0013_botresponse_prompt_metrics'),
+    ]
+
+    operations = [
+        migrations.RunSQL("DROP TABLE IF EXISTS home_qaterm", migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,592 @@
+"""
+The chat turn as a pipeline of explicit stages, shared by every chat
+endpoint (sync, async and streaming views are thin adapters over it).
+
+Stages, in order:
+- resolve_project   the project, by pk or (cached) bot key
+- detect_language   the turn's language, kept in the session; tracks
+                    `message_sent`
+- cache_lookup      fast path and answer caches (`lookup_answer`)
+- llm               intent graph / model call (or stream), single-flight
+                    coalesced
+- intent            allowed intents, leads, fallback (`_handle_intent`)
+- media             the image shown with the answer (`_chat_turn_image`)
+- persist           BotResponse + ConversationContext in one transaction
+- respond           the JSON response body
+
+Every stage records its wall time on the ChatTurn. The JSON endpoints
+send them as a `Server-Timing` header (shown by browser devtools), the
+last CHAT_TIMINGS_WINDOW turns of this worker are summarized per stage
+in the project analytics view, and a turn slower than CHAT_SLOW_TURN_MS
+is logged with its breakdown. Stages skipped by a cache hit record
+nothing. For streamed turns `llm` includes writing the tokens out.
+
+Tunables (Django settings):
+- CHAT_SLOW_TURN_MS      default 5000 (0 disables the log line)
+- CHAT_TIMINGS_WINDOW    default 500
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from home.ai.agent import agenerate_openrouter_answer, generate_openrouter_answer, lookup_answer, stream_openrouter_answer
+from home.ai.i18n import detect_language
+from home.ai.image_match import IMAGE_MATCH_THRESHOLD
+from home.ai.project_cache import get_project_resolver
+from home.ai.snapshot import KnowledgeBaseSnapshot
+from home.analytics_sink import get_analytics_sink
+from home.models import AnalyticsEvent, BotResponse, ConversationContext, Lead, Project
+
+STAGES = ("resolve_project", "detect_language", "cache_lookup", "llm", "intent", "media", "persist", "respond")
+
+
+def _track_event(project, event_type, metadata=None):
+    """
+    Lightweight analytics tracker. Never breaks the main flow.
+    Events go through the write-behind sink when it is enabled.
+    """
+    try:
+        sink = get_analytics_sink()
+        if sink is not None:
+            sink.submit(project.id, event_type, metadata)
+            return
+        AnalyticsEvent.objects.create(
+            project=project,
+            event_type=event_type,
+            metadata=metadata or {},
+        )
+    except Exception as e:
+        # Avoid crashing the request on analytics failures
+        print(f"WARN: failed to track analytics event '{event_type}': {e}")
+
+
+async def _atrack_event(project, event_type, metadata=None):
+    """
+    Async counterpart of `_track_event` for the ASGI chat views; never
+    blocks the event loop on a full sink.
+    """
+    try:
+        sink = get_analytics_sink()
+        if sink is not None:
+            sink.submit(project.id, event_type, metadata, block=False)
+            return
+        await AnalyticsEvent.objects.acreate(
+            project=project,
+            event_type=event_type,
+            metadata=metadata or {},
+        )
+    except Exception as e:
+        print(f"WARN: failed to track analytics event '{event_type}': {e}")
+
+
+def _handle_intent(project, ai_payload):
+    """
+    Handle the structured intent coming from the AI layer.
+
+    - answer   → just return the message
+    - lead     → save a lead (best-effort) and return the message
+    - booking  → placeholder handler (no-op for now, just echo)
+    - greeting → simple greeting/intro, treated like an answer
+    - unknown  → fallback-safe response
+    """
+    intent = ai_payload.get("intent", "unknown")
+    message = ai_payload.get("message", "")
+    data = ai_payload.get("data", {}) or {}
+
+    # Respect per-project allowed intents. If the detected intent is
+    # not enabled for this project, downgrade it to "unknown" so that
+    # existing flows (fallback, analytics, etc.) handle it safely.
+    allowed = project.allowed_intents or ["answer", "lead", "booking", "greeting", "unknown"]
+    if intent not in allowed:
+        intent = "unknown"
+
+    # Track detected intent
+    _track_event(
+        project,
+        "intent_detected",
+        {
+            "intent": intent,
+        },
+    )
+
+    # Ensure data is a dict
+    if not isinstance(data, dict):
+        data = {}
+
+    if intent == "lead":
+        # Best-effort extraction of lead details from data
+        name = data.get("name") or data.get("full_name") or ""
+        email = data.get("email") or ""
+
+        try:
+            lead = Lead.objects.create(
+                project=project,
+                name=name[:255] if isinstance(name, str) else "",
+                email=email if isinstance(email, str) else "",
+            )
+            _track_event(
+                project,
+                "lead_created",
+                {
+                    "lead_id": lead.id,
+                    "name": lead.name,
+                    "email": lead.email,
+                },
+            )
+        except Exception as e:
+            # Do not break chat flow on DB issues
+            print("WARN: failed to save lead:", str(e))
+
+        # You can enrich data with a flag that a lead was created
+        data.setdefault("lead_saved", True)
+
+    elif intent == "booking":
+        # Placeholder booking handler – extend later
+        data.setdefault("booking_handled", False)
+
+    elif intent == "unknown":
+        # Ensure a friendly fallback message
+        if not message:
+            message = "I'm not sure how to handle that yet, but your message was received."
+
+        _track_event(
+            project,
+            "fallback_triggered",
+            {
+                "reason": "unknown_intent",
+            },
+        )
+
+    # For "answer" (and others) we just pass through
+    return {
+        "intent": intent,
+        "message": message,
+        "data": data,
+    }
+
+
+def _fuzzy_image_match(snapshot, q_lower, handled_msg):
+    """
+    The QA with an image most similar to the (lowercased) question or the
+    bot's reply, and its score, if that reaches IMAGE_MATCH_THRESHOLD;
+    (None, 0.0) otherwise. Only a shortlist of QAs is scored (see
+    home/ai/image_match.py).
+    """
+    return snapshot.image_matcher.best(q_lower, handled_msg)
+
+
+def _chat_turn_image(request, project, question, ai_payload, handled, snapshot):
+    """
+    The image to show with a chat answer, as (image, qa_image): `image` is
+    the response's `{'url', 'description'}` (None without one) and
+    `qa_image` describes the matched QuestionAnswer when the image came
+    from the knowledge base rather than the model (None otherwise).
+    """
+    image = None
+    try:
+        # If model returned an image inside `data`, prefer/promote it to
+        # a top-level `image` field (normalizing to an absolute URL when
+        # possible) so existing frontends can render it uniformly.
+        model_image = None
+        try:
+            model_image = (ai_payload.get('data') or {}).get('image')
+        except Exception:
+            model_image = None
+
+        if model_image and isinstance(model_image, dict):
+            img_url = model_image.get('url') or ''
+            img_desc = model_image.get('caption') or model_image.get('description') or model_image.get('reason') or ''
+            try:
+                if img_url and not img_url.startswith('http'):
+                    img_url = request.build_absolute_uri(img_url)
+            except Exception:
+                pass
+
+            if img_url or img_desc:
+                image = {'url': img_url, 'description': img_desc}
+
+        # Only run QA-based attachment when no image is present yet.
+        if image:
+            return image, None
+        qa_match = None
+        if question:
+            # Exact match first
+            qa_match = snapshot.find_exact(question)
+        # Fallback: contains
+        if not qa_match and question:
+            qa_match = snapshot.find_containing(question)
+
+        # If still no match, try fuzzy similarity against QAs that have images
+        if not qa_match and question:
+            try:
+                q_lower = question.lower().strip()
+                handled_msg = (handled.get('message') or '').lower().strip()
+                best, best_score = _fuzzy_image_match(snapshot, q_lower, handled_msg)
+
+                # threshold: accept only reasonably similar matches
+                if best and best_score >= IMAGE_MATCH_THRESHOLD:
+                    qa_match = best
+                    try:
+                        _track_event(project, 'qa_image_matched', {'qa_id': qa_match.id, 'score': best_score})
+                    except Exception:
+                        pass
+            except Exception:
+                qa_match = None
+
+        if qa_match and getattr(qa_match, 'image'):
+            try:
+                image_url = request.build_absolute_uri(qa_match.image.url)
+            except Exception:
+                image_url = qa_match.image.url if qa_match.image else ''
+
+            image = {
+                'url': image_url,
+                'description': qa_match.image_description or ''
+            }
+            return image, {'qa_id': qa_match.id, 'url': image['url'], 'description': image['description']}
+    except Exception as e:
+        print('WARN: failed to attach QA image:', e)
+    return image, None
+
+
+def _extract_confidence(payload):
+    # Confidence extraction (AI may include top-level or in data)
+    c = None
+    if not payload:
+        return None
+    if isinstance(payload, dict):
+        c = payload.get('confidence')
+        if c is None:
+            data = payload.get('data') or {}
+            c = data.get('confidence')
+    try:
+        if c is not None:
+            return float(c)
+    except Exception:
+        return None
+    return None
+
+
+class ChatTurn:
+    """State of one chat message as it moves through the stages."""
+
+    def __init__(self, request, question):
+        self.request = request
+        self.question = question
+        self.project = None
+        self.language = "en"
+        self.snapshot = None
+        self.payload = None  # normalized AI payload
+        self.meta: Dict[str, Any] = {}
+        self.handled = None
+        self.confidence = None
+        self.structured: Dict[str, Any] = {}
+        self.image = None
+        self.qa_image = None
+        self.bot_response = None
+        self.response = None
+        self.timings: Dict[str, float] = {}  # stage -> ms, in run order
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self._started) * 1000
+
+    def server_timing(self) -> str:
+        """The `Server-Timing` header value for this turn."""
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.timings.items()]
+        parts.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(parts)
+
+
+# Sync stages
+
+
+def resolve_project(turn: ChatTurn, lookup: Dict[str, Any]) -> None:
+    """
+    Raises Project.DoesNotExist for an unknown pk / bot key. Bot keys are
+    resolved through the project cache (home/ai/project_cache.py).
+    """
+    with turn.stage("resolve_project"):
+        resolver = get_project_resolver()
+        if resolver is None or "bot_key" not in lookup:
+            turn.project = Project.objects.get(**lookup)
+            return
+        turn.project = resolver.project(lookup["bot_key"])
+        if turn.project is None:
+            raise Project.DoesNotExist("No project with this bot key")
+
+
+def detect_turn_language(turn: ChatTurn) -> None:
+    with turn.stage("detect_language"):
+        # Detect and persist user language (English/Hindi for now)
+        session = turn.request.session
+        turn.language = detect_language(turn.question, default=session.get("chat_lang", "en"))
+        session["chat_lang"] = turn.language
+        # Track that a user message was sent
+        _track_event(turn.project, "message_sent", {"question": turn.question, "language": turn.language})
+
+
+def lookup_cached(turn: ChatTurn) -> bool:
+    """True when the fast path or a cache answered the turn."""
+    with turn.stage("cache_lookup"):
+        turn.payload = lookup_answer(turn.project, turn.question, turn.language)
+    return turn.payload is not None
+
+
+def call_llm(turn: ChatTurn) -> None:
+    with turn.stage("llm"):
+        turn.snapshot = turn.snapshot or KnowledgeBaseSnapshot(turn.project)
+        turn.payload = generate_openrouter_answer(
+            turn.project, turn.question, language_code=turn.language, snapshot=turn.snapshot, lookup=False
+        )
+
+
+def stream_llm(turn: ChatTurn) -> Iterator[str]:
+    """Yields the answer text as the model generates it; sets `turn.payload`."""
+    with turn.stage("llm"):
+        turn.snapshot = turn.snapshot or KnowledgeBaseSnapshot(turn.project)
+        for kind, value in stream_openrouter_answer(
+            turn.project, turn.question, language_code=turn.language, snapshot=turn.snapshot, lookup=False
+        ):
+            if kind == "payload":
+                turn.payload = value
+            elif value:
+                yield value
+
+
+def finish_turn(turn: ChatTurn) -> Dict[str, Any]:
+    """
+    The stages after the AI layer returned a payload: intent handling,
+    media attachment, persistence and the response body. Returns (and
+    stores on the turn) the JSON-serializable response dict.
+    """
+    project = turn.project
+    ai_payload = turn.payload
+    turn.snapshot = turn.snapshot or KnowledgeBaseSnapshot(project)
+    turn.meta = ai_payload.pop('meta', None) or {}
+
+    with turn.stage("intent"):
+        turn.handled = _handle_intent(project, ai_payload)
+        turn.confidence = _extract_confidence(ai_payload)
+
+        # Track available structured features: MCQ, clarification, confidence
+        structured = {}
+        try:
+            data = ai_payload.get('data') or {}
+            if 'mcq' in ai_payload:
+                structured['mcq'] = ai_payload.get('mcq')
+            if 'mcq' in data:
+                structured['mcq'] = data.get('mcq')
+            if 'clarify' in ai_payload:
+                structured['clarify'] = ai_payload.get('clarify')
+            if 'clarify' in data:
+                structured['clarify'] = data.get('clarify')
+            if turn.confidence is not None:
+                structured['confidence'] = turn.confidence
+        except Exception:
+            structured = {}
+        turn.structured = structured
+
+        if structured.get('mcq'):
+            _track_event(project, 'mcq_present', {'mcq_count': len(structured.get('mcq') or [])})
+
+    with turn.stage("media"):
+        turn.image, turn.qa_image = _chat_turn_image(
+            turn.request, project, turn.question, ai_payload, turn.handled, turn.snapshot
+        )
+
+    with turn.stage("persist"):
+        _persist_turn(turn)
+
+    with turn.stage("respond"):
+        handled = turn.handled
+        # Keep existing flow: "answer" is still the main text response
+        # while also exposing structured intent and data.
+        resp = {
+            'answer': handled.get('message', ''),
+            'intent': handled.get('intent', 'unknown'),
+            'data': handled.get('data', {}),
+        }
+        if turn.bot_response is not None:
+            resp['bot_response_id'] = turn.bot_response.id
+        # merge structured items into response under top-level keys
+        resp.update(turn.structured)
+        if turn.image:
+            resp['image'] = turn.image
+        turn.response = resp
+    return resp
+
+
+def _persist_turn(turn: ChatTurn) -> None:
+    # Everything the turn stores is known now: write it in one short
+    # transaction, one INSERT per table.
+    project = turn.project
+    ai_payload = turn.payload
+    payload = ai_payload
+    if turn.qa_image is not None:
+        # Kept in BotResponse.payload for analytics / later inspection
+        payload = dict(ai_payload, qa_image=turn.qa_image)
+    contexts = []
+    try:
+        data = ai_payload.get('data') or {}
+        memory = data.get('context_memory') or data.get('memory')
+        if isinstance(memory, dict):
+            session_key = turn.request.session.session_key or ''
+            contexts = [
+                ConversationContext(project=project, session_key=session_key, key=str(k), value=v)
+                for k, v in memory.items()
+            ]
+    except Exception as e:
+        print('WARN: memory extraction error:', e)
+
+    # Cached and fast-path answers made no model call to measure.
+    skipped_llm = turn.meta.get('cached') or turn.meta.get('fast_path')
+    try:
+        with transaction.atomic():
+            turn.bot_response = BotResponse.objects.create(
+                project=project,
+                question=turn.question or "",
+                response=turn.handled.get('message', ''),
+                confidence=turn.confidence,
+                payload=payload,
+                prompt_tokens=None if skipped_llm else turn.meta.get('prompt_tokens'),
+                llm_latency_ms=None if skipped_llm else turn.meta.get('llm_ms'),
+            )
+            if contexts:
+                ConversationContext.objects.bulk_create(contexts)
+    except Exception as e:
+        turn.bot_response = None
+        print('WARN: failed to save BotResponse:', e)
+
+
+def run_chat_turn(request, lookup: Dict[str, Any], question: str) -> ChatTurn:
+    """One chat message through every stage, for the sync views."""
+    turn = ChatTurn(request, question)
+    resolve_project(turn, lookup)
+    detect_turn_language(turn)
+    if not lookup_cached(turn):
+        call_llm(turn)
+    finish_turn(turn)
+    record_timings(turn)
+    return turn
+
+
+async def arun_chat_turn(request, lookup: Dict[str, Any], question: str) -> ChatTurn:
+    """
+    `run_chat_turn` for the async views: the project, session and
+    analytics use async ORM calls and the model is awaited, so no worker
+    thread is held while it generates; the stages after it run in a
+    worker thread.
+    """
+    from asgiref.sync import sync_to_async
+
+    turn = ChatTurn(request, question)
+    with turn.stage("resolve_project"):
+        resolver = get_project_resolver()
+        if resolver is None or "bot_key" not in lookup:
+            turn.project = await Project.objects.aget(**lookup)
+        else:
+            turn.project = await resolver.aproject(lookup["bot_key"])
+            if turn.project is None:
+                raise Project.DoesNotExist("No project with this bot key")
+    with turn.stage("detect_language"):
+        session = request.session
+        turn.language = detect_language(question, default=await session.aget("chat_lang", "en"))
+        await session.aset("chat_lang", turn.language)
+        await _atrack_event(turn.project, "message_sent", {"question": question, "language": turn.language})
+    if not lookup_cached(turn):
+        with turn.stage("llm"):
+            turn.snapshot = await KnowledgeBaseSnapshot.aload(turn.project)
+            turn.payload = await agenerate_openrouter_answer(
+                turn.project, question, language_code=turn.language, snapshot=turn.snapshot, lookup=False
+            )
+    await sync_to_async(finish_turn)(turn)
+    record_timings(turn)
+    return turn
+
+
+def stream_chat_turn(turn: ChatTurn) -> Iterator[Tuple[str, Any]]:
+    """
+    The stages after language detection for a streamed turn: yields
+    `("token", text)` while the answer is generated, then one
+    `("done", response)`.
+    """
+    if lookup_cached(turn):
+        yield ("token", turn.payload.get("message", ""))
+    else:
+        for text in stream_llm(turn):
+            yield ("token", text)
+    finish_turn(turn)
+    record_timings(turn)
+    yield ("done", turn.response)
+
+
+# Timing statistics
+
+
+class StageTimings:
+    """Per-stage wall times of the last `window` turns of this worker."""
+
+    def __init__(self, window: int = 500):
+        self._turns = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+
+    def record(self, timings: Dict[str, float], total_ms: float) -> None:
+        with self._lock:
+            self._turns.append(dict(timings, total=total_ms))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            turns = list(self._turns)
+        result: Dict[str, Any] = {"turns": len(turns), "stages": {}}
+        for name in STAGES + ("total",):
+            samples = sorted(t[name] for t in turns if name in t)
+            if samples:
+                result["stages"][name] = {
+                    "count": len(samples),
+                    "mean_ms": round(sum(samples) / len(samples), 2),
+                    "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 2),
+                }
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._turns.clear()
+
+
+_stage_timings: Optional[StageTimings] = None
+_stage_timings_lock = threading.Lock()
+
+
+def get_stage_timings() -> StageTimings:
+    """Process-wide per-stage timing window."""
+    global _stage_timings
+    if _stage_timings is None:
+        with _stage_timings_lock:
+            if _stage_timings is None:
+                _stage_timings = StageTimings(int(getattr(settings, "CHAT_TIMINGS_WINDOW", 500)))
+    return _stage_timings
+
+
+def record_timings(turn: ChatTurn) -> None:
+    total = turn.total_ms
+    get_stage_timings().record(turn.timings, total)
+    slow_ms = float(getattr(settings, "CHAT_SLOW_TURN_MS", 5000))
+    if slow_ms and total >= slow_ms:
+        breakdown = ", ".join(f"{name}={ms:.0f}ms" for name, ms in turn.timings.items())
+        print(f"WARN: slow chat turn ({total:.0f} ms) for project {turn.project.id}: {breakdown}")
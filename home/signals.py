@@ -0,0 +1,104 @@
+"""
+Model signal handlers keeping AI-side caches and the resolved-project
+cache consistent with the database. Connected in
+`HomeConfig.ready`.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from home.models import Project, QuestionAnswer
+
+
+_batch = threading.local()
+
+
+def knowledge_base_changed(project_id):
+    """
+    Record that a project's QuestionAnswer rows changed.
+
+    Bumps `Project.kb_version` in the database (so caches in every worker
+    stop matching) and drops this process's cached entries right away.
+    Call it explicitly after bulk operations that bypass signals
+    (`bulk_create`, `QuerySet.update`/`delete`).
+    """
+    if not project_id:
+        return
+    Project.objects.filter(pk=project_id).update(kb_version=F("kb_version") + 1)
+
+    from home.ai.cache import get_answer_cache
+    from home.ai.project_cache import get_project_resolver
+    from home.ai.prompt_cache import get_prompt_cache
+    from home.ai.semantic_cache import get_semantic_cache
+
+    # The resolved project snapshot carries kb_version too.
+    for cache in (get_answer_cache(), get_semantic_cache(), get_prompt_cache(), get_project_resolver()):
+        if cache is not None:
+            cache.invalidate_project(project_id)
+
+
+@contextmanager
+def kb_batch():
+    """
+    Group QuestionAnswer saves/deletes (e.g. a formset submit): each
+    touched project's `kb_version` is bumped once, when the block exits.
+    Nested blocks join the outer one.
+    """
+    if getattr(_batch, "pending", None) is not None:
+        yield
+        return
+
+    _batch.pending = pending = {"project_ids": set()}
+    try:
+        yield
+    finally:
+        _batch.pending = None
+        for project_id in pending["project_ids"]:
+            knowledge_base_changed(project_id)
+
+
+@receiver(post_save, sender=Project, dispatch_uid="project_saved_workflow")
+def _project_saved(sender, instance, **kwargs):
+    # Compiled workflows are keyed on the config hash, so an edited config
+    # never reuses a stale graph; this only frees the old one early.
+    from home.ai.workflows import get_workflow_cache
+
+    get_workflow_cache().invalidate_project(instance.pk)
+    _forget_resolved_project(instance)
+
+
+@receiver(post_delete, sender=Project, dispatch_uid="project_deleted_resolver")
+def _project_deleted(sender, instance, **kwargs):
+    _forget_resolved_project(instance)
+
+
+def _forget_resolved_project(instance):
+    # Drops the cached snapshot (under the old key too, if it was rotated)
+    # and a cached miss for the current key.
+    from home.ai.project_cache import get_project_resolver
+
+    resolver = get_project_resolver()
+    if resolver is not None:
+        resolver.invalidate_project(instance.pk, instance.bot_key)
+
+
+@receiver(post_save, sender=QuestionAnswer, dispatch_uid="qa_saved_kb_version")
+def _qa_saved(sender, instance, raw=False, **kwargs):
+    pending = getattr(_batch, "pending", None)
+    if pending is not None:
+        pending["project_ids"].add(instance.project_id)
+        return
+    knowledge_base_changed(instance.project_id)
+
+
+@receiver(post_delete, sender=QuestionAnswer, dispatch_uid="qa_deleted_kb_version")
+def _qa_deleted(sender, instance, **kwargs):
+    pending = getattr(_batch, "pending", None)
+    if pending is not None:
+        pending["project_ids"].add(instance.project_id)
+        return
+    knowledge_base_changed(instance.project_id)
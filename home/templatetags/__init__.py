@@ -1 +1 @@
-"""Template tags package for `home` app."""
+"""Template tags package for `home` app."""
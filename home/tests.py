@@ -1,70 +1,1228 @@
-from django.test import TestCase, Client
-from django.contrib.auth.models import User
-from django.urls import reverse
-from .models import Project, Feedback, BotResponse
-
-
-class FeedbackAndResponseTests(TestCase):
-	def setUp(self):
-		self.client = Client()
-		self.user = User.objects.create_user(username='tester', password='pass')
-		self.project = Project.objects.create(user=self.user, name='T1')
-
-	def test_submit_feedback_creates_feedback(self):
-		url = reverse('submit_feedback', args=[self.project.id])
-		resp = self.client.post(url, {
-			'rating': '4',
-			'comment': 'Helpful',
-			'question': 'What is X?',
-			'response': 'X is Y',
-		})
-		self.assertEqual(resp.status_code, 200)
-		data = resp.json()
-		self.assertTrue(data.get('ok'))
-		self.assertTrue(Feedback.objects.filter(project=self.project, rating=4).exists())
-
-	def test_botresponse_model_saved(self):
-		BotResponse.objects.create(project=self.project, question='Q', response='A', confidence=0.75)
-		self.assertEqual(BotResponse.objects.filter(project=self.project).count(), 1)
-
-	def test_feedback_links_to_botresponse(self):
-		br = BotResponse.objects.create(project=self.project, question='Q1', response='A1', confidence=0.5)
-		url = reverse('submit_feedback', args=[self.project.id])
-		resp = self.client.post(url, {'rating': '2', 'comment': 'bad', 'question': 'Q1', 'response': 'A1', 'bot_response_id': str(br.id)})
-		self.assertEqual(resp.status_code, 200)
-		fb = Feedback.objects.filter(project=self.project).first()
-		self.assertIsNotNone(fb)
-		self.assertIsNotNone(fb.bot_response)
-		self.assertEqual(fb.bot_response.id, br.id)
-
-	def test_thumbs_down_creates_feedback(self):
-		br = BotResponse.objects.create(project=self.project, question='Q2', response='A2', confidence=0.8)
-		url = reverse('submit_feedback', args=[self.project.id])
-		resp = self.client.post(url, {'selected_option': 'thumbs_down', 'question': 'Q2', 'response': 'A2', 'bot_response_id': str(br.id)})
-		self.assertEqual(resp.status_code, 200)
-		fb = Feedback.objects.filter(project=self.project, selected_option='thumbs_down').first()
-		self.assertIsNotNone(fb)
-		self.assertEqual(fb.bot_response.id, br.id)
-
-	def test_project_analytics_view(self):
-		self.client.login(username='tester', password='pass')
-		url = reverse('project_analytics', args=[self.project.id])
-		resp = self.client.get(url)
-		self.assertEqual(resp.status_code, 200)
-		data = resp.json()
-		self.assertIn('event_counts', data)
-
-	def test_export_analytics_view(self):
-		self.client.login(username='tester', password='pass')
-		url = reverse('export_analytics', args=[self.project.id])
-		resp = self.client.get(url)
-		self.assertEqual(resp.status_code, 200)
-		self.assertEqual(resp['Content-Type'], 'text/csv')
-
-	def test_project_analytics_dashboard_view(self):
-		self.client.login(username='tester', password='pass')
-		url = reverse('project_analytics_dashboard', args=[self.project.id])
-		resp = self.client.get(url)
-		self.assertEqual(resp.status_code, 200)
-		# page should contain project name
-		self.assertIn(self.project.name, resp.content.decode())
+import json
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase, SimpleTestCase, TransactionTestCase, Client, AsyncClient, RequestFactory, override_settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .models import Project, Feedback, BotResponse, QuestionAnswer, AnalyticsEvent
+from .ai import client as ai_client
+from .ai.agent import _acall_openrouter_raw, _call_openrouter_raw, generate_openrouter_answer
+from .ai.cache import AnswerCache, get_answer_cache, normalize_question
+from .ai.semantic_cache import SemanticAnswerCache, get_semantic_cache
+from .ai.fake_openrouter import FakeOpenRouter
+from .ai.parsers import MessageStreamParser, extract_json, normalize_ai_payload
+from .ai.singleflight import SingleFlight, get_single_flight
+from .ai import agent as ai_agent
+from .ai import graph as native_graph
+from .ai.optional import LANGGRAPH_AVAILABLE
+from .ai.model_pool import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, get_model_pool
+from .ai.prompts import assemble_prompt, build_context_block, compress_answer
+from .ai.prompt_cache import get_prompt_cache
+from .ai.tokens import estimate_tokens
+from .ai.workflows import get_workflow_cache
+from .ai.retrieval import select_relevant_qas, tokenize
+from .ai.qa_index import QAIndex
+from .signals import kb_batch
+
+
+@override_settings(ANALYTICS_WRITE_BEHIND=False)
+class FeedbackAndResponseTests(TestCase):
+	def setUp(self):
+		self.client = Client()
+		self.user = User.objects.create_user(username='tester', password='pass')
+		self.project = Project.objects.create(user=self.user, name='T1')
+
+	def test_submit_feedback_creates_feedback(self):
+		url = reverse('submit_feedback', args=[self.project.id])
+		resp = self.client.post(url, {
+			'rating': '4',
+			'comment': 'Helpful',
+			'question': 'What is X?',
+			'response': 'X is Y',
+		})
+		self.assertEqual(resp.status_code, 200)
+		data = resp.json()
+		self.assertTrue(data.get('ok'))
+		self.assertTrue(Feedback.objects.filter(project=self.project, rating=4).exists())
+
+	def test_botresponse_model_saved(self):
+		BotResponse.objects.create(project=self.project, question='Q', response='A', confidence=0.75)
+		self.assertEqual(BotResponse.objects.filter(project=self.project).count(), 1)
+
+	def test_feedback_links_to_botresponse(self):
+		br = BotResponse.objects.create(project=self.project, question='Q1', response='A1', confidence=0.5)
+		url = reverse('submit_feedback', args=[self.project.id])
+		resp = self.client.post(url, {'rating': '2', 'comment': 'bad', 'question': 'Q1', 'response': 'A1', 'bot_response_id': str(br.id)})
+		self.assertEqual(resp.status_code, 200)
+		fb = Feedback.objects.filter(project=self.project).first()
+		self.assertIsNotNone(fb)
+		self.assertIsNotNone(fb.bot_response)
+		self.assertEqual(fb.bot_response.id, br.id)
+
+	def test_thumbs_down_creates_feedback(self):
+		br = BotResponse.objects.create(project=self.project, question='Q2', response='A2', confidence=0.8)
+		url = reverse('submit_feedback', args=[self.project.id])
+		resp = self.client.post(url, {'selected_option': 'thumbs_down', 'question': 'Q2', 'response': 'A2', 'bot_response_id': str(br.id)})
+		self.assertEqual(resp.status_code, 200)
+		fb = Feedback.objects.filter(project=self.project, selected_option='thumbs_down').first()
+		self.assertIsNotNone(fb)
+		self.assertEqual(fb.bot_response.id, br.id)
+
+	def test_project_analytics_view(self):
+		self.client.login(username='tester', password='pass')
+		url = reverse('project_analytics', args=[self.project.id])
+		resp = self.client.get(url)
+		self.assertEqual(resp.status_code, 200)
+		data = resp.json()
+		self.assertIn('event_counts', data)
+
+	def test_export_analytics_view(self):
+		self.client.login(username='tester', password='pass')
+		url = reverse('export_analytics', args=[self.project.id])
+		resp = self.client.get(url)
+		self.assertEqual(resp.status_code, 200)
+		self.assertEqual(resp['Content-Type'], 'text/csv')
+
+	def test_project_analytics_dashboard_view(self):
+		self.client.login(username='tester', password='pass')
+		url = reverse('project_analytics_dashboard', args=[self.project.id])
+		resp = self.client.get(url)
+		self.assertEqual(resp.status_code, 200)
+		# page should contain project name
+		self.assertIn(self.project.name, resp.content.decode())
+
+
+class OpenRouterClientTests(SimpleTestCase):
+	def setUp(self):
+		self.fake = FakeOpenRouter().start()
+		self.addCleanup(self.fake.stop)
+		ai_client.close_clients()
+		self.addCleanup(ai_client.close_clients)
+
+	def test_pooled_client_reuses_connection(self):
+		data = {'model': 'm', 'messages': [{'role': 'user', 'content': 'hi'}]}
+		for _ in range(5):
+			resp = ai_client.post_chat_completion(data, base_url=self.fake.base_url)
+			self.assertEqual(resp.status_code, 200)
+		self.assertEqual(self.fake.request_count, 5)
+		self.assertEqual(self.fake.connection_count, 1)
+
+	def test_raw_call_goes_through_configured_base_url(self):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			payload = _call_openrouter_raw('prompt')
+		self.assertEqual(payload['intent'], 'answer')
+		self.assertEqual(self.fake.last_request['messages'][0]['content'], 'prompt')
+
+	def test_connect_errors_degrade_gracefully(self):
+		self.fake.stop()
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url, OPENROUTER_MAX_RETRIES=1, OPENROUTER_BACKOFF_FACTOR=0):
+			ai_client.close_clients()
+			payload = _call_openrouter_raw('prompt')
+		self.assertEqual(payload['intent'], 'unknown')
+
+
+class AnalyticsSinkTests(SimpleTestCase):
+	def _sink(self, **kwargs):
+		from .analytics_sink import AnalyticsEventSink
+		self.batches = []
+		kwargs.setdefault('writer', lambda events: self.batches.append([e[1] for e in events]))
+		sink = AnalyticsEventSink(**kwargs)
+		self.addCleanup(sink.close)
+		return sink
+
+	def _wait_for(self, condition):
+		deadline = time.monotonic() + 2
+		while not condition() and time.monotonic() < deadline:
+			time.sleep(0.005)
+		self.assertTrue(condition())
+
+	def test_flushes_on_batch_size_and_on_interval(self):
+		sink = self._sink(batch_size=3, flush_interval=60)
+		for kind in ('a', 'b', 'c', 'd'):
+			sink.submit(1, kind)
+		self._wait_for(lambda: sink.stats()['written'] == 3)
+		self.assertEqual(self.batches, [['a', 'b', 'c']])  # 'd' waits for the next batch
+
+		sink = self._sink(batch_size=100, flush_interval=0.02)
+		sink.submit(1, 'a')
+		self._wait_for(lambda: self.batches == [['a']])
+
+	def test_overflow_policies_bound_the_queue(self):
+		for policy, kept in (('drop_oldest', ['b', 'c']), ('drop_new', ['a', 'b']), ('block', ['a', 'b'])):
+			with self.subTest(policy=policy):
+				sink = self._sink(batch_size=100, flush_interval=60, max_queued=2, overflow=policy, block_timeout=0.01)
+				accepted = [sink.submit(1, kind) for kind in ('a', 'b', 'c')]
+				self.assertEqual(accepted, [True, True, policy == 'drop_oldest'])
+				self.assertEqual(sink.stats()['dropped'], 1)
+				sink.close()
+				self.assertEqual(self.batches, [kept])
+
+	def test_failed_batch_is_retried_row_by_row(self):
+		def writer(events):
+			if any(e[1] == 'bad' for e in events):
+				raise ValueError('bad row')
+			self.batches.append([e[1] for e in events])
+		sink = self._sink(batch_size=100, flush_interval=60, writer=writer)
+		for kind in ('a', 'bad', 'c'):
+			sink.submit(1, kind)
+		self.assertEqual(sink.flush(), 3)
+		self.assertEqual(self.batches, [['a'], ['c']])
+		self.assertEqual((sink.stats()['written'], sink.stats()['failed']), (2, 1))
+
+
+class AnalyticsSinkDatabaseTests(TransactionTestCase):
+	def test_close_bulk_inserts_queued_events(self):
+		from .analytics_sink import AnalyticsEventSink
+		project = Project.objects.create(user=User.objects.create_user('sink', password='x'), name='Sink')
+		sink = AnalyticsEventSink(batch_size=4, flush_interval=60)
+		for i in range(6):
+			sink.submit(project.id, 'message_sent', {'i': i})
+		sink.close()
+		self.assertEqual(sorted(AnalyticsEvent.objects.values_list('metadata__i', flat=True)), list(range(6)))
+		self.assertEqual(sink.stats()['batches'], 2)
+
+	def test_flush_keeps_the_callers_connection(self):
+		from .analytics_sink import AnalyticsEventSink
+		project = Project.objects.create(user=User.objects.create_user('sink', password='x'), name='Sink')
+		sink = AnalyticsEventSink(batch_size=100, flush_interval=60)
+		self.addCleanup(sink.close)
+		sink.submit(project.id, 'message_sent')
+		# Only the writer thread recycles its connection; a view calling
+		# flush() keeps its own.
+		with mock.patch.object(connection, 'close_if_unusable_or_obsolete') as recycle:
+			self.assertEqual(sink.flush(), 1)
+		recycle.assert_not_called()
+
+
+class JsonSalvageTests(SimpleTestCase):
+	def test_malformed_model_outputs_are_salvaged(self):
+		from .benchmarks import MALFORMED_MODEL_OUTPUTS
+		for raw in MALFORMED_MODEL_OUTPUTS:
+			with self.subTest(raw=raw):
+				payload = normalize_ai_payload(raw)
+				self.assertNotEqual(payload['intent'], 'unknown')
+				self.assertNotIn('{', payload['message'])
+
+	def test_repairs_quotes_commas_and_literals(self):
+		self.assertEqual(
+			extract_json("Ok: {'message': \"It's \\\"Gold\\\"\", 'tags': ['a', 'b',], 'ok': True, 'x': None,} done"),
+			{'message': 'It\'s "Gold"', 'tags': ['a', 'b'], 'ok': True, 'x': None},
+		)
+		self.assertEqual(extract_json("{'m': 'say \"hi\"', 'n': 'it\\'s'}"), {'m': 'say "hi"', 'n': "it's"})
+
+	def test_kind_skips_other_values_and_unbalanced_text(self):
+		text = 'See [1] and {"q": 1} then [{"question": "Q", "answer": "A"},]'
+		self.assertEqual(extract_json(text), [1])
+		self.assertEqual(extract_json(text, dict), {'q': 1})
+		# A bracketed word in prose is not JSON, even after repair.
+		self.assertEqual(extract_json('Pick [one] of: [{"question": "Q", "answer": "A"},]', list), [{'question': 'Q', 'answer': 'A'}])
+		self.assertIsNone(extract_json('{"intent": "answer", "message": "cut o'))
+		self.assertIsNone(extract_json('no json {here]'))
+
+	def test_unbalanced_openers_take_linear_time(self):
+		started = time.perf_counter()
+		self.assertIsNone(extract_json('{' * 20000))
+		self.assertIsNone(extract_json('[' * 20000 + '"x' + ']' * 10))
+		self.assertEqual(extract_json('{' * 20000 + '{"q": 1}' + '}' * 5), {'q': 1})
+		self.assertEqual(extract_json("{it's} " * 200 + '{"q": 2}'), {'q': 2})
+		self.assertLess(time.perf_counter() - started, 2.0)
+
+	def test_free_text_still_falls_back(self):
+		payload = normalize_ai_payload('We are open from {9} to {5}.')
+		self.assertEqual(payload['intent'], 'unknown')
+		self.assertEqual(payload['message'], 'We are open from {9} to {5}.')
+
+
+class FakeOpenRouterTests(SimpleTestCase):
+	def _content(self, fake, prompt):
+		data = {'model': 'm', 'messages': [{'role': 'user', 'content': prompt}]}
+		return ai_client.post_chat_completion(data, base_url=fake.base_url).json()['choices'][0]['message']['content']
+
+	def test_canned_payloads_match_then_rotate(self):
+		payloads = [{'match': r'\bprice', 'payload': {'intent': 'answer', 'message': '10 USD'}}, 'plain one', {'intent': 'unknown'}]
+		with FakeOpenRouter(payloads=payloads) as fake:
+			self.assertEqual(json.loads(self._content(fake, 'What is the PRICE?'))['message'], '10 USD')
+			self.assertEqual(self._content(fake, 'a'), 'plain one')
+			self.assertEqual(json.loads(self._content(fake, 'b')), {'intent': 'unknown'})
+			self.assertEqual(self._content(fake, 'c'), 'plain one')
+
+	def test_latency_distribution_is_log_normal_around_the_median(self):
+		fake = FakeOpenRouter(latency=0.1, latency_sigma=0.5, seed=3)
+		delays = sorted(fake.latency_for({}) for _ in range(2000))
+		self.assertAlmostEqual(delays[1000], 0.1, delta=0.01)
+		self.assertGreater(delays[1980], 0.25)
+
+
+class LoadTestCommandTests(TransactionTestCase):
+	def test_reports_latency_throughput_and_queries(self):
+		out = StringIO()
+		call_command('loadtest', '--sessions', '1', '--messages', '6', '--latency-ms', '0', '--error-rate', '0.5', '--seed', '4', stdout=out)
+		result = json.loads(out.getvalue())
+		self.assertEqual(result['messages'], 6)
+		self.assertEqual(result['errors'], 0)  # LLM failures degrade to a fallback answer
+		self.assertGreater(result['llm']['failed'], 0)
+		self.assertGreater(result['db_queries']['per_message_mean'], 0)
+		self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+		self.assertFalse(Project.objects.exists())  # throwaway project removed
+
+
+@override_settings(ANALYTICS_WRITE_BEHIND=False)
+class AsyncChatViewTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='asyncer', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Async')
+		QuestionAnswer.objects.create(project=self.project, question='Opening hours?', answer='9 to 5')
+		self.fake = FakeOpenRouter().start()
+		self.addCleanup(self.fake.stop)
+		get_answer_cache().clear()
+		get_semantic_cache().clear()
+
+	async def test_ask_bot_by_key_async_answers_and_persists(self):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			resp = await AsyncClient().post(
+				reverse('ask_bot_by_key_async'),
+				{'question': 'Opening hours?', 'key': self.project.bot_key},
+				secure=True,
+			)
+		self.assertEqual(resp.status_code, 200)
+		data = resp.json()
+		self.assertEqual(data['intent'], 'answer')
+		self.assertIn('bot_response_id', data)
+		bot_resp = await BotResponse.objects.aget(project=self.project)
+		self.assertGreater(bot_resp.prompt_tokens, 0)
+		self.assertIsNotNone(bot_resp.llm_latency_ms)
+		self.assertNotIn('meta', bot_resp.payload)
+		self.assertIn('A1: 9 to 5', self.fake.last_request['messages'][0]['content'])
+
+	async def test_ask_bot_by_key_async_unknown_key(self):
+		resp = await AsyncClient().post(reverse('ask_bot_by_key_async'), {'question': 'x', 'key': 'nope'}, secure=True)
+		self.assertEqual(resp.status_code, 404)
+
+
+@override_settings(ANALYTICS_WRITE_BEHIND=False)
+class StreamingChatTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='streamer', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Stream')
+		self.fake = FakeOpenRouter(stream_chunk_chars=5).start()
+		self.addCleanup(self.fake.stop)
+		get_answer_cache().clear()
+		get_semantic_cache().clear()
+
+	def test_parser_extracts_message_from_partial_json(self):
+		raw = '```json\n{"intent": "answer", "data": {"message": "no"}, "message": "Hi \\"there\\" \\u0928\\n"}\n```'
+		parser = MessageStreamParser()
+		pieces = [parser.feed(raw[i:i + 3]) for i in range(0, len(raw), 3)]
+		self.assertEqual(''.join(pieces), 'Hi "there" \u0928\n')
+		self.assertGreater(sum(1 for p in pieces if p), 1)
+		self.assertTrue(parser.complete)
+
+	def test_stream_sends_tokens_then_done_and_persists(self):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			resp = self.client.post(
+				reverse('ask_bot_by_key_stream'),
+				# Not small talk, so the fast path leaves it to the model.
+				{'question': 'What do you sell?', 'key': self.project.bot_key},
+				secure=True,
+			)
+			body = b''.join(resp.streaming_content).decode()
+		self.assertEqual(resp['Content-Type'], 'text/event-stream')
+		events = [block.split('\n', 1) for block in body.strip().split('\n\n')]
+		tokens = [json.loads(data[6:])['text'] for event, data in events if event == 'event: token']
+		self.assertGreater(len(tokens), 1)
+		self.assertEqual(''.join(tokens), 'This is a canned answer from the local fake LLM.')
+		self.assertEqual(events[-1][0], 'event: done')
+		done = json.loads(events[-1][1][6:])
+		self.assertEqual(done['intent'], 'answer')
+		self.assertEqual(BotResponse.objects.get(pk=done['bot_response_id']).response, ''.join(tokens))
+		self.assertTrue(self.fake.last_request['stream'])
+
+
+class AnswerCacheTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='cacher', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Cached')
+		QuestionAnswer.objects.create(project=self.project, question='Pricing?', answer='10 USD')
+		self.fake = FakeOpenRouter().start()
+		self.addCleanup(self.fake.stop)
+		get_answer_cache().clear()
+		get_semantic_cache().clear()
+		self.addCleanup(get_answer_cache().clear)
+		self.addCleanup(get_semantic_cache().clear)
+
+	def test_normalize_question(self):
+		self.assertEqual(normalize_question('  Pricing?? '), 'pricing')
+		self.assertEqual(normalize_question('What   ARE your\nhours!'), 'what are your hours')
+
+	def test_repeated_question_skips_llm(self):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			first = generate_openrouter_answer(self.project, 'Pricing?')
+			first['data']['lead_saved'] = True  # callers may mutate the payload
+			second = generate_openrouter_answer(self.project, 'pricing')
+		self.assertEqual(self.fake.request_count, 1)
+		self.assertEqual(second['message'], first['message'])
+		self.assertNotIn('lead_saved', second['data'])
+		stats = get_answer_cache().stats(self.project.id)
+		self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+	def test_qa_change_invalidates(self):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			generate_openrouter_answer(self.project, 'Pricing?')
+			QuestionAnswer.objects.create(project=self.project, question='Refunds?', answer='30 days')
+			self.project.refresh_from_db()
+			self.assertEqual(self.project.kb_version, 2)
+			generate_openrouter_answer(self.project, 'Pricing?')
+		self.assertEqual(self.fake.request_count, 2)
+
+	def test_language_is_part_of_the_key(self):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			generate_openrouter_answer(self.project, 'Pricing?', language_code='en')
+			generate_openrouter_answer(self.project, 'Pricing?', language_code='hi')
+		self.assertEqual(self.fake.request_count, 2)
+
+	def test_unknown_intent_not_cached(self):
+		self.fake.content = 'not json at all'
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			generate_openrouter_answer(self.project, 'Pricing?')
+			generate_openrouter_answer(self.project, 'Pricing?')
+		self.assertEqual(self.fake.request_count, 2)
+
+	def test_ttl_and_lru_eviction(self):
+		now = [0.0]
+		cache = AnswerCache(max_entries=2, ttl=10, clock=lambda: now[0])
+		payload = {'intent': 'answer', 'message': 'm', 'data': {}}
+		for q in ('a', 'b'):
+			cache.set((1, 0, 'en', q), payload)
+		self.assertIsNotNone(cache.get((1, 0, 'en', 'a')))  # 'a' is now most recent
+		cache.set((1, 0, 'en', 'c'), payload)
+		self.assertIsNone(cache.get((1, 0, 'en', 'b')))
+		self.assertIsNotNone(cache.get((1, 0, 'en', 'a')))
+		now[0] = 11
+		self.assertIsNone(cache.get((1, 0, 'en', 'a')))
+		self.assertEqual(cache.stats()['evictions'], 1)
+
+
+class SemanticCacheTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='semantic', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Semantic')
+		self.payload = {'intent': 'answer', 'message': 'Plans start at 10 USD.', 'data': {}}
+
+	def test_near_duplicate_hits_and_unrelated_misses(self):
+		cache = SemanticAnswerCache(threshold=0.9)
+		self.assertTrue(cache.store(self.project, 'en', 'What are your prices?', self.payload))
+		self.assertEqual(cache.lookup(self.project, 'en', 'what are the prices')['message'], self.payload['message'])
+		self.assertIsNone(cache.lookup(self.project, 'en', 'Do you ship to India?'))
+		self.assertIsNone(cache.lookup(self.project, 'hi', 'What are your prices?'))
+		stats = cache.stats()
+		self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+		self.assertEqual(sum(stats['similarity_histogram'].values()), 3)
+
+	def test_single_letter_names_are_not_stop_words(self):
+		cache = SemanticAnswerCache()
+		questions = ('what is the price of plan a', 'what is the price of plan i', 'what is the price of plan')
+		vectors = [cache.vectorizer.transform(q) for q in questions]
+		self.assertLess(float(vectors[0] @ vectors[1]), cache.threshold)
+		self.assertLess(float(vectors[0] @ vectors[2]), cache.threshold)
+		cache.store(self.project, 'en', questions[0], self.payload)
+		self.assertIsNone(cache.lookup(self.project, 'en', questions[1]))
+		self.assertIsNone(cache.lookup(self.project, 'en', questions[2]))
+		self.assertIsNotNone(cache.lookup(self.project, 'en', 'What is the price of plan A?'))
+
+	def test_bounded_entries_evict_least_recently_used(self):
+		cache = SemanticAnswerCache(max_entries_per_project=2)
+		for q in ('opening hours', 'refund policy', 'shipping costs'):
+			cache.store(self.project, 'en', q, self.payload)
+		self.assertIsNone(cache.lookup(self.project, 'en', 'opening hours'))
+		self.assertIsNotNone(cache.lookup(self.project, 'en', 'shipping costs'))
+		self.assertEqual(cache.stats()['evictions'], 1)
+
+	def test_qa_change_invalidates_project(self):
+		cache = get_semantic_cache()
+		cache.clear()
+		self.addCleanup(cache.clear)
+		cache.store(self.project, 'en', 'What are your prices?', self.payload)
+		QuestionAnswer.objects.create(project=self.project, question='Prices?', answer='10 USD')
+		self.assertIsNone(cache.lookup(self.project, 'en', 'What are your prices?'))
+
+
+class RetrievalTests(SimpleTestCase):
+	def setUp(self):
+		self.qas = [
+			QuestionAnswer(id=i, question=f'Filler question {i}?', answer=f'Filler answer {i}.')
+			for i in range(50)
+		]
+		self.qas.append(QuestionAnswer(id=50, question='What is your refund policy?', answer='Refunds within 30 days.'))
+
+	def test_top_k_ranks_matching_qa_first(self):
+		project = Project(name='Retrieval', retrieval_top_k=3)
+		selected = select_relevant_qas(project, self.qas, 'How do refunds work? refund', 3)
+		self.assertEqual(selected[0].id, 50)
+		self.assertLessEqual(len(selected), 3)
+
+	def test_small_kb_and_disabled_retrieval_keep_all_qas(self):
+		project = Project(name='Retrieval')
+		self.assertEqual(select_relevant_qas(project, self.qas[:5], 'refund', 8), self.qas[:5])
+		self.assertEqual(len(select_relevant_qas(project, self.qas, 'refund', 0)), len(self.qas))
+
+	def test_token_budget_limits_context(self):
+		project = Project(name='Retrieval', retrieval_top_k=0, prompt_token_budget=20)
+		block = build_context_block(project, 'refund', self.qas)
+		self.assertIn('Q1:', block)
+		self.assertLess(block.count('\nQ'), len(self.qas) - 1)
+
+
+class PromptAssemblyTests(SimpleTestCase):
+	def setUp(self):
+		filler = ' '.join(f'Sentence {i} talks about the company history.' for i in range(200))
+		self.qas = [
+			QuestionAnswer(id=1, question='Where are you located?', answer=filler + ' Our office is in Pune. ' + filler),
+			QuestionAnswer(id=2, question='Opening hours?', answer='9 to 5.'),
+		]
+
+	def test_estimate_tokens_counts_non_latin_scripts_denser(self):
+		self.assertEqual(estimate_tokens('abcd' * 10), 10)
+		self.assertEqual(estimate_tokens('नमस्ते'), 3)
+
+	def test_long_answer_is_compressed_to_relevant_sentences(self):
+		answer = compress_answer(self.qas[0].answer, 'Where is your office?', 40)
+		self.assertIn('Our office is in Pune.', answer)
+		self.assertLessEqual(estimate_tokens(answer), 41)
+
+	def test_prompt_respects_model_budget_and_reports_size(self):
+		project = Project(name='Assembly', prompt_token_budget=0)
+		with override_settings(CHAT_MODEL_CONTEXT_TOKENS={'test-model': 1500}, CHAT_COMPLETION_RESERVE_TOKENS=500):
+			prompt, stats = assemble_prompt(project, 'Where is your office?', qas=self.qas, model='test-model')
+		self.assertLessEqual(stats['prompt_tokens'], 1000)
+		self.assertEqual(stats['prompt_tokens'], estimate_tokens(prompt))
+		self.assertEqual(stats['context_qas'], 2)
+		self.assertEqual(stats['compressed_answers'], 1)
+		self.assertIn('Pune', prompt)
+
+
+class PromptContextCacheTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='prompter', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Prompt', retrieval_top_k=2)
+		QuestionAnswer.objects.create(project=self.project, question='Opening hours?', answer='9 to 5 on weekdays.')
+		QuestionAnswer.objects.create(project=self.project, question='Where are you?', answer='Main street, Pune.')
+		self.project.refresh_from_db()
+		get_prompt_cache().clear()
+
+	def _uncached(self, project, question, **kwargs):
+		with override_settings(CHAT_PROMPT_CACHE_ENABLED=False):
+			return assemble_prompt(project, question, **kwargs)
+
+	def test_cached_prompt_matches_uncached(self):
+		for top_k, budget in ((2, 0), (1, 0), (2, 40)):
+			self.project.retrieval_top_k, self.project.prompt_token_budget = top_k, budget
+			for question, lang in (('When do you open?', 'en'), ('पता क्या है?', 'hi')):
+				expected = self._uncached(self.project, question, language_code=lang)
+				self.assertEqual(assemble_prompt(self.project, question, language_code=lang), expected)
+				self.assertEqual(assemble_prompt(self.project, question, language_code=lang), expected)
+		self.assertEqual(get_prompt_cache().stats()['static_entries'], 1)
+
+	def test_warm_turn_runs_no_queries(self):
+		assemble_prompt(self.project, 'When do you open?')
+		with self.assertNumQueries(0):
+			prompt, _ = assemble_prompt(self.project, 'Where is the office?')
+		self.assertIn('Main street, Pune.', prompt)
+
+	def test_qa_changes_invalidate_compiled_context(self):
+		assemble_prompt(self.project, 'Parking?')
+		qa = QuestionAnswer.objects.create(project=self.project, question='Parking?', answer='Free parking behind the shop.')
+		self.project.refresh_from_db()
+		self.assertIn('Free parking', assemble_prompt(self.project, 'Parking?')[0])
+		qa.delete()
+		self.project.refresh_from_db()
+		self.assertNotIn('Free parking', assemble_prompt(self.project, 'Parking?')[0])
+
+
+@override_settings(ANALYTICS_WRITE_BEHIND=False)
+class ChatTurnQueryTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='counter', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Counted')
+		for i in range(3):
+			QuestionAnswer.objects.create(project=self.project, question=f'Question {i}?', answer=f'Answer {i}.')
+		self.fake = FakeOpenRouter().start()
+		self.addCleanup(self.fake.stop)
+		for cache in (get_answer_cache(), get_semantic_cache(), get_prompt_cache()):
+			cache.clear()
+
+	def _turn(self, question):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url), CaptureQueriesContext(connection) as ctx:
+			resp = self.client.post(reverse('ask_bot_by_key'), {'question': question, 'key': self.project.bot_key}, secure=True)
+		self.assertEqual(resp.status_code, 200)
+		return [q['sql'] for q in ctx.captured_queries]
+
+	def _qa_reads(self, queries):
+		return [sql for sql in queries if sql.startswith('SELECT') and 'FROM "home_questionanswer"' in sql]
+
+	def test_knowledge_base_is_read_once_per_turn(self):
+		self.assertEqual(len(self._qa_reads(self._turn('Question 1?'))), 1)
+		self.assertEqual(self._qa_reads(self._turn('Question 2?')), [])
+
+	def test_query_count_does_not_grow_with_knowledge_base(self):
+		self._turn('Question 0?')
+		baseline = len(self._turn('Question 1?'))
+		with kb_batch():
+			for i in range(3, 40):
+				QuestionAnswer.objects.create(project=self.project, question=f'Question {i}?', answer=f'Answer {i}.')
+		self._turn('Question 5?')
+		self.assertEqual(len(self._turn('Question 6?')), baseline)
+
+	def test_turn_is_written_with_one_insert_per_table(self):
+		QuestionAnswer.objects.filter(question='Question 1?').update(image='answers/q1.png')
+		# Not an "answer", so the image comes from the view's QA match, not the agent.
+		self.fake.content = json.dumps({
+			'intent': 'greeting', 'message': 'Hello!', 'data': {'context_memory': {'plan': 'gold', 'city': 'Pune'}},
+		})
+		writes = [
+			sql for sql in self._turn('Question 1?')
+			if sql.startswith(('INSERT', 'UPDATE')) and ('home_botresponse' in sql or 'home_conversationcontext' in sql)
+		]
+		self.assertEqual(len(writes), 2)
+		self.assertTrue(writes[0].startswith('INSERT INTO "home_botresponse"'))
+		self.assertTrue(writes[1].startswith('INSERT INTO "home_conversationcontext"'))
+		self.assertTrue(BotResponse.objects.get().payload['qa_image']['url'].endswith('answers/q1.png'))
+		self.assertEqual(self.project.contexts.count(), 2)
+
+
+@override_settings(ANALYTICS_WRITE_BEHIND=False)
+class ProjectResolverTests(TestCase):
+	def setUp(self):
+		from .ai.project_cache import get_project_resolver
+		self.resolver = get_project_resolver()
+		self.resolver.clear()
+		self.user = User.objects.create_user(username='resolved', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Resolved', allowed_intents=['answer'])
+
+	def test_known_and_unknown_keys_hit_the_database_once(self):
+		with self.assertNumQueries(1):
+			snapshot = self.resolver.resolve(self.project.bot_key)
+		with self.assertNumQueries(0):
+			self.assertEqual(self.resolver.resolve(self.project.bot_key), snapshot)
+		self.assertEqual((snapshot.id, snapshot.name, snapshot.allowed_intents), (self.project.id, 'Resolved', ('answer',)))
+		with self.assertRaises(AttributeError):
+			snapshot.name = 'Changed'
+
+		with self.assertNumQueries(1):
+			self.assertIsNone(self.resolver.resolve('no-such-key'))
+		with self.assertNumQueries(0):
+			self.assertIsNone(self.resolver.resolve('no-such-key'))
+			self.assertIsNone(self.resolver.resolve('x' * 65))
+		self.assertEqual(self.resolver.stats()['db_lookups'], 2)
+
+	def test_project_and_knowledge_base_changes_invalidate(self):
+		old_key = self.project.bot_key
+		self.resolver.resolve(old_key)
+		self.project.name = 'Renamed'
+		self.project.save()
+		self.assertEqual(self.resolver.resolve(old_key).name, 'Renamed')
+
+		QuestionAnswer.objects.create(project=self.project, question='Q?', answer='A.')
+		self.project.refresh_from_db()
+		self.assertEqual(self.resolver.project(old_key).kb_version, self.project.kb_version)
+
+		self.resolver.resolve('rotated-key')  # cached as a miss
+		self.project.bot_key = 'rotated-key'
+		self.project.save()
+		self.assertIsNone(self.resolver.resolve(old_key))
+		self.assertEqual(self.resolver.resolve('rotated-key').id, self.project.id)
+
+	def test_warm_turn_resolves_without_queries(self):
+		from .pipeline import ChatTurn, resolve_project
+		self.resolver.resolve(self.project.bot_key)
+		turn = ChatTurn(RequestFactory().post('/'), 'Hours?')
+		with self.assertNumQueries(0):
+			resolve_project(turn, {'bot_key': self.project.bot_key})
+		self.assertEqual(
+			(turn.project.id, turn.project.kb_version, turn.project.retrieval_top_k, turn.project.prompt_token_budget),
+			(self.project.id, self.project.kb_version, self.project.retrieval_top_k, self.project.prompt_token_budget),
+		)
+
+	def test_knowledge_base_edit_is_seen_by_the_next_turn(self):
+		fake = FakeOpenRouter().start()
+		self.addCleanup(fake.stop)
+		for cache in (get_answer_cache(), get_semantic_cache(), get_prompt_cache()):
+			cache.clear()
+		qa = QuestionAnswer.objects.create(project=self.project, question='Hours?', answer='9 to 5.')
+		url = reverse('ask_bot_by_key')
+		with override_settings(OPENROUTER_BASE_URL=fake.base_url):
+			fake.content = json.dumps({'intent': 'answer', 'message': 'Old answer.', 'data': {}})
+			self.assertEqual(self.client.post(url, {'question': 'Hours?', 'key': self.project.bot_key}, secure=True).json()['answer'], 'Old answer.')
+			# The resolver is warm; the edit bumps kb_version and drops its entry.
+			qa.answer = '10 to 6.'
+			qa.save()
+			fake.content = json.dumps({'intent': 'answer', 'message': 'New answer.', 'data': {}})
+			resp = self.client.post(url, {'question': 'Hours?', 'key': self.project.bot_key}, secure=True)
+		self.assertEqual(resp.json()['answer'], 'New answer.')
+		self.assertEqual(fake.request_count, 2)
+
+	def test_snapshot_stands_in_for_the_model_without_queries(self):
+		snapshot = self.resolver.resolve(self.project.bot_key)
+		with self.assertNumQueries(0):
+			project = snapshot.as_project()
+		self.assertEqual(project.allowed_intents, ['answer'])
+		BotResponse.objects.create(project=project, question='q', response='r')
+		self.assertEqual(BotResponse.objects.filter(project=self.project).count(), 1)
+
+	def test_embed_loads_do_not_query_the_project(self):
+		url = reverse('embed_chatbot') + '?key=' + self.project.bot_key
+		self.client.get(url, secure=True)
+		with CaptureQueriesContext(connection) as ctx:
+			resp = self.client.get(url, secure=True)
+		self.assertEqual(resp.status_code, 200)
+		self.assertFalse([q for q in ctx.captured_queries if 'FROM "home_project"' in q['sql']])
+		self.assertEqual(self.client.get(reverse('embed_chatbot') + '?key=nope', secure=True).status_code, 404)
+
+
+@override_settings(ANALYTICS_WRITE_BEHIND=False)
+class ChatPipelineTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='piped', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Piped')
+		self.fake = FakeOpenRouter().start()
+		self.addCleanup(self.fake.stop)
+		for cache in (get_answer_cache(), get_semantic_cache(), get_prompt_cache()):
+			cache.clear()
+
+	def _stages(self, resp):
+		return [part.split(';')[0] for part in resp['Server-Timing'].split(', ')]
+
+	def test_both_endpoints_report_stage_timings(self):
+		from .pipeline import STAGES, get_stage_timings
+		get_stage_timings().clear()
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			by_key = self.client.post(reverse('ask_bot_by_key'), {'question': 'Opening hours?', 'key': self.project.bot_key}, secure=True)
+			by_id = self.client.post(reverse('ask_bot', args=[self.project.id]), {'question': 'Parking?'}, secure=True)
+		for resp in (by_key, by_id):
+			self.assertEqual(resp.status_code, 200)
+			self.assertEqual(self._stages(resp), list(STAGES) + ['total'])
+		self.assertEqual(by_key.json().keys(), by_id.json().keys())
+		self.assertEqual(get_stage_timings().stats()['stages']['llm']['count'], 2)
+
+	def test_cache_hit_skips_the_llm_stage(self):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			for _ in range(2):
+				resp = self.client.post(reverse('ask_bot_by_key'), {'question': 'Opening hours?', 'key': self.project.bot_key}, secure=True)
+		self.assertNotIn('llm', self._stages(resp))
+		self.assertEqual(self.fake.request_count, 1)
+
+	def test_unknown_project_is_404(self):
+		resp = self.client.post(reverse('ask_bot_by_key'), {'question': 'x', 'key': 'nope'}, secure=True)
+		self.assertEqual(resp.status_code, 404)
+		resp = self.client.post(reverse('ask_bot', args=[987654]), {'question': 'x'}, secure=True)
+		self.assertEqual(resp.status_code, 404)
+
+
+class ImageMatcherTests(SimpleTestCase):
+	def _snapshot(self, qas):
+		from .ai.prompt_cache import CompiledContext
+		from .ai.snapshot import KnowledgeBaseSnapshot
+		for i, qa in enumerate(qas):
+			qa.project_id = None
+			if i % 3 == 0:
+				qa.image = f'answers/{i}.png'
+		return KnowledgeBaseSnapshot(Project(name='Images'), CompiledContext(qas))
+
+	def _scan(self, snapshot, q, msg):
+		# The matcher this replaced: score every QA with an image.
+		from .ai.image_match import scan_best
+		best, score = scan_best(snapshot._entries.with_image, q, msg)
+		return (best.id, score) if score >= 0.45 else (None, 0.0)
+
+	def _indexed(self, matcher, q, msg):
+		best, score = matcher.best(q, msg)
+		return (best.id if best else None, score)
+
+	def _queries(self, qas):
+		replies = ['', 'you can find the store hours and parking details below', 'refund policy for orders']
+		queries = []
+		for i, qa in enumerate(qas[::7]):
+			words = qa.question.lower().split()
+			queries.append((' '.join(words[:-1]), replies[i % 3]))
+			queries.append((qa.question.lower().replace('a', 'e'), ''))
+			queries.append(('nothing alike', 'zzz'))
+		return queries
+
+	def _assert_close_to_the_scan(self, snapshot, matcher, q, msg):
+		expected = self._scan(snapshot, q, msg)
+		found = self._indexed(matcher, q, msg)
+		self.assertEqual(found[0] is None, expected[0] is None, (q, msg))
+		self.assertLessEqual(found[1], expected[1], (q, msg))
+		entries = snapshot._entries.with_image
+		winner = next((i for i, e in enumerate(entries) if e.qa.id == expected[0]), None)
+		if winner in matcher.shortlist(q, msg):
+			self.assertEqual(found, expected, (q, msg))
+
+	def test_small_knowledge_base_matches_the_scan_exactly(self):
+		from .ai.image_match import ImageMatcher
+		from .benchmarks import synthetic_qas
+		snapshot = self._snapshot(synthetic_qas(20))
+		matcher = ImageMatcher(snapshot._entries.with_image, shortlist_size=8)
+		for q, msg in self._queries(snapshot.qas):
+			self.assertEqual(self._indexed(matcher, q, msg), self._scan(snapshot, q, msg), (q, msg))
+
+	def test_indexed_stays_close_to_the_scan_on_a_larger_knowledge_base(self):
+		from .benchmarks import synthetic_qas
+		snapshot = self._snapshot(synthetic_qas(300))
+		matcher = snapshot.image_matcher
+		self.assertIs(matcher, snapshot.image_matcher)
+		# Questions near a QA that has an image (the case the matcher is for).
+		for q, msg in self._queries([qa for qa in snapshot.qas if qa.image]):
+			self._assert_close_to_the_scan(snapshot, matcher, q, msg)
+
+	def test_random_queries_stay_close_to_the_scan(self):
+		import random
+		from .ai.image_match import ImageMatcher
+		from .benchmarks import synthetic_qas
+		rng = random.Random(11)
+		snapshot = self._snapshot(synthetic_qas(450, seed=rng.randint(0, 99)))
+		matcher = ImageMatcher(snapshot._entries.with_image, shortlist_size=8)
+		vocabulary = ' '.join(qa.question.lower() for qa in snapshot.qas).split()
+
+		def mutate(text):
+			chars = list(text)
+			for _ in range(rng.randint(0, 4)):
+				i = rng.randrange(len(chars))
+				op = rng.choice('dis')
+				if op == 'd' and len(chars) > 1:
+					del chars[i]
+				elif op == 'i':
+					chars.insert(i, rng.choice('abcdeilnorst '))
+				else:
+					chars[i] = rng.choice('abcdeilnorst')
+			return ''.join(chars).strip()
+
+		for _ in range(80):
+			qa = rng.choice(snapshot.qas)
+			words = qa.question.lower().split()
+			q = mutate(' '.join(rng.sample(words, rng.randint(1, len(words)))))
+			msg = rng.choice(['', mutate(rng.choice(snapshot.qas).question.lower()), ' '.join(rng.sample(vocabulary, 8))])
+			self._assert_close_to_the_scan(snapshot, matcher, q, msg)
+
+	def test_match_sharing_no_trigram_or_word_is_missed(self):
+		# The documented difference: a ratio made of 2-character blocks
+		# puts the scan's winner outside the shortlist.
+		from .ai.image_match import ImageMatcher
+		qas = [QuestionAnswer(id=1, question='ab-cd-ef-gh', answer='x')]
+		qas += [QuestionAnswer(id=i, question=f'abq zone {i}', answer='x') for i in range(2, 12)]
+		for qa in qas:
+			qa.image = 'answers/x.png'
+		snapshot = self._snapshot(qas)
+		matcher = ImageMatcher(snapshot._entries.with_image, shortlist_size=2)
+		self.assertEqual(self._scan(snapshot, 'ab cd ef gh', '')[0], 1)
+		self.assertNotIn(0, matcher.shortlist('ab cd ef gh', ''))
+		self.assertEqual(self._indexed(matcher, 'ab cd ef gh', ''), (None, 0.0))
+
+	def test_word_overlap_match_is_found_among_similar_questions(self):
+		from .pipeline import _fuzzy_image_match
+		qas = [QuestionAnswer(id=i + 1, question=f'How long does delivery take to zone {i}?', answer='x') for i in range(60)]
+		qas.append(QuestionAnswer(id=100, question='Gift wrapping', answer='y'))
+		snapshot = self._snapshot(qas)
+		reply = 'yes, we offer gift wrapping for every order placed before noon on weekdays'
+		best, score = _fuzzy_image_match(snapshot, 'do you wrap presents?', reply)
+		self.assertEqual((best.id, score), (100, 1.0))
+		self.assertEqual(self._scan(snapshot, 'do you wrap presents?', reply), (100, 1.0))
+		self.assertEqual(_fuzzy_image_match(snapshot, 'completely unrelated', ''), (None, 0.0))
+
+
+class KnowledgeBaseSnapshotTests(SimpleTestCase):
+	def setUp(self):
+		from .ai.prompt_cache import CompiledContext
+		from .ai.snapshot import KnowledgeBaseSnapshot
+		from .benchmarks import synthetic_qas
+		self.qas = synthetic_qas(200)
+		for qa in self.qas[::4]:
+			qa.image = f'answers/{qa.id}.png'
+		self.qas.append(QuestionAnswer(id=500, question='Refund policy?', answer='Refunds take 5 days.', image='answers/r.png'))
+		self.snapshot = KnowledgeBaseSnapshot(Project(name='Lookups'), CompiledContext(self.qas))
+
+	def _needles(self):
+		import random
+		rng = random.Random(5)
+		needles = ['refund policy', 'd policy?', 'efunds take 5', 'what about', 'nothing like this', '']
+		for qa in rng.sample(self.qas, 40):
+			text = rng.choice([qa.question, qa.answer]).lower()
+			start = rng.randint(0, len(text) - 1)
+			needles.append(text[start:start + rng.randint(1, 40)])
+		return needles
+
+	def test_word_postings_match_the_scan(self):
+		ordered = sorted(self.qas, key=lambda qa: qa.id)
+		with_image = [qa for qa in ordered if qa.image]
+		for needle in self._needles():
+			scanned = next((qa for qa in ordered if needle in qa.question.lower()), None)
+			self.assertEqual(self.snapshot.find_containing(needle), scanned, needle)
+			mentioning = [qa for qa in with_image if needle in qa.question.lower() or needle in qa.answer.lower()]
+			self.assertEqual([e.qa for e in self.snapshot.image_entries_mentioning(needle)], mentioning, needle)
+
+	def test_lookups_only_visit_qas_sharing_whole_words(self):
+		from .ai.retrieval import whole_words
+		self.assertEqual(whole_words('is your refund pol'), ['your', 'refund'])
+		self.assertEqual(whole_words(' refund policy?'), ['refund', 'policy'])
+		self.assertEqual(whole_words('efun'), [])
+		entries = self.snapshot._entries
+		pool = entries.index.possibly_containing('d policy?')
+		self.assertEqual([entries.all[i].qa.id for i in pool], [500])
+
+
+class StartupImportTests(SimpleTestCase):
+	def test_importing_views_does_not_load_langchain(self):
+		out = StringIO()
+		call_command('profile_startup', 'home.views', '--json', stdout=out)
+		[result] = json.loads(out.getvalue())
+		self.assertEqual(result['heavy'], [])
+
+
+@override_settings(ANALYTICS_WRITE_BEHIND=False)
+class MicrobenchTests(TestCase):
+	def test_suite_runs_every_case(self):
+		from .microbench import run_suite
+		results = run_suite(sizes=(10,), min_time=0.001)['results']
+		self.assertIn('fuzzy_image_match[10]', results)
+		self.assertIn('build_context_prompt[10]', results)
+		self.assertIn('normalize_ai_payload', results)
+		self.assertTrue(all(r['ops_per_sec'] > 0 for r in results.values()))
+
+	def test_compare_flags_calibrated_slowdowns_and_allocations(self):
+		from .microbench import compare
+		baseline = {'meta': {'calibration_ops_per_sec': 100}, 'results': {
+			'a': {'ops_per_sec': 1000, 'peak_bytes': 10000},
+			'b': {'ops_per_sec': 1000, 'peak_bytes': 10000},
+		}}
+		# Half as fast on a machine that is half as fast: not a regression.
+		slower_machine = {'meta': {'calibration_ops_per_sec': 50}, 'results': {
+			'a': {'ops_per_sec': 500, 'peak_bytes': 10000},
+			'b': {'ops_per_sec': 500, 'peak_bytes': 20000},
+		}}
+		regressions = compare(slower_machine, baseline)
+		self.assertEqual(len(regressions), 1)
+		self.assertTrue(regressions[0].startswith('b: peak'))
+		same_machine = {'meta': {'calibration_ops_per_sec': 100}, 'results': slower_machine['results']}
+		self.assertEqual(len(compare(same_machine, baseline)), 3)
+
+
+@override_settings(ANALYTICS_WRITE_BEHIND=False)
+class FastPathTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='fast', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Acme')
+		self.fake = FakeOpenRouter().start()
+		self.addCleanup(self.fake.stop)
+		for cache in (get_answer_cache(), get_semantic_cache()):
+			cache.clear()
+
+	def _ask(self, question):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			resp = self.client.post(reverse('ask_bot_by_key'), {'question': question, 'key': self.project.bot_key}, secure=True)
+		self.assertEqual(resp.status_code, 200)
+		return resp.json()
+
+	def test_small_talk_is_answered_without_the_model(self):
+		self.assertIn('Acme', self._ask('Hello there!')['answer'])
+		self.assertIn('नमस्ते', self._ask('नमस्ते 🙏')['answer'])
+		self._ask('thanks a lot')
+		self.assertEqual(self.fake.request_count, 0)
+		resp = BotResponse.objects.filter(project=self.project).first()
+		self.assertIsNone(resp.prompt_tokens)
+		self.assertEqual(BotResponse.objects.filter(payload__data__has_key='fast_path').count(), 3)
+
+	def test_contact_details_become_a_lead(self):
+		self._ask('I am Asha, my email is asha@example.com')
+		self.assertEqual(self.fake.request_count, 0)
+		lead = self.project.leads.get()
+		self.assertEqual((lead.name, lead.email), ('Asha', 'asha@example.com'))
+
+	def test_questions_and_disabled_intents_go_to_the_model(self):
+		self._ask('hi, what are your opening hours?')
+		self._ask('is support@acme.com your email?')
+		self.project.allowed_intents = ['answer', 'unknown']
+		self.project.save()
+		self._ask('hello')
+		self.assertEqual(self.fake.request_count, 3)
+
+
+class ProjectWorkflowTests(TestCase):
+	WORKFLOW = {
+		'nodes': [
+			{'id': 'classify', 'type': 'classify_intent', 'config': {}},
+			{'id': 'lead', 'type': 'save_lead', 'config': {}},
+			{'id': 'other', 'type': 'fallback', 'config': {}},
+		],
+		'edges': [
+			{'from': 'classify', 'to': 'lead', 'condition': 'lead'},
+			{'from': 'classify', 'to': 'other', 'condition': 'unknown'},
+		],
+	}
+
+	def setUp(self):
+		self.user = User.objects.create_user(username='flow', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Flow', workflow_config=self.WORKFLOW)
+		self.fake = FakeOpenRouter(content=json.dumps({'intent': 'lead', 'message': 'Noted.', 'data': {'email': 'a@b.c'}})).start()
+		self.addCleanup(self.fake.stop)
+		for cache in (get_answer_cache(), get_semantic_cache(), get_workflow_cache()):
+			cache.clear()
+
+	def _ask(self, question):
+		with override_settings(OPENROUTER_BASE_URL=self.fake.base_url):
+			return generate_openrouter_answer(self.project, question)
+
+	def test_workflow_runs_and_is_compiled_once(self):
+		self.assertEqual(self._ask('first?')['data'], {'email': 'a@b.c'})
+		self.assertEqual(self._ask('second?')['intent'], 'lead')
+		self.assertEqual(get_workflow_cache().stats()['compiles'], 1)
+		self.assertEqual(get_workflow_cache().stats()['hits'], 1)
+
+	def test_changed_config_is_recompiled(self):
+		self._ask('first?')
+		# A workflow without a classify node answers without the model.
+		self.project.workflow_config = {'nodes': [{'id': 'other', 'type': 'fallback', 'config': {}}], 'edges': []}
+		self.project.save()
+		self.assertEqual(get_workflow_cache().stats()['entries'], 0)
+		self.assertIn("I'm not sure", self._ask('second?')['message'])
+		self.assertEqual(self.fake.request_count, 1)
+		self.assertEqual(get_workflow_cache().stats()['compiles'], 2)
+
+	def test_invalid_workflow_is_rejected_on_save(self):
+		self.project.full_clean()
+		self.project.workflow_config = {'nodes': [{'id': 'x', 'type': 'send_sms', 'config': {}}], 'edges': []}
+		with self.assertRaises(ValidationError):
+			self.project.full_clean()
+		self.project.workflow_config = {
+			'nodes': [{'id': 'a', 'type': 'respond', 'config': {}}, {'id': 'b', 'type': 'respond', 'config': {}}, {'id': 'c', 'type': 'respond', 'config': {}}],
+			'edges': [{'from': 'a', 'to': 'b'}, {'from': 'b', 'to': 'c'}, {'from': 'c', 'to': 'b'}],
+		}
+		with self.assertRaises(ValidationError) as ctx:
+			self.project.full_clean()
+		self.assertIn('cycle', str(ctx.exception))
+
+
+class QAIndexTests(SimpleTestCase):
+	def setUp(self):
+		questions = ['What is your refund policy?', 'Opening hours', 'Shipping policy']
+		answers = ['refund within 30 days.', '9 to 5.', 'we ship worldwide, refund on request.']
+		self.index = QAIndex([tokenize(q) for q in questions], answers)
+
+	def test_candidates_share_a_question_word(self):
+		self.assertEqual(self.index.sharing_any('refund please'), [0])
+		self.assertEqual(self.index.sharing_any('policy', 'opening times'), [0, 1, 2])
+		self.assertEqual(self.index.sharing_any('worldwide'), [])
+
+	def test_substring_candidates_require_interior_words(self):
+		self.assertEqual(self.index.possibly_containing('is your refund pol'), [0])
+		self.assertEqual(self.index.possibly_containing('is our refund pol'), [])
+		self.assertEqual(self.index.possibly_containing(' refund on req', field='text'), [2])
+		self.assertEqual(self.index.possibly_containing(' refund w'), [0])
+		self.assertEqual(self.index.possibly_containing(' refund w', field='text'), [0, 2])
+		# One or two words may be partial, so every QA is a candidate.
+		self.assertIsNone(self.index.possibly_containing('efun'))
+
+
+class KnowledgeBaseBatchTests(TestCase):
+	def test_batch_bumps_version_once(self):
+		user = User.objects.create_user(username='batcher', password='pass')
+		project = Project.objects.create(user=user, name='Batch')
+		with kb_batch():
+			for i in range(3):
+				QuestionAnswer.objects.create(project=project, question=f'Parking {i}', answer='Free parking.')
+			self.assertEqual(Project.objects.get(pk=project.pk).kb_version, 0)
+		self.assertEqual(Project.objects.get(pk=project.pk).kb_version, 1)
+
+
+class SingleFlightTests(TransactionTestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username='flighter', password='pass')
+		self.project = Project.objects.create(user=self.user, name='Flight')
+		get_answer_cache().clear()
+		get_semantic_cache().clear()
+		get_single_flight().clear()
+
+	def _concurrently(self, count, target):
+		barrier = threading.Barrier(count)
+		results = [None] * count
+
+		def run(i):
+			from django.db import connection
+			try:
+				barrier.wait()
+				results[i] = target(i)
+			finally:
+				connection.close()
+
+		threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+		for t in threads:
+			t.start()
+		for t in threads:
+			t.join()
+		return results
+
+	def test_concurrent_identical_questions_share_one_llm_call(self):
+		with FakeOpenRouter(latency=0.3) as fake, override_settings(OPENROUTER_BASE_URL=fake.base_url):
+			project = Project.objects.get(pk=self.project.pk)
+			payloads = self._concurrently(6, lambda i: generate_openrouter_answer(project, 'What are your prices?'))
+		self.assertEqual(fake.request_count, 1)
+		self.assertEqual({p['message'] for p in payloads}, {'This is a canned answer from the local fake LLM.'})
+		self.assertEqual(sum(1 for p in payloads if p['meta'].get('coalesced')), 5)
+		self.assertEqual(get_single_flight().stats()['llm_calls_saved'], 5)
+
+	def test_workers_coalesce_through_shared_cache(self):
+		calls = []
+
+		def slow_llm():
+			calls.append(1)
+			time.sleep(0.3)
+			return {'intent': 'answer', 'message': 'ok', 'data': {}}
+
+		# Two coalescers stand in for two gunicorn workers sharing a cache.
+		workers = [SingleFlight(cache_alias='default', poll_interval=0.01) for _ in range(2)]
+		results = self._concurrently(2, lambda i: workers[i].do(('flight', 1), slow_llm))
+		self.assertEqual(len(calls), 1)
+		self.assertEqual([r[0]['message'] for r in results], ['ok', 'ok'])
+		self.assertEqual(sorted(r[1] for r in results), [False, True])
+		self.assertEqual(sum(w.stats()['collapsed_across_workers'] for w in workers), 1)
+
+
+class ModelPoolTests(SimpleTestCase):
+	def _pool_settings(self, fake, **extra):
+		config = dict(OPENROUTER_BASE_URL=fake.base_url, OPENROUTER_MODELS=['primary', 'backup'], CHAT_BREAKER_MIN_CALLS=3)
+		config.update(extra)
+		ctx = override_settings(**config)
+		ctx.enable()
+		self.addCleanup(ctx.disable)
+		get_model_pool().reset()
+		return get_model_pool()
+
+	def test_fails_over_to_next_model_on_errors(self):
+		with FakeOpenRouter(failing_models={'primary'}) as fake:
+			self._pool_settings(fake)
+			payload = _call_openrouter_raw('prompt')
+		self.assertEqual(payload['intent'], 'answer')
+		self.assertEqual(fake.model_counts, {'primary': 1, 'backup': 1})
+
+	def test_breaker_opens_and_skips_failing_model(self):
+		with FakeOpenRouter(failing_models={'primary'}) as fake:
+			pool = self._pool_settings(fake)
+			for _ in range(5):
+				self.assertEqual(_call_openrouter_raw('prompt')['intent'], 'answer')
+		self.assertEqual(fake.model_counts, {'primary': 3, 'backup': 5})
+		self.assertEqual(pool.stats()['models']['primary']['state'], OPEN)
+		self.assertEqual(pool.stats()['failovers'], 3)
+
+	def test_all_models_failing_degrades_to_unknown(self):
+		with FakeOpenRouter(error_rate=1.0) as fake:
+			self._pool_settings(fake)
+			payload = _call_openrouter_raw('prompt')
+		self.assertEqual(payload['intent'], 'unknown')
+		self.assertEqual(fake.error_count, 2)
+
+	def test_breaker_half_opens_after_cooldown(self):
+		now = [0.0]
+		breaker = CircuitBreaker(window=4, min_calls=2, failure_ratio=0.5, slow_call_seconds=1.0, cooldown=10, clock=lambda: now[0])
+		breaker.record(True, 0.1)
+		breaker.record(True, 5.0)  # slow calls count as failures
+		self.assertEqual(breaker.state, OPEN)
+		self.assertFalse(breaker.allow())
+		now[0] = 11.0
+		self.assertEqual(breaker.state, HALF_OPEN)
+		self.assertTrue(breaker.allow())
+		self.assertFalse(breaker.allow())  # a single trial call at a time
+		breaker.record(True, 0.1)
+		self.assertEqual(breaker.state, CLOSED)
+
+	def test_hedged_request_beats_slow_primary(self):
+		with FakeOpenRouter(model_latency={'primary': 1.0}) as fake:
+			pool = self._pool_settings(fake, CHAT_HEDGE_ENABLED=True, CHAT_HEDGE_DELAY=0.1)
+			started = time.perf_counter()
+			payload = _call_openrouter_raw('prompt')
+			elapsed = time.perf_counter() - started
+		self.assertEqual(payload['intent'], 'answer')
+		self.assertLess(elapsed, 0.8)
+		self.assertEqual((pool.stats()['hedges'], pool.stats()['hedge_wins']), (1, 1))
+
+	async def test_async_call_fails_over(self):
+		with FakeOpenRouter(failing_models={'primary'}) as fake:
+			self._pool_settings(fake)
+			payload = await _acall_openrouter_raw('prompt')
+		self.assertEqual(payload['intent'], 'answer')
+		self.assertEqual(fake.model_counts, {'primary': 1, 'backup': 1})
+
+
+class GraphExecutorTests(SimpleTestCase):
+	def _graph(self):
+		graph = native_graph.StateGraph(dict)
+		graph.add_node('classify', lambda state: {'intent': 'lead' if 'email' in state['question'] else 'answer'})
+		graph.add_node('save_lead', lambda state: dict(state, saved=True))
+		graph.add_node('respond', lambda state: state)
+		graph.add_edge(native_graph.START, 'classify')
+		graph.add_conditional_edges('classify', lambda state: state['intent'], {'answer': 'respond', 'lead': 'save_lead'})
+		graph.add_edge('save_lead', 'respond')
+		graph.add_edge('respond', native_graph.END)
+		return graph.compile()
+
+	def test_routes_and_merges_node_updates(self):
+		app = self._graph()
+		self.assertEqual(app.invoke({'question': 'my email is a@b.c'}), {'question': 'my email is a@b.c', 'intent': 'lead', 'saved': True})
+		self.assertEqual(app.invoke({'question': 'hours?'}), {'question': 'hours?', 'intent': 'answer'})
+
+	def test_invalid_graphs_are_rejected(self):
+		graph = native_graph.StateGraph(dict)
+		graph.add_node('a', lambda state: state)
+		graph.add_edge(native_graph.START, 'a')
+		with self.assertRaises(native_graph.GraphError):
+			graph.compile()  # 'a' has no way out
+		graph.add_edge('a', 'a')
+		with self.assertRaisesMessage(native_graph.GraphError, 'cycle: a → a'):
+			graph.compile()
+
+	def test_independent_branches_run_on_the_caller_thread_and_join(self):
+		seen = []
+
+		def branch(key):
+			def node(state):
+				seen.append((key, threading.current_thread(), 'context' in state))
+				return {key: state['question'].upper()}
+			return node
+
+		graph = native_graph.StateGraph(dict)
+		graph.add_node('retrieve', branch('context'))
+		graph.add_node('extract', branch('lead'))
+		graph.add_node('join', lambda state: {'answer': state['context'] + state['lead']})
+		graph.add_edge(native_graph.START, 'retrieve')
+		graph.add_edge(native_graph.START, 'extract')
+		graph.add_edge('retrieve', 'join')
+		graph.add_edge('extract', 'join')
+		graph.add_edge('join', native_graph.END)
+		app = graph.compile()
+		self.assertEqual(app.levels, [('retrieve', 'extract'), ('join',)])
+		self.assertEqual(app.invoke({'question': 'hi'})['answer'], 'HIHI')
+		# Each branch sees the state from before the level, not its sibling's update.
+		self.assertEqual(seen, [('context', threading.current_thread(), False), ('lead', threading.current_thread(), False)])
+
+	def test_conflicting_parallel_writes_are_rejected(self):
+		graph = native_graph.StateGraph(dict)
+		graph.add_node('a', lambda state: {'intent': 'lead'})
+		graph.add_node('b', lambda state: {'intent': 'answer'})
+		for name in ('a', 'b'):
+			graph.add_edge(native_graph.START, name)
+			graph.add_edge(name, native_graph.END)
+		with self.assertRaises(native_graph.GraphError):
+			graph.compile().invoke({})
+
+	def test_native_and_langgraph_backends_agree(self):
+		if not LANGGRAPH_AVAILABLE:
+			self.skipTest('LangGraph is not installed')
+		state = {'question': 'hi', 'language': 'en'}
+		native = ai_agent._get_graph_app('native').invoke(dict(state))
+		langgraph = ai_agent._get_graph_app('langgraph').invoke(dict(state))
+		self.assertEqual(native['intent'], 'unknown')
+		self.assertEqual(native, langgraph)
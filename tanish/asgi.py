@@ -1,16 +1,21 @@
-"""
-ASGI config for tanish project.
-
-It exposes the ASGI callable as a module-level variable named ``application``.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
-"""
-
-import os
-
-from django.core.asgi import get_asgi_application
-
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tanish.settings')
-
-application = get_asgi_application()
+"""
+ASGI config for tanish project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Serve it with an ASGI server, e.g. `uvicorn tanish.asgi:application`. The
+chat endpoints have async variants (`ask_bot_async`, `ask_bot_by_key_async`)
+that await the LLM without holding a thread, so one worker can keep many
+chats in flight. Compare with `python manage.py benchmark wsgi_vs_asgi`.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tanish.settings')
+
+application = get_asgi_application()
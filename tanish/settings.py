@@ -1,257 +1,327 @@
-"""
- 
-
-Generated by 'django-admin startproject' using Django 5.2.3.
-
-For more information on this 
-https://docs.djangoproject.com/en/5.2/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/5.2/ref/settings/
-"""
-
-from pathlib import Path
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-CORS_ALLOW_ALL_ORIGINS = False # Only for development
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-+x#5bwc)vftampj*x#@_keq@b80d0$7lxvzo*=sop^$6gk^)f3'
-import os
-import environ
-import dj_database_url
-
-# SECURITY WARNING: don't run with debug turned on in production!
-
-
-env = environ.Env()
-environ.Env.read_env()
-
-ALLOWED_HOSTS = ["*"]
-DEBUG = False  # already set
-
-if DEBUG:
-    STORAGES = {
-        "default": {
-            "BACKEND": "django.core.files.storage.FileSystemStorage",
-        },
-        "staticfiles": {
-            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
-        },
-    }
-else:
-    STORAGES = {
-        "default": {
-            "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
-        },
-        "staticfiles": {
-            "BACKEND": "storages.backends.s3boto3.S3StaticStorage",
-        },
-    }
-# settings.py
-
-# Remove or modify X-Frame-Options
-X_FRAME_OPTIONS = 'ALLOWALL'
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'tanish',
-    "home.apps.HomeConfig",
-
-    'corsheaders',
-    'storages',
-    'django.contrib.humanize',
-    "django.contrib.sites",
-
- 
-    "allauth",
-    "allauth.account",
-    "allauth.socialaccount",
-
-  
-    "allauth.socialaccount.providers.google",
-   ]
-AUTHENTICATION_BACKENDS = [
-    "django.contrib.auth.backends.ModelBackend",
-    "allauth.account.auth_backends.AuthenticationBackend",
-]
-SITE_ID = 1
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    "django.middleware.gzip.GZipMiddleware",
-  "home.middleware.BlogViewCounterMiddleware",
-  "allauth.account.middleware.AccountMiddleware",
-
-]
-CSRF_TRUSTED_ORIGINS = [
-   "https://zerocodebots.onrender.com",
-    "https://www.zerocodebots.onrender.com",
-    
-]
-
-SOCIALACCOUNT_AUTO_SIGNUP = True
-SOCIALACCOUNT_EMAIL_REQUIRED = True
-SOCIALACCOUNT_EMAIL_VERIFICATION = "none"
-SECURE_SSL_REDIRECT = True
-SESSION_COOKIE_SECURE = True
-CSRF_COOKIE_SECURE = True
-SECURE_BROWSER_XSS_FILTER = True
-SECURE_CONTENT_TYPE_NOSNIFF = True
-SOCIALACCOUNT_PROVIDERS = {
-    "google": {
-        "SCOPE": ["profile", "email"],
-        "AUTH_PARAMS": {"access_type": "online"},
-    }
-}
-
-
-SOCIALACCOUNT_LOGIN_ON_GET = True
-
-CORS_ALLOWED_ORIGINS = [
-      "https://zerocodebots.onrender.com",
-    "https://www.zerocodebots.onrender.com",
-]
-
-ROOT_URLCONF = 'tanish.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [BASE_DIR/'templates'],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                    'django.contrib.messages.context_processors.messages',
-                    'home.context_processors.user_first_project',
-            ],
-        },
-    },
-]
-
-
-AWS_STORAGE_BUCKET_NAME = "shaurya1234512"
-AWS_S3_CUSTOM_DOMAIN = f"{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com"
-AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
-AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
-# Database
-# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-
-# Password validation
-# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
-DATABASES={
-    'default':dj_database_url.parse(env('DATABASE_URL'))
-}
-
-TEMPLATES[0]["OPTIONS"]["context_processors"] += [
-    "django.template.context_processors.request",
-]
-
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-import os
-OPENROUTER_KEY = os.getenv("OPENROUTER_KEY")
-
-
-
-# Internationalization
-# https://docs.djangoproject.com/en/5.2/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'UTC'
-
-USE_I18N = True
-
-USE_TZ = True
-
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/5.2/howto/static-files/
-
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-# settings.py
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-
-EMAIL_HOST = "smtp.zoho.in"
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
-
-EMAIL_HOST_USER = "zerocodebots@zohomail.in"
-EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
-
-DEFAULT_FROM_EMAIL = "ZeroCodeBots <zerocodebots@zohomail.in>"
-
-
-
-LOGIN_URL = '/login/'
-
-AWS_DEFAULT_ACL = None
-AWS_QUERYSTRING_AUTH = False
-
-STATIC_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/static/"
-MEDIA_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/media/"
-
-STORAGES = {
-    "default": {
-        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
-        "LOCATION": "media",
-    },
-    "staticfiles": {
-        "BACKEND": "storages.backends.s3boto3.S3StaticStorage",
-        "LOCATION": "static",
-    },
-}
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
-}
-LOGIN_REDIRECT_URL = "/"
-LOGOUT_REDIRECT_URL = "/"
-
-
-
-
-
+"""
+ 
+
+Generated by 'django-admin startproject' using Django 5.2.3.
+
+For more information on this 
+https://docs.djangoproject.com/en/5.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.2/ref/settings/
+"""
+
+from pathlib import Path
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+CORS_ALLOW_ALL_ORIGINS = False # Only for development
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-+x#5bwc)vftampj*x#@_keq@b80d0$7lxvzo*=sop^$6gk^)f3'
+import os
+import environ
+import dj_database_url
+
+# SECURITY WARNING: don't run with debug turned on in production!
+
+
+env = environ.Env()
+environ.Env.read_env()
+
+ALLOWED_HOSTS = ["*"]
+DEBUG = False  # already set
+
+if DEBUG:
+    STORAGES = {
+        "default": {
+            "BACKEND": "django.core.files.storage.FileSystemStorage",
+        },
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+        },
+    }
+else:
+    STORAGES = {
+        "default": {
+            "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        },
+        "staticfiles": {
+            "BACKEND": "storages.backends.s3boto3.S3StaticStorage",
+        },
+    }
+# settings.py
+
+# Remove or modify X-Frame-Options
+X_FRAME_OPTIONS = 'ALLOWALL'
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'tanish',
+    "home.apps.HomeConfig",
+
+    'corsheaders',
+    'storages',
+    'django.contrib.humanize',
+    "django.contrib.sites",
+
+ 
+    "allauth",
+    "allauth.account",
+    "allauth.socialaccount",
+
+  
+    "allauth.socialaccount.providers.google",
+   ]
+AUTHENTICATION_BACKENDS = [
+    "django.contrib.auth.backends.ModelBackend",
+    "allauth.account.auth_backends.AuthenticationBackend",
+]
+SITE_ID = 1
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    "django.middleware.gzip.GZipMiddleware",
+  "home.middleware.BlogViewCounterMiddleware",
+  "allauth.account.middleware.AccountMiddleware",
+
+]
+CSRF_TRUSTED_ORIGINS = [
+   "https://zerocodebots.onrender.com",
+    "https://www.zerocodebots.onrender.com",
+    
+]
+
+SOCIALACCOUNT_AUTO_SIGNUP = True
+SOCIALACCOUNT_EMAIL_REQUIRED = True
+SOCIALACCOUNT_EMAIL_VERIFICATION = "none"
+SECURE_SSL_REDIRECT = True
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+SECURE_BROWSER_XSS_FILTER = True
+SECURE_CONTENT_TYPE_NOSNIFF = True
+SOCIALACCOUNT_PROVIDERS = {
+    "google": {
+        "SCOPE": ["profile", "email"],
+        "AUTH_PARAMS": {"access_type": "online"},
+    }
+}
+
+
+SOCIALACCOUNT_LOGIN_ON_GET = True
+
+CORS_ALLOWED_ORIGINS = [
+      "https://zerocodebots.onrender.com",
+    "https://www.zerocodebots.onrender.com",
+]
+
+ROOT_URLCONF = 'tanish.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR/'templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                    'django.contrib.messages.context_processors.messages',
+                    'home.context_processors.user_first_project',
+            ],
+        },
+    },
+]
+
+
+AWS_STORAGE_BUCKET_NAME = "shaurya1234512"
+AWS_S3_CUSTOM_DOMAIN = f"{AWS_STORAGE_BUCKET_NAME}.s3.amazonaws.com"
+AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
+AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
+# Database
+# https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+
+
+# Password validation
+# https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
+DATABASES={
+    'default':dj_database_url.parse(env('DATABASE_URL'))
+}
+
+TEMPLATES[0]["OPTIONS"]["context_processors"] += [
+    "django.template.context_processors.request",
+]
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+import os
+OPENROUTER_KEY = os.getenv("OPENROUTER_KEY")
+OPENROUTER_BASE_URL = os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "google/gemma-3-12b-it:free")
+# Ordered failover pool, primary first (see home/ai/model_pool.py). Empty
+# means OPENROUTER_MODEL only.
+OPENROUTER_MODELS = [m.strip() for m in os.getenv("OPENROUTER_MODELS", "").split(",") if m.strip()]
+# Shared keep-alive pool used for all OpenRouter calls (see home/ai/client.py).
+OPENROUTER_POOL_SIZE = int(os.getenv("OPENROUTER_POOL_SIZE", "10"))
+OPENROUTER_MAX_RETRIES = int(os.getenv("OPENROUTER_MAX_RETRIES", "2"))
+OPENROUTER_BACKOFF_FACTOR = float(os.getenv("OPENROUTER_BACKOFF_FACTOR", "0.3"))
+OPENROUTER_BACKOFF_MAX = float(os.getenv("OPENROUTER_BACKOFF_MAX", "2.0"))
+
+# Exact-match answer cache in front of the LLM (see home/ai/cache.py).
+CHAT_ANSWER_CACHE_ENABLED = os.getenv("CHAT_ANSWER_CACHE_ENABLED", "1") == "1"
+CHAT_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_ANSWER_CACHE_MAX_ENTRIES", "2048"))
+CHAT_ANSWER_CACHE_TTL = int(os.getenv("CHAT_ANSWER_CACHE_TTL", "600"))
+# Near-duplicate questions (see home/ai/semantic_cache.py). Tune the
+# threshold from the similarity histogram in the project analytics JSON.
+CHAT_SEMANTIC_CACHE_ENABLED = os.getenv("CHAT_SEMANTIC_CACHE_ENABLED", "1") == "1"
+CHAT_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("CHAT_SEMANTIC_CACHE_THRESHOLD", "0.9"))
+CHAT_SEMANTIC_CACHE_MAX_PER_PROJECT = int(os.getenv("CHAT_SEMANTIC_CACHE_MAX_PER_PROJECT", "256"))
+CHAT_SEMANTIC_CACHE_TTL = int(os.getenv("CHAT_SEMANTIC_CACHE_TTL", "600"))
+# Coalesce identical in-flight questions (see home/ai/singleflight.py). The
+# cross-worker layer needs CACHES to be shared by all workers (e.g. Redis).
+CHAT_SINGLE_FLIGHT_ENABLED = os.getenv("CHAT_SINGLE_FLIGHT_ENABLED", "1") == "1"
+CHAT_SINGLE_FLIGHT_CACHE = os.getenv("CHAT_SINGLE_FLIGHT_CACHE", "default")
+CHAT_SINGLE_FLIGHT_WAIT = float(os.getenv("CHAT_SINGLE_FLIGHT_WAIT", "35"))
+# Prompt assembly (see home/ai/prompts.py and home/ai/tokens.py): room kept
+# for the completion, and the size a single answer is compressed to.
+CHAT_COMPLETION_RESERVE_TOKENS = int(os.getenv("CHAT_COMPLETION_RESERVE_TOKENS", "1024"))
+CHAT_MAX_ANSWER_TOKENS = int(os.getenv("CHAT_MAX_ANSWER_TOKENS", "300"))
+# Compiled per-project prompt context, keyed by KB version (see home/ai/prompt_cache.py).
+CHAT_PROMPT_CACHE_ENABLED = os.getenv("CHAT_PROMPT_CACHE_ENABLED", "1") == "1"
+CHAT_PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("CHAT_PROMPT_CACHE_MAX_ENTRIES", "128"))
+# Intent graph executor: "native" (home/ai/graph.py) or "langgraph".
+CHAT_GRAPH_BACKEND = os.getenv("CHAT_GRAPH_BACKEND", "native")
+# Answer greetings and bare contact details without the LLM (see home/ai/fastpath.py).
+CHAT_FAST_PATH_ENABLED = os.getenv("CHAT_FAST_PATH_ENABLED", "1") == "1"
+# Compiled per-project workflow graphs kept in memory (see home/ai/workflows.py).
+CHAT_WORKFLOW_CACHE_SIZE = int(os.getenv("CHAT_WORKFLOW_CACHE_SIZE", "64"))
+# Per-model circuit breakers and hedged requests (see home/ai/model_pool.py).
+CHAT_BREAKER_WINDOW = int(os.getenv("CHAT_BREAKER_WINDOW", "20"))
+CHAT_BREAKER_MIN_CALLS = int(os.getenv("CHAT_BREAKER_MIN_CALLS", "5"))
+CHAT_BREAKER_FAILURE_RATIO = float(os.getenv("CHAT_BREAKER_FAILURE_RATIO", "0.5"))
+CHAT_BREAKER_SLOW_SECONDS = float(os.getenv("CHAT_BREAKER_SLOW_SECONDS", "20"))
+CHAT_BREAKER_COOLDOWN = float(os.getenv("CHAT_BREAKER_COOLDOWN", "30"))
+CHAT_HEDGE_ENABLED = os.getenv("CHAT_HEDGE_ENABLED", "0") == "1"
+CHAT_HEDGE_DELAY = float(os.getenv("CHAT_HEDGE_DELAY", "2.0"))
+CHAT_HEDGE_MIN_DELAY = float(os.getenv("CHAT_HEDGE_MIN_DELAY", "0.25"))
+# bot_key -> project snapshots for the widget and chat endpoints
+# (see home/ai/project_cache.py); unknown keys are cached as misses.
+CHAT_PROJECT_CACHE_ENABLED = os.getenv("CHAT_PROJECT_CACHE_ENABLED", "1") == "1"
+CHAT_PROJECT_CACHE = os.getenv("CHAT_PROJECT_CACHE", "default")
+CHAT_PROJECT_CACHE_TTL = float(os.getenv("CHAT_PROJECT_CACHE_TTL", "60"))
+CHAT_PROJECT_CACHE_NEGATIVE_TTL = float(os.getenv("CHAT_PROJECT_CACHE_NEGATIVE_TTL", "30"))
+# Chat pipeline stage timings (see home/pipeline.py): turns slower than
+# this are logged with their breakdown (0 disables), and the analytics
+# view summarizes the last CHAT_TIMINGS_WINDOW turns per stage.
+CHAT_SLOW_TURN_MS = float(os.getenv("CHAT_SLOW_TURN_MS", "5000"))
+CHAT_TIMINGS_WINDOW = int(os.getenv("CHAT_TIMINGS_WINDOW", "500"))
+# Analytics events are queued and bulk-inserted by a background thread
+# (see home/analytics_sink.py).
+ANALYTICS_WRITE_BEHIND = os.getenv("ANALYTICS_WRITE_BEHIND", "1") == "1"
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "100"))
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "1.0"))
+ANALYTICS_MAX_QUEUED = int(os.getenv("ANALYTICS_MAX_QUEUED", "10000"))
+ANALYTICS_OVERFLOW = os.getenv("ANALYTICS_OVERFLOW", "drop_oldest")
+ANALYTICS_BLOCK_TIMEOUT = float(os.getenv("ANALYTICS_BLOCK_TIMEOUT", "0.05"))
+# Fuzzy QA image matching (see home/ai/image_match.py): QAs shortlisted
+# per text by trigram similarity before difflib scoring.
+CHAT_IMAGE_MATCH_SHORTLIST = int(os.getenv("CHAT_IMAGE_MATCH_SHORTLIST", "8"))
+
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.2/howto/static-files/
+
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# settings.py
+EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+EMAIL_HOST = "smtp.zoho.in"
+EMAIL_PORT = 587
+EMAIL_USE_TLS = True
+
+EMAIL_HOST_USER = "zerocodebots@zohomail.in"
+EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
+
+DEFAULT_FROM_EMAIL = "ZeroCodeBots <zerocodebots@zohomail.in>"
+
+
+
+LOGIN_URL = '/login/'
+
+AWS_DEFAULT_ACL = None
+AWS_QUERYSTRING_AUTH = False
+
+STATIC_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/static/"
+MEDIA_URL = f"https://{AWS_S3_CUSTOM_DOMAIN}/media/"
+
+STORAGES = {
+    "default": {
+        "BACKEND": "storages.backends.s3boto3.S3Boto3Storage",
+        "LOCATION": "media",
+    },
+    "staticfiles": {
+        "BACKEND": "storages.backends.s3boto3.S3StaticStorage",
+        "LOCATION": "static",
+    },
+}
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+LOGIN_REDIRECT_URL = "/"
+LOGOUT_REDIRECT_URL = "/"
+
+
+
+
+